@@ -0,0 +1,181 @@
+"""
+Almacén local por columnas para lecturas de sensores con marca de tiempo.
+
+Cada etiqueta (tag) tiene su propio directorio con una columna por fichero:
+
+- ``tiempo.bin``: marcas de tiempo ``datetime64[ms]``, siempre ordenadas;
+- ``valor.bin``: lecturas ``float64``;
+- ``lotes.bin``: índice de lotes, pares (lote, primera fila) que se añaden
+  cada vez que cambia el lote de las lecturas.
+
+Los ficheros solo crecen (se añade al final) y se leen como ``np.memmap``.
+Como las marcas de tiempo están ordenadas, el índice temporal es una
+búsqueda binaria (``np.searchsorted``) sobre la propia columna mapeada, que
+toca unas pocas páginas del fichero aunque tenga 10^9 filas. Las consultas
+devuelven vistas del memmap, sin copiar datos.
+"""
+
+import os
+import re
+from datetime import datetime
+
+import numpy as np
+
+TIPO_TIEMPO = np.dtype('datetime64[ms]')
+TIPO_VALOR = np.dtype(np.float64)
+TIPO_LOTES = np.dtype([('lote', np.int64), ('fila', np.int64)])
+
+COLUMNAS = {'tiempo': TIPO_TIEMPO, 'valor': TIPO_VALOR, 'lotes': TIPO_LOTES}
+
+_ETIQUETA_VALIDA = re.compile(r'^[A-Za-z0-9_.-]+$')
+
+
+def _a_tiempo(valor):
+    """Convierte datetime, cadena ISO o datetime64 (o listas de ellos) a ``datetime64[ms]``"""
+    if isinstance(valor, datetime):
+        return np.datetime64(valor, 'ms')
+    return np.asarray(valor).astype(TIPO_TIEMPO)
+
+
+class AlmacenMediciones:
+    """Almacén de solo añadir con una columna por fichero y etiqueta
+
+    Los memmaps se reabren solo cuando el fichero ha crecido desde la
+    última consulta, de modo que una consulta cuesta un ``stat`` y una
+    búsqueda binaria.
+    """
+
+    def __init__(self, directorio):
+        self.directorio = directorio
+        self._mapas = {}
+        os.makedirs(directorio, exist_ok=True)
+
+    def _ruta(self, etiqueta, columna):
+        return os.path.join(self.directorio, etiqueta, f'{columna}.bin')
+
+    def etiquetas(self):
+        """Etiquetas con datos en el almacén"""
+        return sorted(nombre for nombre in os.listdir(self.directorio)
+                      if os.path.exists(self._ruta(nombre, 'tiempo')))
+
+    def _columna(self, etiqueta, columna):
+        """Memmap de una columna completa (vacío si no existe)"""
+        tipo = COLUMNAS[columna]
+        ruta = self._ruta(etiqueta, columna)
+        try:
+            tam = os.path.getsize(ruta)
+        except FileNotFoundError:
+            return np.empty(0, dtype=tipo)
+        clave = (etiqueta, columna)
+        mapa = self._mapas.get(clave)
+        if mapa is None or mapa[0] != tam:
+            n = tam // tipo.itemsize
+            datos = np.memmap(ruta, dtype=tipo, mode='r', shape=(n,)) if n else np.empty(0, dtype=tipo)
+            mapa = self._mapas[clave] = (tam, datos)
+        return mapa[1]
+
+    def columnas(self, etiqueta):
+        """(tiempos, valores) completos de una etiqueta, como memmaps de solo lectura"""
+        tiempos = self._columna(etiqueta, 'tiempo')
+        valores = self._columna(etiqueta, 'valor')
+        # Si una escritura quedó a medias, solo cuentan las filas completas
+        n = min(len(tiempos), len(valores))
+        return tiempos[:n], valores[:n]
+
+    def anadir(self, etiqueta, tiempos, valores, lotes=None):
+        """Añade lecturas al final de una etiqueta
+
+        Las marcas de tiempo del bloque se ordenan si hace falta, pero no
+        pueden ser anteriores a la última ya guardada (ValueError). ``lotes``
+        es opcional: el número de lote de cada lectura.
+        """
+        if not _ETIQUETA_VALIDA.match(etiqueta):
+            raise ValueError(f"Etiqueta no válida: {etiqueta!r}")
+        tiempos = _a_tiempo(tiempos).ravel()
+        valores = np.asarray(valores, dtype=TIPO_VALOR).ravel()
+        if len(tiempos) != len(valores):
+            raise ValueError("tiempos y valores deben tener la misma longitud")
+        if lotes is not None:
+            lotes = np.asarray(lotes, dtype=np.int64).ravel()
+            if len(lotes) != len(valores):
+                raise ValueError("lotes y valores deben tener la misma longitud")
+        if len(tiempos) == 0:
+            return
+        if np.any(tiempos[1:] < tiempos[:-1]):
+            orden = np.argsort(tiempos, kind='stable')
+            tiempos, valores = tiempos[orden], valores[orden]
+            if lotes is not None:
+                lotes = lotes[orden]
+
+        existentes, _ = self.columnas(etiqueta)
+        if len(existentes) and tiempos[0] < existentes[-1]:
+            raise ValueError(f"Lecturas de {etiqueta!r} anteriores a la última guardada "
+                             f"({existentes[-1]})")
+        os.makedirs(os.path.join(self.directorio, etiqueta), exist_ok=True)
+
+        if lotes is not None:
+            # Entradas del índice: filas donde empieza un lote distinto del anterior
+            indice = self._columna(etiqueta, 'lotes')
+            anterior = indice['lote'][-1] if len(indice) else None
+            cambios = np.flatnonzero(np.r_[anterior is None or lotes[0] != anterior,
+                                           lotes[1:] != lotes[:-1]])
+            nuevas = np.empty(len(cambios), dtype=TIPO_LOTES)
+            nuevas['lote'] = lotes[cambios]
+            nuevas['fila'] = len(existentes) + cambios
+            with open(self._ruta(etiqueta, 'lotes'), 'ab') as f:
+                f.write(nuevas.tobytes())
+        # Valores antes que tiempos: una fila solo existe cuando están las dos
+        for columna, datos in (('valor', valores), ('tiempo', tiempos)):
+            with open(self._ruta(etiqueta, columna), 'ab') as f:
+                f.write(datos.tobytes())
+
+    def rango(self, etiqueta, inicio=None, fin=None):
+        """Lecturas con ``inicio <= tiempo < fin`` (vistas, sin copia)"""
+        tiempos, valores = self.columnas(etiqueta)
+        i = 0 if inicio is None else np.searchsorted(tiempos, _a_tiempo(inicio), side='left')
+        j = len(tiempos) if fin is None else np.searchsorted(tiempos, _a_tiempo(fin), side='left')
+        return tiempos[i:j], valores[i:j]
+
+    def ultimas_horas(self, etiqueta, horas, ahora=None):
+        """Lecturas entre ``ahora - horas`` y ``ahora`` (ambos incluidos)"""
+        ahora = _a_tiempo(ahora or datetime.now())
+        inicio = ahora - np.timedelta64(int(horas * 3_600_000), 'ms')
+        return self.rango(etiqueta, inicio, ahora + np.timedelta64(1, 'ms'))
+
+    def dias(self, etiqueta, desde, hasta=None):
+        """Lecturas de los días naturales ``desde`` a ``hasta`` (ambos incluidos)"""
+        desde = _a_tiempo(desde).astype('datetime64[D]')
+        hasta = desde if hasta is None else _a_tiempo(hasta).astype('datetime64[D]')
+        return self.rango(etiqueta, desde, hasta + np.timedelta64(1, 'D'))
+
+    def ultimos_lotes(self, etiqueta, n):
+        """Lecturas de los ``n`` últimos lotes y el número de lote de cada lectura
+
+        Devuelve (tiempos, valores, lotes); ``lotes`` es la única columna
+        que se construye (a partir del índice), el resto son vistas.
+        """
+        tiempos, valores = self.columnas(etiqueta)
+        indice = self._columna(etiqueta, 'lotes')
+        # Las filas del índice también están ordenadas: búsqueda binaria
+        fin = np.searchsorted(indice['fila'], len(tiempos), side='left')
+        indice = indice[max(fin - n, 0):fin] if n > 0 else indice[:0]
+        if len(indice) == 0:
+            return tiempos[:0], valores[:0], np.empty(0, dtype=np.int64)
+        primera = int(indice['fila'][0])
+        tamanos = np.diff(np.r_[indice['fila'], len(tiempos)])
+        return tiempos[primera:], valores[primera:], np.repeat(indice['lote'], tamanos)
+
+    def ultimos(self, etiqueta, n):
+        """Las ``n`` últimas lecturas de una etiqueta"""
+        tiempos, valores = self.columnas(etiqueta)
+        inicio = max(len(tiempos) - n, 0)
+        return tiempos[inicio:], valores[inicio:]
+
+    def version(self):
+        """Filas guardadas de cada etiqueta: cambia en cuanto se añaden lecturas
+
+        Cuesta un ``stat`` por etiqueta; sirve de clave de caché para lo que
+        se calcula o dibuja a partir del almacén.
+        """
+        return tuple((etiqueta, os.path.getsize(self._ruta(etiqueta, 'tiempo')) // TIPO_TIEMPO.itemsize)
+                     for etiqueta in self.etiquetas())
@@ -0,0 +1,420 @@
+"""
+Banco de pruebas de rendimiento de los cálculos y las figuras del informe.
+
+Mide cada cálculo central con muestras de 10^3 a 10^7 lecturas y, para
+cada figura del registro (figuras.py), el tiempo de crearla y dibujarla
+(``render``) por separado del de ``savefig`` en cada formato. Los
+resultados se guardan en JSON junto con los datos de la máquina y las
+versiones de las librerías.
+
+Con --comparar se contrasta una ejecución con otra de referencia y el
+programa termina con código 1 si alguna ruta crítica es más lenta que la
+referencia por encima del umbral; así se puede saber si una actualización
+ha hecho más lento el informe nocturno:
+
+    python benchmark.py --salida referencia.json
+    python benchmark.py --comparar referencia.json            # mide y compara
+    python benchmark.py --comparar referencia.json nuevo.json # solo compara
+
+Con --importacion se comprueba el arranque en frío: cada punto de entrada
+se importa en un intérprete nuevo y falla (código 1) si carga algún módulo
+de PROHIBIDOS o supera el presupuesto de tiempo de importación.
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import timeit
+from datetime import datetime
+from statistics import median
+
+import numpy as np
+
+# Tamaños de muestra: 10^MIN_EXPONENTE ... 10^MAX_EXPONENTE
+MIN_EXPONENTE = 3
+MAX_EXPONENTE = 7
+
+# Repeticiones por caso; se deja de repetir al agotar el presupuesto (s)
+REPETICIONES = 5
+PRESUPUESTO = 2.0
+
+# Regresión: más de un UMBRAL más lento y al menos RUIDO segundos de diferencia
+UMBRAL = 0.25
+RUIDO = 1e-3
+
+LSL, USL = 0.98, 1.02
+N_GRUPOS = 100
+
+# Arranque en frío: puntos de entrada, módulos que no deben cargar y tiempo
+# máximo de importación de cada uno (s, sin contar el arranque de Python)
+PUNTOS_ENTRADA = ('figuras', 'generar_todas_imagenes', 'capacidad_proceso',
+                  'conformidad_histograma', 'dashboard_digital', 'dashboard_simple',
+                  'ingesta', 'servidor', 'benchmark')
+PROHIBIDOS = ('scipy',)
+PRESUPUESTO_IMPORTACION = 1.5
+
+_CODIGO_IMPORTACION = '''
+import json, sys, time
+inicio = time.perf_counter()
+import {modulo}
+print(json.dumps({{'segundos': time.perf_counter() - inicio, 'modulos': list(sys.modules)}}))
+'''
+
+
+def _caso_limites_control(n, rng):
+    from limites_control import LimitesControl
+    tags = [f'tag{i}' for i in range(N_GRUPOS)]
+    indices = rng.integers(0, N_GRUPOS, n)
+    valores = rng.normal(1.00, 0.005, n)
+
+    def medir():
+        control = LimitesControl()
+        control.indices(tags)
+        control.actualizar_lote(indices, valores)
+        for tag in tags:
+            control.congelar(tag)
+        control.clasificar_indices(indices, valores)
+    return medir
+
+
+def _caso_conformidad(n, rng):
+    from conformidad_histograma import calcular_conformidad
+    valores = rng.normal(1.00, 0.008, n)
+    return lambda: calcular_conformidad(valores, LSL, USL)
+
+
+def _caso_capacidad(n, rng):
+    from capacidad import capacidad_por_grupo
+    valores = rng.normal(1.00, 0.005, n)
+    grupos = rng.integers(0, N_GRUPOS, n)
+    return lambda: capacidad_por_grupo(valores, grupos, LSL, USL, n_grupos=N_GRUPOS)
+
+
+def _caso_cpk_movil(n, rng):
+    from cpk_movil import cpk_movil
+    valores = rng.normal(1.00, 0.005, n)
+    return lambda: cpk_movil(valores, LSL, USL, ventana=720)
+
+
+def _caso_vida_util(n, rng):
+    from vida_util import estimar_vida_util
+    from estudio_estabilidad import TEMPERATURAS, LIMITE_FUERZA
+    # Lotes × condiciones × 25 meses, n lecturas en total
+    t = np.arange(25)
+    k = np.array([0.005, 0.02, 0.06])[:, None]
+    lotes = max(1, n // (len(TEMPERATURAS) * len(t)))
+    y = 100 * np.exp(-k * t) + rng.normal(0, 1.5, (lotes, len(TEMPERATURAS), len(t)))
+    return lambda: estimar_vida_util(t, y, TEMPERATURAS, LIMITE_FUERZA, n_bootstrap=0)
+
+
+def _caso_histograma(n, rng):
+    from histograma_spec import contar_histograma
+    valores = rng.normal(1.00, 0.008, n)
+    return lambda: contar_histograma(valores, bins=50)
+
+
+def _caso_reglas_control(n, rng):
+    from reglas_control import evaluar_reglas
+    valores = rng.normal(1.00, 0.004, n)
+    return lambda: evaluar_reglas(valores, 1.00, 0.004)
+
+
+def _caso_simular_cpk(n, rng):
+    from capacidad import simular_cpk
+    # Réplicas de muestras de 30: n mediciones simuladas en total
+    replicas = max(1, n // 30)
+    return lambda: simular_cpk(1.00, 0.005, LSL, USL, 30, replicas=replicas, semilla=0)
+
+
+def _caso_boceto_cuantiles(n, rng):
+    from bocetos import BocetoCuantiles
+    valores = rng.lognormal(np.log(100), 0.1, n)
+    grupos = rng.integers(0, N_GRUPOS, n)
+    return lambda: BocetoCuantiles.por_grupo(valores, grupos, N_GRUPOS)
+
+
+def _caso_histograma_fijo(n, rng):
+    from bocetos import HistogramaEspecificacion
+    valores = rng.normal(1.00, 0.008, n)
+    grupos = rng.integers(0, N_GRUPOS, n)
+    return lambda: HistogramaEspecificacion.por_grupo(valores, grupos, N_GRUPOS, LSL, USL)
+
+
+def _caso_produccion(n, rng):
+    from produccion import AgregadorProduccion
+    # n lotes de un mes en 4 líneas
+    tiempos = np.datetime64('2026-01-01') + np.sort(rng.integers(0, 30 * 86_400_000, n)).astype('timedelta64[ms]')
+    conformes = rng.random(n) >= 0.01
+    lineas = rng.integers(0, 4, n)
+    return lambda: AgregadorProduccion(4).anadir(tiempos, conformes, lineas)
+
+
+def _caso_especificaciones(n, rng):
+    from especificaciones import RegistroEspecificaciones
+    # Certificados de 200 parámetros: n mediciones en n / 200 lotes
+    parametros = [f'parametro_{i}' for i in range(200)]
+    registro = RegistroEspecificaciones({('producto', p): (i - 3, i + 3, i)
+                                         for i, p in enumerate(parametros)})
+    mediciones = rng.normal(np.arange(200), 1.0, (max(1, n // 200), 200))
+    return lambda: registro.evaluar('producto', parametros, mediciones)
+
+
+def _caso_decimacion(n, rng):
+    from decimacion import decimar
+    valores = rng.normal(1.00, 0.004, n)
+    fuera = np.abs(valores - 1.00) > 0.012
+    # Un eje de 12 pulgadas a 300 ppp
+    return lambda: decimar(np.arange(n), valores, 3600, conservar=fuera)
+
+
+# Cada caso prepara los datos de tamaño n y devuelve la función a medir
+CASOS = {
+    'limites_control': _caso_limites_control,
+    'conformidad': _caso_conformidad,
+    'capacidad': _caso_capacidad,
+    'cpk_movil': _caso_cpk_movil,
+    'vida_util': _caso_vida_util,
+    'histograma': _caso_histograma,
+    'reglas_control': _caso_reglas_control,
+    'simular_cpk': _caso_simular_cpk,
+    'boceto_cuantiles': _caso_boceto_cuantiles,
+    'histograma_fijo': _caso_histograma_fijo,
+    'especificaciones': _caso_especificaciones,
+    'produccion': _caso_produccion,
+    'decimacion': _caso_decimacion,
+}
+
+
+def cronometrar(funcion, repeticiones=REPETICIONES, presupuesto=PRESUPUESTO):
+    """Mejor tiempo y mediana (s) de una llamada a ``funcion``
+
+    Las funciones rápidas se ejecutan en bucle hasta durar 0.2 s por
+    muestra (``timeit.Timer.autorange``); se toman muestras hasta
+    ``repeticiones`` o hasta gastar el ``presupuesto``.
+    """
+    temporizador = timeit.Timer(funcion)
+    numero, total = temporizador.autorange()
+    muestras = [total / numero]
+    gastado = total
+    while len(muestras) < repeticiones and gastado < presupuesto:
+        tiempo = temporizador.timeit(numero)
+        muestras.append(tiempo / numero)
+        gastado += tiempo
+    return {'min': min(muestras), 'mediana': median(muestras), 'repeticiones': len(muestras)}
+
+
+def medir_calculos(casos=None, exponentes=range(MIN_EXPONENTE, MAX_EXPONENTE + 1), semilla=0):
+    """Tiempos de cada caso de cálculo en cada tamaño: {caso: {n: tiempos}}"""
+    resultados = {}
+    for nombre in casos or CASOS:
+        resultados[nombre] = {}
+        for exponente in exponentes:
+            n = 10 ** exponente
+            funcion = CASOS[nombre](n, np.random.default_rng(semilla))
+            resultados[nombre][str(n)] = cronometrar(funcion)
+            print(f"  {nombre:<16} n=10^{exponente}  {resultados[nombre][str(n)]['min'] * 1000:>10.3f} ms")
+    return resultados
+
+
+def medir_figuras(nombres=None, repeticiones=3):
+    """Tiempos de cada figura: creación + dibujo (``render``) y ``savefig`` por formato
+
+    ``render`` incluye crear la figura y dibujarla una vez con Agg; cada
+    ``savefig_<formato>`` guarda la figura ya creada en memoria con la
+    resolución del informe.
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    import figuras
+    from exportacion import DPI, FORMATOS
+
+    resultados = {}
+    for nombre in nombres or figuras.FIGURAS:
+        with plt.rc_context(figuras.estilo_figura(nombre)):
+            creadas = []
+
+            def render():
+                fig = figuras.FIGURAS[nombre]()
+                fig.canvas.draw()
+                creadas.append(fig)
+
+            # Cada muestra dura más de 0.2 s: siempre ``repeticiones`` muestras
+            sin_limite = float('inf')
+            tiempos = {'render': cronometrar(render, repeticiones, sin_limite)}
+            fig = creadas[-1]
+            for formato in FORMATOS:
+                guardar = lambda: fig.savefig(io.BytesIO(), format=formato, dpi=DPI)
+                tiempos[f'savefig_{formato}'] = cronometrar(guardar, repeticiones, sin_limite)
+            for fig in creadas:
+                plt.close(fig)
+        resultados[nombre] = tiempos
+        print(f"  {nombre:<24}" + "".join(f"  {clave} {t['min']:.3f} s" for clave, t in tiempos.items()))
+    return resultados
+
+
+def medir_importacion(modulos=PUNTOS_ENTRADA, repeticiones=3):
+    """Tiempo de importar cada módulo en un intérprete nuevo y módulos prohibidos que carga
+
+    Devuelve {modulo: {'min', 'mediana', 'prohibidos'}}.
+    """
+    directorio = os.path.dirname(os.path.abspath(__file__))
+    entorno = dict(os.environ, MPLBACKEND='Agg')
+    entorno.pop('TRAZAS', None)
+    resultados = {}
+    for modulo in modulos:
+        tiempos = []
+        for _ in range(repeticiones):
+            salida = subprocess.run([sys.executable, '-c', _CODIGO_IMPORTACION.format(modulo=modulo)],
+                                    cwd=directorio, env=entorno, capture_output=True,
+                                    text=True, check=True).stdout
+            medida = json.loads(salida.splitlines()[-1])
+            tiempos.append(medida['segundos'])
+        prohibidos = sorted(set(medida['modulos']) & set(PROHIBIDOS))
+        resultados[modulo] = {'min': min(tiempos), 'mediana': median(tiempos),
+                              'prohibidos': prohibidos}
+        print(f"  {modulo:<24}  {min(tiempos):.3f} s" + (f"  ({', '.join(prohibidos)})" if prohibidos else ''))
+    return resultados
+
+
+def comprobar_importacion(resultados, presupuesto=PRESUPUESTO_IMPORTACION):
+    """Incumplimientos del presupuesto de arranque: lista de (modulo, motivo)"""
+    fallos = []
+    for modulo, medida in resultados.items():
+        if medida['prohibidos']:
+            fallos.append((modulo, f"importa {', '.join(medida['prohibidos'])}"))
+        if medida['min'] > presupuesto:
+            fallos.append((modulo, f"{medida['min']:.2f} s > {presupuesto:.2f} s"))
+    return fallos
+
+
+def metadatos_maquina():
+    """Datos de la máquina y versiones de las librerías"""
+    import matplotlib
+    memoria = None
+    if hasattr(os, 'sysconf') and 'SC_PHYS_PAGES' in os.sysconf_names:
+        memoria = os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+    return {
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'nodo': platform.node(),
+        'sistema': platform.platform(),
+        'arquitectura': platform.machine(),
+        'procesador': platform.processor(),
+        'cpus': os.cpu_count(),
+        'memoria_bytes': memoria,
+        'python': platform.python_version(),
+        'implementacion': platform.python_implementation(),
+        'numpy': np.__version__,
+        'matplotlib': matplotlib.__version__,
+    }
+
+
+def ejecutar(casos=None, exponentes=range(MIN_EXPONENTE, MAX_EXPONENTE + 1), figuras=None,
+             con_figuras=True):
+    """Ejecuta el banco completo y devuelve el diccionario que se guarda en JSON"""
+    print("⏱️  Cálculos")
+    resultado = {'maquina': metadatos_maquina(), 'calculos': medir_calculos(casos, exponentes)}
+    if con_figuras:
+        print("⏱️  Figuras")
+        resultado['figuras'] = medir_figuras(figuras)
+    return resultado
+
+
+def _aplanar(resultado):
+    """{'calculos/caso/n' o 'figuras/nombre/etapa': mejor tiempo}"""
+    planos = {}
+    for seccion in ('calculos', 'figuras'):
+        for ruta, medidas in resultado.get(seccion, {}).items():
+            for clave, tiempos in medidas.items():
+                planos[f'{seccion}/{ruta}/{clave}'] = tiempos['min']
+    return planos
+
+
+def comparar(referencia, nuevo, umbral=UMBRAL, rutas=None, ruido=RUIDO):
+    """Compara dos ejecuciones medida a medida
+
+    Devuelve una lista de filas (clave, referencia, nuevo, cociente,
+    regresion). Solo cuentan como regresión las medidas de las ``rutas``
+    indicadas (casos o figuras; todas por defecto) que son más de un
+    ``umbral`` más lentas y al menos ``ruido`` segundos más lentas.
+    """
+    antes, despues = _aplanar(referencia), _aplanar(nuevo)
+    filas = []
+    for clave in antes.keys() & despues.keys():
+        ruta = clave.split('/')[1]
+        cociente = despues[clave] / antes[clave] if antes[clave] else float('inf')
+        regresion = ((rutas is None or ruta in rutas)
+                     and cociente > 1 + umbral and despues[clave] - antes[clave] > ruido)
+        filas.append((clave, antes[clave], despues[clave], cociente, regresion))
+    return sorted(filas)
+
+
+def mostrar_comparacion(filas):
+    ancho = max(len(f[0]) for f in filas)
+    print(f"{'Medida':<{ancho}}  {'Referencia':>12}  {'Nuevo':>12}  {'Cociente':>9}")
+    for clave, antes, despues, cociente, regresion in filas:
+        marca = '  ❌ REGRESIÓN' if regresion else ''
+        print(f"{clave:<{ancho}}  {antes * 1000:>10.3f}ms  {despues * 1000:>10.3f}ms  {cociente:>8.2f}x{marca}")
+
+
+def _leer(ruta):
+    with open(ruta, encoding='utf-8') as f:
+        return json.load(f)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Banco de pruebas de rendimiento del informe")
+    parser.add_argument('--min-exponente', type=int, default=MIN_EXPONENTE)
+    parser.add_argument('--max-exponente', type=int, default=MAX_EXPONENTE)
+    parser.add_argument('--casos', nargs='+', choices=list(CASOS), help="casos de cálculo a medir")
+    parser.add_argument('--figuras', nargs='+', help="figuras a medir (todas por defecto)")
+    parser.add_argument('--sin-figuras', action='store_true', help="mide solo los cálculos")
+    parser.add_argument('--salida', help="fichero JSON de resultados")
+    parser.add_argument('--comparar', nargs='+', metavar='JSON',
+                        help="REFERENCIA [NUEVO]: sin NUEVO se mide ahora")
+    parser.add_argument('--umbral', type=float, default=UMBRAL,
+                        help=f"fracción de empeoramiento admitida (por defecto {UMBRAL})")
+    parser.add_argument('--rutas', nargs='+',
+                        help="casos o figuras que hacen fallar la comparación (todos por defecto)")
+    parser.add_argument('--importacion', nargs='*', metavar='MODULO',
+                        help="comprueba el arranque en frío de los puntos de entrada (todos por defecto)")
+    parser.add_argument('--presupuesto-importacion', type=float, default=PRESUPUESTO_IMPORTACION,
+                        help=f"segundos máximos de importación (por defecto {PRESUPUESTO_IMPORTACION})")
+    args = parser.parse_args()
+    if args.importacion is not None:
+        print("⏱️  Importación en frío")
+        fallos = comprobar_importacion(medir_importacion(args.importacion or PUNTOS_ENTRADA),
+                                       args.presupuesto_importacion)
+        for modulo, motivo in fallos:
+            print(f"❌ {modulo}: {motivo}")
+        if fallos:
+            sys.exit(1)
+        print("✅ Arranque dentro del presupuesto")
+        sys.exit(0)
+    if args.comparar and len(args.comparar) > 2:
+        parser.error("--comparar admite como mucho dos ficheros")
+
+    if args.comparar and len(args.comparar) == 2:
+        nuevo = _leer(args.comparar[1])
+    else:
+        nuevo = ejecutar(args.casos, range(args.min_exponente, args.max_exponente + 1),
+                         args.figuras, not args.sin_figuras)
+        salida = args.salida or f"benchmark_{datetime.now():%Y%m%d_%H%M%S}.json"
+        with open(salida, 'w', encoding='utf-8') as f:
+            json.dump(nuevo, f, indent=2, ensure_ascii=False)
+        print(f"💾 Resultados guardados en {salida}")
+
+    if args.comparar:
+        filas = comparar(_leer(args.comparar[0]), nuevo, args.umbral, args.rutas)
+        if not filas:
+            sys.exit("No hay medidas comunes entre las dos ejecuciones")
+        mostrar_comparacion(filas)
+        regresiones = [f[0] for f in filas if f[4]]
+        if regresiones:
+            print(f"❌ {len(regresiones)} medidas más de un {args.umbral:.0%} más lentas")
+            sys.exit(1)
+        print("✅ Sin regresiones")
@@ -0,0 +1,335 @@
+"""
+Resúmenes (bocetos) fusionables de la distribución de un parámetro.
+
+``BocetoCuantiles`` es un t-digest: la distribución se resume en unos
+cientos de centroides (media y peso), pequeños en las colas y grandes en
+el centro, de modo que los percentiles extremos que usa la capacidad por
+percentiles (0.135 % y 99.865 %, ISO 22514-2) y las fracciones fuera de
+especificación (PPM) salen con buena precisión sin guardar las lecturas.
+
+Los bocetos de distintos turnos, líneas o procesos se fusionan sin perder
+precisión (basta enviar o guardar sus centroides; se pueden serializar con
+pickle), así que la capacidad de la planta se obtiene uniendo los de cada
+línea. La compresión está vectorizada: ordenar, asignar a cada punto su
+centroide con la función de escala y sumar con ``np.add.reduceat``.
+
+``HistogramaEspecificacion`` es un histograma de bins fijos de igual ancho
+con LSL y USL exactamente en dos de sus bordes, más las sumas para media y
+desviación. Dos histogramas con los mismos límites se fusionan sumando sus
+arrays, ocupan unos cientos de bytes (``a_bytes``) y dan directamente la
+conformidad exacta, media, std y Cpk, y los conteos para dibujarlo.
+"""
+
+import numpy as np
+
+from capacidad import PERCENTILES_ISO, indices_capacidad, indices_percentiles
+
+# Compresión δ: unos δ/2 centroides como mucho; más alta, colas más precisas
+COMPRESION = 500
+
+# Lecturas que se acumulan sin comprimir antes de fusionarlas con los centroides
+TAM_BUFER = 1 << 16
+
+# Bins del histograma entre LSL y USL y a cada lado, fuera de especificación
+BINS_DENTRO = 20
+BINS_FUERA = 10
+
+
+def _comprimir(medias, pesos, compresion, grupos=None):
+    """Agrupa puntos con peso en centroides t-digest, por grupo si se da ``grupos``
+
+    Cada grupo se ordena por valor y sus puntos se reparten en centroides
+    con la escala ``k(q) = δ/(2π)·asin(2q - 1)``: los puntos cuyo cuantil
+    (peso acumulado anterior / peso total) cae en la misma unidad de ``k``
+    forman un centroide. Devuelve (medias, pesos, grupos) de los centroides,
+    ordenados por grupo y valor.
+    """
+    if grupos is None:
+        grupos = np.zeros(len(medias), dtype=np.intp)
+    # Orden por grupo y valor: dos argsort (el de enteros, estable) son más
+    # rápidos que np.lexsort
+    orden = np.argsort(medias)
+    orden = orden[np.argsort(grupos[orden], kind='stable')]
+    medias, pesos, grupos = medias[orden], pesos[orden], grupos[orden]
+
+    acumulado = np.cumsum(pesos)
+    inicio_grupo = np.flatnonzero(np.r_[True, grupos[1:] != grupos[:-1]])
+    longitudes = np.diff(np.r_[inicio_grupo, len(grupos)])
+    base = np.repeat(acumulado[inicio_grupo] - pesos[inicio_grupo], longitudes)
+    total = np.repeat(np.add.reduceat(pesos, inicio_grupo), longitudes)
+    q = (acumulado - pesos - base) / total
+    k = np.floor(compresion / (2 * np.pi) * np.arcsin(np.clip(2 * q - 1, -1, 1)))
+
+    inicios = np.flatnonzero(np.r_[True, (grupos[1:] != grupos[:-1]) | (k[1:] != k[:-1])])
+    peso_centroide = np.add.reduceat(pesos, inicios)
+    media_centroide = np.add.reduceat(pesos * medias, inicios) / peso_centroide
+    return media_centroide, peso_centroide, grupos[inicios]
+
+
+class BocetoCuantiles:
+    """t-digest de un parámetro: cuantiles, CDF y capacidad por percentiles
+
+    ``anadir`` acepta lecturas sueltas o por lotes (los NaN se ignoran) y
+    ``fusionar`` une otros bocetos en este. Los extremos ``minimo`` y
+    ``maximo`` se guardan exactos.
+    """
+
+    def __init__(self, compresion=COMPRESION):
+        self.compresion = compresion
+        self.medias = np.empty(0)
+        self.pesos = np.empty(0)
+        self.minimo = np.inf
+        self.maximo = -np.inf
+        self._bufer = []
+        self._en_bufer = 0
+
+    @classmethod
+    def por_grupo(cls, valores, grupos, n_grupos=None, compresion=COMPRESION):
+        """Un boceto por grupo (p. ej. turno × línea) en una sola pasada
+
+        ``grupos`` son códigos enteros 0..G-1 (ver ``capacidad.codificar_grupos``).
+        """
+        valores = np.asarray(valores, dtype=float)
+        grupos = np.asarray(grupos, dtype=np.intp)
+        validos = ~np.isnan(valores)
+        valores, grupos = valores[validos], grupos[validos]
+        if n_grupos is None:
+            n_grupos = int(grupos.max()) + 1 if grupos.size else 0
+        medias, pesos, grupo = _comprimir(valores, np.ones(len(valores)), compresion, grupos)
+        cortes = np.searchsorted(grupo, np.arange(n_grupos + 1))
+        minimos = np.full(n_grupos, np.inf)
+        maximos = np.full(n_grupos, -np.inf)
+        np.minimum.at(minimos, grupos, valores)
+        np.maximum.at(maximos, grupos, valores)
+        bocetos = []
+        for g in range(n_grupos):
+            boceto = cls(compresion)
+            boceto.medias = medias[cortes[g]:cortes[g + 1]]
+            boceto.pesos = pesos[cortes[g]:cortes[g + 1]]
+            boceto.minimo, boceto.maximo = minimos[g], maximos[g]
+            bocetos.append(boceto)
+        return bocetos
+
+    @property
+    def n(self):
+        """Lecturas resumidas"""
+        return self.pesos.sum() + self._en_bufer
+
+    def anadir(self, valores):
+        """Añade lecturas y devuelve el propio boceto"""
+        valores = np.asarray(valores, dtype=float).ravel()
+        valores = valores[~np.isnan(valores)]
+        if valores.size:
+            self.minimo = min(self.minimo, valores.min())
+            self.maximo = max(self.maximo, valores.max())
+            self._bufer.append(valores)
+            self._en_bufer += valores.size
+            if self._en_bufer >= TAM_BUFER:
+                self._comprimir()
+        return self
+
+    def _comprimir(self):
+        if not self._bufer:
+            return
+        medias = np.concatenate([self.medias, *self._bufer])
+        pesos = np.concatenate([self.pesos, np.ones(self._en_bufer)])
+        self.medias, self.pesos, _ = _comprimir(medias, pesos, self.compresion)
+        self._bufer, self._en_bufer = [], 0
+
+    def fusionar(self, *otros):
+        """Une en este boceto los centroides de ``otros`` y devuelve el propio boceto"""
+        for boceto in (self, *otros):
+            boceto._comprimir()
+        medias = np.concatenate([b.medias for b in (self, *otros)])
+        pesos = np.concatenate([b.pesos for b in (self, *otros)])
+        self.medias, self.pesos, _ = _comprimir(medias, pesos, self.compresion)
+        self.minimo = min(b.minimo for b in (self, *otros))
+        self.maximo = max(b.maximo for b in (self, *otros))
+        return self
+
+    def _puntos(self):
+        """Valores y pesos acumulados en los que se interpola (extremos incluidos)"""
+        self._comprimir()
+        centros = np.cumsum(self.pesos) - self.pesos / 2
+        valores = np.r_[self.minimo, self.medias, self.maximo]
+        return valores, np.r_[0.0, centros, self.pesos.sum()]
+
+    def cuantil(self, q):
+        """Valor por debajo del cual queda la fracción ``q`` de las lecturas"""
+        valores, acumulado = self._puntos()
+        return np.interp(np.asarray(q) * acumulado[-1], acumulado, valores)
+
+    def cdf(self, x):
+        """Fracción de lecturas por debajo de ``x``"""
+        valores, acumulado = self._puntos()
+        return np.interp(x, valores, acumulado) / acumulado[-1]
+
+    def capacidad(self, lsl, usl):
+        """Índices por percentiles (ISO 22514-2) y PPM estimadas fuera de LSL/USL
+
+        Devuelve el diccionario de ``capacidad.indices_percentiles`` con
+        ``ppm_bajo``, ``ppm_alto`` y ``ppm`` a partir de la CDF del boceto.
+        """
+        p_bajo, mediana, p_alto = self.cuantil(PERCENTILES_ISO)
+        resultado = indices_percentiles(p_bajo, mediana, p_alto, lsl, usl)
+        resultado['ppm_bajo'] = self.cdf(lsl) * 1e6
+        resultado['ppm_alto'] = (1 - self.cdf(usl)) * 1e6
+        resultado['ppm'] = resultado['ppm_bajo'] + resultado['ppm_alto']
+        return resultado
+
+
+def bordes_especificacion(lsl, usl, bins_dentro=BINS_DENTRO, bins_fuera=BINS_FUERA):
+    """Bordes de igual ancho con LSL y USL exactamente en dos de ellos
+
+    Hay ``bins_dentro`` bins entre LSL y USL y ``bins_fuera`` más a cada lado.
+    """
+    if not (np.isfinite(lsl) and np.isfinite(usl) and lsl < usl):
+        raise ValueError(f"Hacen falta LSL < USL finitos: {lsl!r}, {usl!r}")
+    k = np.arange(-bins_fuera, bins_dentro + bins_fuera + 1)
+    bordes = lsl + (usl - lsl) * k / bins_dentro
+    bordes[bins_fuera], bordes[bins_fuera + bins_dentro] = lsl, usl
+    return bordes
+
+
+class HistogramaEspecificacion:
+    """Histograma fusionable de bins fijos alineados con LSL/USL
+
+    ``conteos`` tiene un elemento por bin más uno por debajo del primer
+    borde (posición 0) y otro por encima del último (posición -1). Los bins
+    son [izquierda, derecha) salvo el último dentro de especificación, que
+    incluye USL, de modo que la conformidad (LSL <= x <= USL) es exacta.
+    Media y std salen de las sumas de ``x - centro`` (centro = (LSL+USL)/2).
+    Los NaN se ignoran.
+    """
+
+    def __init__(self, lsl, usl, bins_dentro=BINS_DENTRO, bins_fuera=BINS_FUERA):
+        self.lsl, self.usl = float(lsl), float(usl)
+        self.bins_dentro, self.bins_fuera = int(bins_dentro), int(bins_fuera)
+        self.bordes = bordes_especificacion(self.lsl, self.usl, self.bins_dentro, self.bins_fuera)
+        self.centro = (self.lsl + self.usl) / 2
+        self.conteos = np.zeros(len(self.bordes) + 1, dtype=np.int64)
+        self.suma = 0.0
+        self.suma_cuadrados = 0.0
+        self.minimo = np.inf
+        self.maximo = -np.inf
+
+    def _posiciones(self, valores):
+        """Posición en ``conteos`` de cada valor"""
+        posiciones = np.searchsorted(self.bordes, valores, side='right')
+        # USL cuenta en el último bin dentro de especificación
+        posiciones[valores == self.usl] -= 1
+        return posiciones
+
+    @classmethod
+    def por_grupo(cls, valores, grupos, n_grupos, lsl, usl, bins_dentro=BINS_DENTRO,
+                  bins_fuera=BINS_FUERA):
+        """Un histograma por grupo (p. ej. turno × línea) en una sola pasada
+
+        ``grupos`` son códigos enteros 0..G-1 (ver ``capacidad.codificar_grupos``).
+        Se puede llamar en procesos de trabajo y fusionar los resultados.
+        """
+        valores = np.asarray(valores, dtype=float).ravel()
+        grupos = np.asarray(grupos, dtype=np.intp).ravel()
+        validos = ~np.isnan(valores)
+        valores, grupos = valores[validos], grupos[validos]
+        plantilla = cls(lsl, usl, bins_dentro, bins_fuera)
+        ancho = len(plantilla.conteos)
+        conteos = np.bincount(grupos * ancho + plantilla._posiciones(valores),
+                              minlength=n_grupos * ancho).reshape(n_grupos, ancho)
+        desvio = valores - plantilla.centro
+        sumas = np.bincount(grupos, desvio, minlength=n_grupos)
+        sumas_cuadrados = np.bincount(grupos, desvio * desvio, minlength=n_grupos)
+        minimos = np.full(n_grupos, np.inf)
+        maximos = np.full(n_grupos, -np.inf)
+        np.minimum.at(minimos, grupos, valores)
+        np.maximum.at(maximos, grupos, valores)
+        histogramas = []
+        for g in range(n_grupos):
+            histograma = cls(lsl, usl, bins_dentro, bins_fuera)
+            histograma.conteos = conteos[g]
+            histograma.suma, histograma.suma_cuadrados = sumas[g], sumas_cuadrados[g]
+            histograma.minimo, histograma.maximo = minimos[g], maximos[g]
+            histogramas.append(histograma)
+        return histogramas
+
+    @property
+    def n(self):
+        """Lecturas resumidas"""
+        return int(self.conteos.sum())
+
+    def anadir(self, valores):
+        """Añade lecturas y devuelve el propio histograma"""
+        valores = np.asarray(valores, dtype=float).ravel()
+        valores = valores[~np.isnan(valores)]
+        if valores.size:
+            self.conteos += np.bincount(self._posiciones(valores), minlength=len(self.conteos))
+            desvio = valores - self.centro
+            self.suma += desvio.sum()
+            self.suma_cuadrados += desvio @ desvio
+            self.minimo = min(self.minimo, valores.min())
+            self.maximo = max(self.maximo, valores.max())
+        return self
+
+    def fusionar(self, *otros):
+        """Suma en este histograma los de ``otros`` y devuelve el propio histograma
+
+        Lanza ValueError si algún histograma tiene otros bordes.
+        """
+        for otro in otros:
+            if not np.array_equal(otro.bordes, self.bordes):
+                raise ValueError("Solo se fusionan histogramas con los mismos LSL, USL y bins")
+            self.conteos = self.conteos + otro.conteos
+            self.suma += otro.suma
+            self.suma_cuadrados += otro.suma_cuadrados
+            self.minimo = min(self.minimo, otro.minimo)
+            self.maximo = max(self.maximo, otro.maximo)
+        return self
+
+    @property
+    def conteos_bins(self):
+        """Conteos de los bins entre el primer y el último borde (para dibujar)"""
+        return self.conteos[1:-1]
+
+    def media(self):
+        """Media de las lecturas"""
+        return self.centro + self.suma / self.n
+
+    def std(self):
+        """Desviación típica muestral (ddof=1)"""
+        n = self.n
+        return np.sqrt(max(self.suma_cuadrados - self.suma ** 2 / n, 0.0) / (n - 1))
+
+    def conformidad(self):
+        """(conformes, no_conformes, porcentaje_conforme), como ``calcular_conformidad``"""
+        inicio = self.bins_fuera + 1
+        conformes = int(self.conteos[inicio:inicio + self.bins_dentro].sum())
+        n = self.n
+        return conformes, n - conformes, conformes / n * 100
+
+    def capacidad(self):
+        """Índices de ``capacidad.indices_capacidad`` con media y std, y PPM contadas fuera"""
+        n = self.n
+        media, std = self.media(), self.std()
+        resultado = indices_capacidad(media, std, self.lsl, self.usl)
+        resultado.update(n=n, media=media, std=std,
+                         ppm_bajo=self.conteos[:self.bins_fuera + 1].sum() / n * 1e6,
+                         ppm_alto=self.conteos[self.bins_fuera + 1 + self.bins_dentro:].sum() / n * 1e6)
+        resultado['ppm'] = resultado['ppm_bajo'] + resultado['ppm_alto']
+        return resultado
+
+    def a_bytes(self):
+        """Serializa el histograma (8 float64 de cabecera y los conteos en int64)"""
+        cabecera = np.array([self.lsl, self.usl, self.bins_dentro, self.bins_fuera,
+                             self.suma, self.suma_cuadrados, self.minimo, self.maximo], dtype='<f8')
+        return cabecera.tobytes() + self.conteos.astype('<i8').tobytes()
+
+    @classmethod
+    def desde_bytes(cls, datos):
+        """Reconstruye un histograma serializado con ``a_bytes``"""
+        cabecera = np.frombuffer(datos, dtype='<f8', count=8)
+        lsl, usl, bins_dentro, bins_fuera, suma, suma_cuadrados, minimo, maximo = cabecera
+        histograma = cls(lsl, usl, int(bins_dentro), int(bins_fuera))
+        histograma.conteos = np.frombuffer(datos, dtype='<i8', offset=cabecera.nbytes).astype(np.int64)
+        histograma.suma, histograma.suma_cuadrados = float(suma), float(suma_cuadrados)
+        histograma.minimo, histograma.maximo = float(minimo), float(maximo)
+        return histograma
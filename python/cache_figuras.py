@@ -0,0 +1,154 @@
+"""
+Caché de construcción direccionada por contenido para las figuras del informe.
+
+La clave de cada figura es un hash SHA-256 de:
+- el código fuente de su script y de los módulos locales que utiliza,
+- los parámetros de entrada definidos a nivel de módulo (límites de
+  especificación, escenarios, tamaños de muestra, estilo...),
+- los formatos y la resolución de salida,
+- las versiones de Python, NumPy y Matplotlib,
+- en las figuras que muestran la fecha o los lotes del día
+  (``CON_FECHA``), el día en que se generan.
+
+Si la clave coincide con la registrada en el manifiesto y los ficheros de
+salida existen, la figura no se vuelve a renderizar. Así, al editar un
+escenario de ``capacidad_proceso.py`` solo se reconstruyen sus tres figuras.
+"""
+
+import hashlib
+import inspect
+import json
+import os
+import platform
+import sys
+import time
+from datetime import date
+
+import matplotlib
+import numpy as np
+
+import exportacion
+import figuras
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+IMAGENES = os.path.join(os.path.dirname(DIRECTORIO), 'imagenes')
+MANIFIESTO = '.cache_figuras.json'
+
+# Figuras que dependen del día en que se generan: se reconstruyen cada día
+CON_FECHA = ('dashboard_digital', 'dashboard_simple')
+
+def versiones_librerias():
+    """Versiones de las librerías que influyen en el resultado"""
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'matplotlib': matplotlib.__version__,
+    }
+
+def _es_local(modulo):
+    ruta = getattr(modulo, '__file__', None)
+    return ruta is not None and os.path.dirname(os.path.abspath(ruta)) == DIRECTORIO
+
+def modulos_locales(modulo):
+    """Módulo de la figura más los módulos de este directorio de los que depende"""
+    encontrados = {}
+    pendientes = [modulo]
+    while pendientes:
+        actual = pendientes.pop()
+        if actual.__name__ in encontrados:
+            continue
+        encontrados[actual.__name__] = actual
+        for valor in vars(actual).values():
+            dependencia = valor if inspect.ismodule(valor) else inspect.getmodule(valor)
+            if dependencia is not None and _es_local(dependencia):
+                pendientes.append(dependencia)
+    return [encontrados[nombre] for nombre in sorted(encontrados)]
+
+def parametros_modulo(modulo):
+    """Constantes de nivel de módulo que se pueden serializar (límites, escenarios...)
+
+    Solo cuentan los valores que JSON codifica tal cual: el ``repr`` de otros
+    objetos (p. ej. ``REGISTRO``) puede llevar su dirección en memoria y
+    cambiaría la clave en cada ejecución.
+    """
+    parametros = {}
+    for nombre, valor in vars(modulo).items():
+        if nombre.startswith('_') or callable(valor) or inspect.ismodule(valor):
+            continue
+        try:
+            parametros[nombre] = json.loads(json.dumps(valor))
+        except (TypeError, ValueError):
+            continue
+    return parametros
+
+def clave_figura(nombre, hoy=None):
+    """Hash del contenido que determina el resultado de una figura
+
+    ``hoy`` (por defecto, la fecha actual) solo cuenta en las figuras de
+    ``CON_FECHA``.
+    """
+    modulo = sys.modules[figuras.FIGURAS[nombre].__module__]
+    h = hashlib.sha256()
+    h.update(nombre.encode())
+    # figuras.py y exportacion.py deciden cómo se guardan los ficheros, así que también cuentan
+    dependencias = modulos_locales(modulo)
+    dependencias += [m for m in (figuras, exportacion) if m not in dependencias]
+    for dependencia in dependencias:
+        with open(dependencia.__file__, 'rb') as f:
+            h.update(dependencia.__name__.encode())
+            h.update(f.read())
+    datos = {
+        'parametros': parametros_modulo(modulo),
+        'estilo': figuras.estilo_figura(nombre),
+        'formatos': list(exportacion.FORMATOS),
+        'dpi': exportacion.DPI,
+        'versiones': versiones_librerias(),
+    }
+    if nombre in CON_FECHA:
+        datos['fecha'] = (hoy or date.today()).isoformat()
+    h.update(json.dumps(datos, sort_keys=True, default=repr).encode())
+    return h.hexdigest()
+
+def leer_manifiesto(directorio):
+    ruta = os.path.join(directorio, MANIFIESTO)
+    try:
+        with open(ruta, encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def escribir_manifiesto(directorio, manifiesto):
+    ruta = os.path.join(directorio, MANIFIESTO)
+    temporal = ruta + '.tmp'
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(manifiesto, f, indent=2, sort_keys=True)
+    os.replace(temporal, ruta)
+
+def construir(directorio=IMAGENES, nombres=None, forzar=False, hoy=None):
+    """Renderiza solo las figuras cuya clave ha cambiado
+
+    Devuelve una lista de diccionarios con el nombre, si fue acierto de
+    caché, el tiempo empleado y el error (si lo hubo).
+    """
+    os.makedirs(directorio, exist_ok=True)
+    manifiesto = leer_manifiesto(directorio)
+    resultados = []
+    for nombre in nombres or figuras.FIGURAS:
+        inicio = time.perf_counter()
+        clave = clave_figura(nombre, hoy)
+        salidas = [os.path.join(directorio, f'{nombre}.{formato}') for formato in exportacion.FORMATOS]
+        acierto = (not forzar and manifiesto.get(nombre) == clave
+                   and all(os.path.exists(ruta) for ruta in salidas))
+        error = None
+        if not acierto:
+            try:
+                figuras.renderizar(nombre, directorio)
+                manifiesto[nombre] = clave
+            except Exception as e:
+                error = repr(e)
+                manifiesto.pop(nombre, None)
+            # Guardar tras cada figura para no perder el trabajo si algo falla
+            escribir_manifiesto(directorio, manifiesto)
+        resultados.append({'nombre': nombre, 'acierto': acierto, 'error': error,
+                           'segundos': time.perf_counter() - inicio})
+    return resultados
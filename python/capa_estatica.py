@@ -0,0 +1,148 @@
+"""
+Capa estática rasterizada una vez y capas dinámicas dibujadas encima.
+
+En un dashboard casi todo es fijo entre refrescos: marcos y títulos de
+los paneles, cuadros de los KPI, líneas de referencia, ejes... Los
+artistas que cambian con los datos se marcan como animados, de modo que un
+dibujo completo de la figura produce solo el fondo estático. Ese fondo se
+guarda (la figura entera y la región de cada grupo de artistas dinámicos)
+en una caché con clave tamaño de la figura en píxeles y resolución, y cada
+refresco restaura y redibuja solo las regiones de los grupos que han
+cambiado. El coste de refrescar depende de lo que cambia, no del número
+total de artistas.
+
+El fondo solo se vuelve a rasterizar cuando cambia la disposición (límites
+de ejes, un artista que crece fuera de su región) o cuando se pide una
+clave que no está en la caché.
+"""
+
+import numpy as np
+from matplotlib.transforms import Bbox
+
+
+class CapaEstatica:
+    """Fondo estático en caché por (ancho, alto, dpi) y grupos de artistas dinámicos
+
+    ``grupos`` es una función sin argumentos que devuelve ``{nombre: [artistas]}``;
+    cada grupo ocupa una región de la figura (normalmente un panel).
+    """
+
+    # Píxeles de holgura alrededor de cada región guardada
+    MARGEN = 12
+
+    def __init__(self, fig, grupos):
+        self.fig = fig
+        self.canvas = fig.canvas
+        self.grupos = grupos
+        self.fondos = {}
+        self.redibujados = 0
+        for artistas in self.grupos().values():
+            for artista in artistas:
+                artista.set_animated(True)
+        self.canvas.mpl_connect('draw_event', self._al_dibujar)
+
+    def clave(self):
+        """Clave de la caché: tamaño de la figura en píxeles y resolución"""
+        ancho, alto = self.fig.bbox.size
+        return round(ancho), round(alto), self.fig.dpi
+
+    @property
+    def regiones(self):
+        """Regiones guardadas para la clave actual (None si no hay fondo)"""
+        fondo = self.fondos.get(self.clave())
+        return None if fondo is None else fondo['regiones']
+
+    def _extension(self, artistas):
+        """Caja en píxeles que ocupan unos artistas (y sus ejes, si los tienen)"""
+        renderer = self.canvas.get_renderer()
+        # Los artistas recortados a sus ejes nunca salen de ellos
+        cajas = [artista.get_window_extent(renderer) for artista in artistas
+                 if not (artista.get_clip_on() and artista.axes is not None)]
+        cajas += [ax.bbox for ax in {artista.axes for artista in artistas} if ax is not None]
+        return Bbox.union(cajas)
+
+    def _al_dibujar(self, evento):
+        # Tras un dibujo completo (solo lo estático): guardar el fondo y pintar encima lo dinámico
+        if self.canvas.is_saving():
+            # savefig dibuja también los artistas animados: no es un fondo estático
+            return
+        regiones = {}
+        for nombre, artistas in self.grupos().items():
+            caja = Bbox.intersection(self._extension(artistas).padded(self.MARGEN), self.fig.bbox)
+            regiones[nombre] = (caja, self.canvas.copy_from_bbox(caja))
+        self.fondos[self.clave()] = {'figura': self.canvas.copy_from_bbox(self.fig.bbox),
+                                     'regiones': regiones}
+        self._dibujar_dinamicos(self.grupos())
+
+    def _dibujar_dinamicos(self, grupos, nombres=None):
+        for nombre in nombres or grupos:
+            for artista in grupos[nombre]:
+                self.fig.draw_artist(artista)
+
+    def _cierre_solapes(self, nombres):
+        """Añade los grupos cuyas regiones se solapan con las de ``nombres``"""
+        regiones = self.regiones
+        resultado = set(nombres)
+        pendientes = list(nombres)
+        while pendientes:
+            caja = regiones[pendientes.pop()][0]
+            for otro, (caja_otro, _) in regiones.items():
+                if otro not in resultado and caja.overlaps(caja_otro):
+                    resultado.add(otro)
+                    pendientes.append(otro)
+        return resultado
+
+    def cabe(self, nombre):
+        """Comprueba si los artistas de un grupo siguen dentro de su región guardada"""
+        caja = self.regiones[nombre][0]
+        nueva = self._extension(self.grupos()[nombre])
+        return (nueva.x0 >= caja.x0 and nueva.y0 >= caja.y0
+                and nueva.x1 <= caja.x1 and nueva.y1 <= caja.y1)
+
+    def invalidar(self):
+        """Descarta los fondos guardados (ha cambiado la disposición de la figura)"""
+        self.fondos.clear()
+
+    def dibujar(self):
+        """Dibujo completo: rasteriza el fondo estático y lo guarda en la caché"""
+        self.redibujados += 1
+        self.canvas.draw()
+
+    def refrescar(self, cambiados, completo=False):
+        """Redibuja los grupos ``cambiados`` sobre el fondo guardado y los copia a pantalla
+
+        Con ``completo`` (la disposición ha cambiado), sin fondo para la
+        clave actual o si un grupo se sale de su región, se hace un dibujo
+        completo.
+        """
+        if completo:
+            self.invalidar()
+        if (self.regiones is None
+                or not all(self.cabe(nombre) for nombre in cambiados)):
+            self.dibujar()
+        else:
+            grupos = self.grupos()
+            nombres = self._cierre_solapes(cambiados)
+            for nombre in nombres:
+                self.canvas.restore_region(self.regiones[nombre][1])
+            self._dibujar_dinamicos(grupos, nombres)
+            for nombre in nombres:
+                self.canvas.blit(self.regiones[nombre][0])
+        self.canvas.flush_events()
+
+    def imagen(self, dpi=None):
+        """RGBA (alto, ancho, 4) de la figura completa a ``dpi``, sin ventana
+
+        Restaura el fondo de la caché para ese tamaño y resolución (o lo
+        rasteriza la primera vez) y dibuja encima todos los artistas
+        dinámicos. Necesita un lienzo Agg.
+        """
+        if dpi is not None and dpi != self.fig.dpi:
+            self.fig.dpi = dpi
+        fondo = self.fondos.get(self.clave())
+        if fondo is None:
+            self.dibujar()
+        else:
+            self.canvas.get_renderer().restore_region(fondo['figura'])
+            self._dibujar_dinamicos(self.grupos())
+        return np.array(self.canvas.buffer_rgba())
@@ -1,14 +1,17 @@
+import argparse
+
 import numpy as np
 import matplotlib.pyplot as plt
-from scipy import stats
-
-# Configurar semilla para reproducibilidad
-np.random.seed(42)
+import normal
+from bocetos import BocetoCuantiles
+from capacidad import CPK_OBJETIVO, capacidad_por_grupo, indices_capacidad, simular_cpk
+from histograma_spec import histograma_especificacion
+from especificaciones import REGISTRO
+from exportacion import exportar_figura
+from trazas import trazado
 
-# Definir límites de especificación
-LSL = 0.98  # Límite de especificación inferior
-USL = 1.02  # Límite de especificación superior
-TARGET = (LSL + USL) / 2  # Valor objetivo (1.00)
+# Límites de especificación y valor objetivo de la densidad (especificaciones.py)
+LSL, USL, TARGET = REGISTRO.limites('producto', 'densidad')
 
 # Crear cuatro escenarios de capacidad de proceso
 scenarios = {
@@ -38,159 +41,296 @@ scenarios = {
     }
 }
 
-# Crear figura con subplots
-fig, axes = plt.subplots(2, 2, figsize=(15, 12))
-axes = axes.ravel()
-
-for i, (scenario_name, params) in enumerate(scenarios.items()):
-    ax = axes[i]
-    
-    # Generar datos
-    data = np.random.normal(params['mean'], params['std'], 1000)
-    
-    # Calcular índices de capacidad
-    mean = np.mean(data)
-    std = np.std(data, ddof=1)
-    
-    Cp = (USL - LSL) / (6 * std)
-    Cpu = (USL - mean) / (3 * std)
-    Cpl = (mean - LSL) / (3 * std)
-    Cpk = min(Cpu, Cpl)
-    
-    # Calcular porcentaje fuera de especificación
-    outside_spec = np.sum((data < LSL) | (data > USL)) / len(data) * 100
-    
-    # Crear histograma
-    counts, bins, patches = ax.hist(data, bins=30, density=True, alpha=0.7, 
-                                  color=params['color'], edgecolor='black', linewidth=0.5)
-    
-    # Colorear barras según especificación
-    for j, (count, bin_left, patch) in enumerate(zip(counts, bins[:-1], patches)):
-        bin_right = bins[j+1]
-        if bin_right <= LSL or bin_left >= USL:
-            patch.set_facecolor('red')
-            patch.set_alpha(0.8)
-    
-    # Añadir curva normal teórica
-    x_curve = np.linspace(data.min(), data.max(), 100)
-    y_curve = stats.norm.pdf(x_curve, mean, std)
-    ax.plot(x_curve, y_curve, 'k-', linewidth=2, alpha=0.8, label='Distribución teórica')
-    
-    # Líneas de especificación
-    ax.axvline(LSL, color='red', linestyle='--', linewidth=2, label=f'LSL = {LSL}')
-    ax.axvline(USL, color='red', linestyle='--', linewidth=2, label=f'USL = {USL}')
-    ax.axvline(TARGET, color='green', linestyle=':', linewidth=2, alpha=0.7, label=f'Objetivo = {TARGET}')
-    ax.axvline(mean, color='blue', linestyle='-', linewidth=2, alpha=0.7, label=f'Media = {mean:.3f}')
-    
-    # Configurar el gráfico
-    ax.set_title(params['title'], fontsize=14, fontweight='bold')
-    ax.set_xlabel('Densidad (g/cc)', fontsize=12)
-    ax.set_ylabel('Densidad de probabilidad', fontsize=12)
+# Monte Carlo: tamaños de muestra habituales en un estudio de capacidad
+TAMANOS_MUESTRA = (30, 125)
+REPLICAS = 100_000
+
+# Parámetro asimétrico para la capacidad por percentiles: viscosidad (cP)
+# lognormal, por turno y línea
+VISCOSIDAD = dict(zip(('lsl', 'usl', 'mediana'), REGISTRO.limites('producto', 'viscosidad')),
+                  sigma_log=0.1)
+TURNOS, LINEAS = 3, 4
+
+@trazado('datos')
+def generar_datos():
+    """Genera 1000 mediciones de cada escenario"""
+    # Configurar semilla para reproducibilidad
+    np.random.seed(42)
+    return [np.random.normal(params['mean'], params['std'], 1000)
+            for params in scenarios.values()]
+
+def crear_grafico_capacidad():
+    """Crea los histogramas de capacidad de los cuatro escenarios"""
+    datos_escenarios = generar_datos()
+
+    # Calcular índices de capacidad de todos los escenarios en una sola pasada
+    grupos = np.repeat(np.arange(len(datos_escenarios)), [len(d) for d in datos_escenarios])
+    indices = capacidad_por_grupo(np.concatenate(datos_escenarios), grupos, LSL, USL,
+                                  n_grupos=len(datos_escenarios))
+
+    # Crear figura con subplots
+    fig, axes = plt.subplots(2, 2, figsize=(15, 12))
+    axes = axes.ravel()
+
+    for i, (scenario_name, params) in enumerate(scenarios.items()):
+        ax = axes[i]
+        data = datos_escenarios[i]
+
+        # Índices de capacidad y porcentaje fuera de especificación
+        mean = indices['media'][i]
+        std = indices['std'][i]
+        Cp = indices['cp'][i]
+        Cpk = indices['cpk'][i]
+        outside_spec = indices['pct_fuera'][i]
+
+        # Crear histograma con las barras fuera de especificación en rojo
+        histograma_especificacion(ax, data, bins=30, lsl=LSL, usl=USL, density=True,
+                                  color=params['color'], alpha=0.7, alpha_fuera=0.8,
+                                  edgecolor='black', linewidth=0.5)
+
+        # Añadir curva normal teórica
+        x_curve = np.linspace(data.min(), data.max(), 100)
+        y_curve = normal.pdf(x_curve, mean, std)
+        ax.plot(x_curve, y_curve, 'k-', linewidth=2, alpha=0.8, label='Distribución teórica')
+
+        # Líneas de especificación
+        ax.axvline(LSL, color='red', linestyle='--', linewidth=2, label=f'LSL = {LSL}')
+        ax.axvline(USL, color='red', linestyle='--', linewidth=2, label=f'USL = {USL}')
+        ax.axvline(TARGET, color='green', linestyle=':', linewidth=2, alpha=0.7, label=f'Objetivo = {TARGET}')
+        ax.axvline(mean, color='blue', linestyle='-', linewidth=2, alpha=0.7, label=f'Media = {mean:.3f}')
+
+        # Configurar el gráfico
+        ax.set_title(params['title'], fontsize=14, fontweight='bold')
+        ax.set_xlabel('Densidad (g/cc)', fontsize=12)
+        ax.set_ylabel('Densidad de probabilidad', fontsize=12)
+        ax.grid(True, alpha=0.3)
+
+        # Añadir texto con índices
+        textstr = f'Cp = {Cp:.2f}\nCpk = {Cpk:.2f}\nFuera de spec: {outside_spec:.1f}%'
+        props = dict(boxstyle='round', facecolor='white', alpha=0.8)
+        ax.text(0.02, 0.98, textstr, transform=ax.transAxes, fontsize=11,
+               verticalalignment='top', bbox=props)
+
+        # Leyenda solo en el primer subplot
+        if i == 0:
+            ax.legend(loc='upper right', fontsize=9)
+
+        # Ajustar límites del eje x para mostrar todo el rango relevante
+        ax.set_xlim(0.95, 1.05)
+
+    fig.suptitle('Análisis de Capacidad de Proceso - Diferentes Escenarios',
+                 fontsize=16, fontweight='bold', y=0.98)
+    fig.tight_layout()
+    return fig
+
+def crear_grafico_interpretacion():
+    """Crea el gráfico de la relación entre Cpk y defectos por millón"""
+    fig2, ax = plt.subplots(figsize=(12, 8))
+
+    # Datos para la interpretación de Cpk
+    cpk_values = [0.5, 0.67, 1.0, 1.33, 1.67, 2.0]
+    # PPM (partes por millón) de un proceso normal centrado: colas a 3·Cpk
+    # sigmas (0.67, 1.33 y 1.67 son 2/3, 4/3 y 5/3: 2, 4 y 5 sigmas)
+    defect_rates = [normal.fuera_especificacion(0, 1, -3 * cpk, 3 * cpk)['total'] * 1e6
+                    for cpk in (0.5, 2 / 3, 1.0, 4 / 3, 5 / 3, 2.0)]
+    capability_levels = ['Inadecuado', 'Pobre', 'Aceptable', 'Capaz', 'Muy Capaz', 'Excelente']
+    colors = ['#d62728', '#ff4500', '#ffa500', '#32cd32', '#228b22', '#006400']
+
+    # Crear gráfico de barras
+    bars = ax.bar(range(len(cpk_values)), defect_rates, color=colors, alpha=0.7, edgecolor='black')
+
+    # Configurar escala logarítmica para el eje y
+    ax.set_yscale('log')
+
+    # Etiquetas
+    ax.set_xlabel('Índice Cpk', fontsize=14)
+    ax.set_ylabel('Defectos por Millón (PPM)', fontsize=14)
+    ax.set_title('Relación entre Índice Cpk y Tasa de Defectos', fontsize=16, fontweight='bold')
+
+    # Configurar ticks del eje x
+    ax.set_xticks(range(len(cpk_values)))
+    ax.set_xticklabels([f'{cpk:.2f}' for cpk in cpk_values])
+
+    # Añadir etiquetas en las barras
+    for i, (bar, rate, level) in enumerate(zip(bars, defect_rates, capability_levels)):
+        height = bar.get_height()
+        ax.text(bar.get_x() + bar.get_width()/2., height * 1.5,
+               f'{rate:,.0f} PPM\n({level})' if rate >= 10 else f'{rate:.2g} PPM\n({level})',
+               ha='center', va='bottom', fontsize=10, fontweight='bold')
+
+    # Añadir líneas de referencia
+    ax.axhline(y=1000, color='orange', linestyle='--', alpha=0.7, label='1000 PPM (Objetivo común)')
+    ax.axhline(y=100, color='green', linestyle='--', alpha=0.7, label='100 PPM (Objetivo excelencia)')
+
     ax.grid(True, alpha=0.3)
-    
-    # Añadir texto con índices
-    textstr = f'Cp = {Cp:.2f}\nCpk = {Cpk:.2f}\nFuera de spec: {outside_spec:.1f}%'
-    props = dict(boxstyle='round', facecolor='white', alpha=0.8)
-    ax.text(0.02, 0.98, textstr, transform=ax.transAxes, fontsize=11,
-           verticalalignment='top', bbox=props)
-    
-    # Leyenda solo en el primer subplot
-    if i == 0:
-        ax.legend(loc='upper right', fontsize=9)
-    
-    # Ajustar límites del eje x para mostrar todo el rango relevante
-    ax.set_xlim(0.95, 1.05)
-
-plt.suptitle('Análisis de Capacidad de Proceso - Diferentes Escenarios', 
-             fontsize=16, fontweight='bold', y=0.98)
-plt.tight_layout()
-plt.savefig('capacidad_proceso.png', dpi=300, bbox_inches='tight')
-plt.savefig('capacidad_proceso.pdf', bbox_inches='tight')
-print("Gráfico de capacidad de proceso guardado como 'capacidad_proceso.png' y '.pdf'")
-plt.show()
-
-# Crear un gráfico adicional mostrando la interpretación de los índices
-fig2, ax = plt.subplots(figsize=(12, 8))
-
-# Datos para la interpretación de Cpk
-cpk_values = [0.5, 0.67, 1.0, 1.33, 1.67, 2.0]
-defect_rates = [133614, 44565, 2700, 63, 0.57, 0.002]  # PPM (partes por millón)
-capability_levels = ['Inadecuado', 'Pobre', 'Aceptable', 'Capaz', 'Muy Capaz', 'Excelente']
-colors = ['#d62728', '#ff4500', '#ffa500', '#32cd32', '#228b22', '#006400']
-
-# Crear gráfico de barras
-bars = ax.bar(range(len(cpk_values)), defect_rates, color=colors, alpha=0.7, edgecolor='black')
-
-# Configurar escala logarítmica para el eje y
-ax.set_yscale('log')
-
-# Etiquetas
-ax.set_xlabel('Índice Cpk', fontsize=14)
-ax.set_ylabel('Defectos por Millón (PPM)', fontsize=14)
-ax.set_title('Relación entre Índice Cpk y Tasa de Defectos', fontsize=16, fontweight='bold')
-
-# Configurar ticks del eje x
-ax.set_xticks(range(len(cpk_values)))
-ax.set_xticklabels([f'{cpk:.2f}' for cpk in cpk_values])
-
-# Añadir etiquetas en las barras
-for i, (bar, rate, level) in enumerate(zip(bars, defect_rates, capability_levels)):
-    height = bar.get_height()
-    ax.text(bar.get_x() + bar.get_width()/2., height * 1.5,
-           f'{rate:g} PPM\n({level})', 
-           ha='center', va='bottom', fontsize=10, fontweight='bold')
-
-# Añadir líneas de referencia
-ax.axhline(y=1000, color='orange', linestyle='--', alpha=0.7, label='1000 PPM (Objetivo común)')
-ax.axhline(y=100, color='green', linestyle='--', alpha=0.7, label='100 PPM (Objetivo excelencia)')
-
-ax.grid(True, alpha=0.3)
-ax.legend()
-
-plt.tight_layout()
-plt.savefig('interpretacion_cpk.png', dpi=300, bbox_inches='tight')
-plt.savefig('interpretacion_cpk.pdf', bbox_inches='tight')
-print("Gráfico de interpretación Cpk guardado como 'interpretacion_cpk.png' y '.pdf'")
-plt.show()
-
-# Crear tabla resumen de criterios de capacidad
-fig3, ax = plt.subplots(figsize=(12, 6))
-
-# Datos para la tabla
-tabla_datos = [
-    ['Índice Cpk', 'Nivel de Capacidad', 'Defectos (PPM)', 'Interpretación', 'Recomendación'],
-    ['< 0.67', 'Inadecuado', '> 44,565', 'Proceso incapaz', 'Rediseño necesario'],
-    ['0.67 - 1.00', 'Pobre', '2,700 - 44,565', 'Proceso marginal', 'Mejora urgente'],
-    ['1.00 - 1.33', 'Aceptable', '63 - 2,700', 'Proceso aceptable', 'Mejora continua'],
-    ['1.33 - 1.67', 'Capaz', '0.57 - 63', 'Proceso capaz', 'Mantener control'],
-    ['> 1.67', 'Excelente', '< 0.57', 'Proceso Six Sigma', 'Replicar en otros procesos']
-]
-
-# Crear tabla
-tabla = ax.table(cellText=tabla_datos[1:], colLabels=tabla_datos[0], 
-                cellLoc='center', loc='center',
-                colWidths=[0.15, 0.2, 0.2, 0.2, 0.25])
-tabla.auto_set_font_size(False)
-tabla.set_fontsize(11)
-tabla.scale(1, 2)
-
-# Formatear encabezados
-for i in range(len(tabla_datos[0])):
-    tabla[(0, i)].set_facecolor('#2E86AB')
-    tabla[(0, i)].set_text_props(weight='bold', color='white')
-
-# Colorear filas según el nivel de capacidad
-row_colors = ['#ffcccb', '#ffd700', '#98fb98', '#90ee90', '#32cd32']
-for i in range(1, len(tabla_datos)):
-    for j in range(len(tabla_datos[0])):
-        tabla[(i, j)].set_facecolor(row_colors[i-1])
-
-ax.axis('off')
-ax.set_title('Criterios de Interpretación de la Capacidad de Proceso (Cpk)', 
-             fontsize=14, fontweight='bold', pad=20)
-
-plt.tight_layout()
-plt.savefig('tabla_capacidad.png', dpi=300, bbox_inches='tight')
-plt.savefig('tabla_capacidad.pdf', bbox_inches='tight')
-print("Tabla de capacidad guardada como 'tabla_capacidad.png' y '.pdf'")
-plt.show() 
\ No newline at end of file
+    ax.legend()
+
+    fig2.tight_layout()
+    return fig2
+
+def crear_tabla_capacidad():
+    """Crea la tabla resumen de criterios de capacidad"""
+    fig3, ax = plt.subplots(figsize=(12, 6))
+
+    # Datos para la tabla
+    tabla_datos = [
+        ['Índice Cpk', 'Nivel de Capacidad', 'Defectos (PPM)', 'Interpretación', 'Recomendación'],
+        ['< 0.67', 'Inadecuado', '> 45,500', 'Proceso incapaz', 'Rediseño necesario'],
+        ['0.67 - 1.00', 'Pobre', '2,700 - 45,500', 'Proceso marginal', 'Mejora urgente'],
+        ['1.00 - 1.33', 'Aceptable', '63 - 2,700', 'Proceso aceptable', 'Mejora continua'],
+        ['1.33 - 1.67', 'Capaz', '0.57 - 63', 'Proceso capaz', 'Mantener control'],
+        ['> 1.67', 'Excelente', '< 0.57', 'Proceso Six Sigma', 'Replicar en otros procesos']
+    ]
+
+    # Crear tabla
+    tabla = ax.table(cellText=tabla_datos[1:], colLabels=tabla_datos[0],
+                    cellLoc='center', loc='center',
+                    colWidths=[0.15, 0.2, 0.2, 0.2, 0.25])
+    tabla.auto_set_font_size(False)
+    tabla.set_fontsize(11)
+    tabla.scale(1, 2)
+
+    # Formatear encabezados
+    for i in range(len(tabla_datos[0])):
+        tabla[(0, i)].set_facecolor('#2E86AB')
+        tabla[(0, i)].set_text_props(weight='bold', color='white')
+
+    # Colorear filas según el nivel de capacidad
+    row_colors = ['#ffcccb', '#ffd700', '#98fb98', '#90ee90', '#32cd32']
+    for i in range(1, len(tabla_datos)):
+        for j in range(len(tabla_datos[0])):
+            tabla[(i, j)].set_facecolor(row_colors[i-1])
+
+    ax.axis('off')
+    ax.set_title('Criterios de Interpretación de la Capacidad de Proceso (Cpk)',
+                 fontsize=14, fontweight='bold', pad=20)
+
+    fig3.tight_layout()
+    return fig3
+
+def simular_escenarios(tamanos=TAMANOS_MUESTRA, replicas=REPLICAS, semilla=42):
+    """Intervalos del 95 % de Cp/Cpk de cada escenario con muestras de cada tamaño
+
+    Devuelve una fila por escenario y tamaño con el resultado de ``simular_cpk``
+    (sin los arrays de réplicas).
+    """
+    filas = []
+    for nombre, params in scenarios.items():
+        for n in tamanos:
+            resultado = simular_cpk(params['mean'], params['std'], LSL, USL, n,
+                                    replicas=replicas, semilla=semilla)
+            del resultado['cp'], resultado['cpk']
+            filas.append({'escenario': nombre, 'n': n, **resultado})
+    return filas
+
+def mostrar_simulacion(filas):
+    """Imprime la tabla de intervalos Monte Carlo"""
+    ancho = max(len(f['escenario']) for f in filas)
+    print(f"{'Escenario':<{ancho}}  {'n':>5}  {'Cpk real':>8}  {'IC 95 % Cpk':>15}  "
+          f"{'IC 95 % Cp':>15}  {f'P(Cpk≥{CPK_OBJETIVO})':>12}")
+    for f in filas:
+        print(f"{f['escenario']:<{ancho}}  {f['n']:>5}  {f['cpk_real']:>8.2f}  "
+              f"{f['inferior_cpk']:>7.2f} - {f['superior_cpk']:<5.2f}  "
+              f"{f['inferior_cp']:>7.2f} - {f['superior_cp']:<5.2f}  {f['prob_objetivo']:>12.1%}")
+
+def _fusionar_momentos(cuenta, media, m2):
+    """Fusiona (cuenta, media, M2) a lo largo del primer eje (fórmula de Chan)
+
+    Sin restar medias al cuadrado de sumas de cuadrados brutas: con valores
+    grandes y poca dispersión esa resta pierde casi todas las cifras.
+    """
+    n = cuenta.sum(axis=0)
+    media_total = (cuenta * media).sum(axis=0) / np.maximum(n, 1)
+    m2_total = (m2 + cuenta * (media - media_total) ** 2).sum(axis=0)
+    return n, media_total, m2_total
+
+def capacidad_no_normal(n=1_000_000, bloque=100_000, semilla=42):
+    """Capacidad de la viscosidad por línea y de la planta, normal frente a percentiles
+
+    Las lecturas llegan por bloques y solo se guardan, por turno y línea, un
+    boceto de cuantiles (bocetos.py) y cuenta, media y M2 (suma de cuadrados
+    centrada, fusionada con la fórmula de Chan como en ``LimitesControl``); los
+    bocetos de cada línea (sus tres turnos) y de la planta se obtienen
+    fusionando. Devuelve una fila por línea y otra de la planta con el Cpk y
+    las PPM que da la normal, los de percentiles y las PPM reales contadas.
+    """
+    rng = np.random.default_rng(semilla)
+    lsl, usl = VISCOSIDAD['lsl'], VISCOSIDAD['usl']
+    n_grupos = TURNOS * LINEAS
+    bocetos = [BocetoCuantiles() for _ in range(n_grupos)]
+    cuenta, media, m2, fuera = (np.zeros(n_grupos) for _ in range(4))
+    for inicio in range(0, n, bloque):
+        m = min(bloque, n - inicio)
+        grupos = rng.integers(0, n_grupos, m)
+        valores = rng.lognormal(np.log(VISCOSIDAD['mediana']), VISCOSIDAD['sigma_log'], m)
+        for boceto, nuevo in zip(bocetos, BocetoCuantiles.por_grupo(valores, grupos, n_grupos)):
+            boceto.fusionar(nuevo)
+        cuenta_bloque = np.bincount(grupos, minlength=n_grupos)
+        media_bloque = np.bincount(grupos, valores, minlength=n_grupos) / np.maximum(cuenta_bloque, 1)
+        m2_bloque = np.bincount(grupos, (valores - media_bloque[grupos]) ** 2, minlength=n_grupos)
+        cuenta, media, m2 = _fusionar_momentos(np.stack([cuenta, cuenta_bloque]),
+                                               np.stack([media, media_bloque]),
+                                               np.stack([m2, m2_bloque]))
+        fuera += np.bincount(grupos, (valores < lsl) | (valores > usl), minlength=n_grupos)
+
+    # Grupo = turno * LINEAS + línea
+    conjuntos = {f'Línea {l + 1}': [t * LINEAS + l for t in range(TURNOS)] for l in range(LINEAS)}
+    conjuntos['Planta'] = list(range(n_grupos))
+    filas = []
+    for nombre, grupos in conjuntos.items():
+        n_conjunto, media_conjunto, m2_conjunto = _fusionar_momentos(cuenta[grupos], media[grupos],
+                                                                     m2[grupos])
+        std = np.sqrt(m2_conjunto / (n_conjunto - 1))
+        boceto = BocetoCuantiles().fusionar(*(bocetos[g] for g in grupos))
+        percentiles = boceto.capacidad(lsl, usl)
+        filas.append({'conjunto': nombre, 'n': int(n_conjunto),
+                      'cpk_normal': indices_capacidad(media_conjunto, std, lsl, usl)['cpk'],
+                      'ppm_normal': normal.fuera_especificacion(media_conjunto, std, lsl,
+                                                                usl)['total'] * 1e6,
+                      'cpk_percentiles': percentiles['cpk'], 'ppm_percentiles': percentiles['ppm'],
+                      'ppm_real': fuera[grupos].sum() / n_conjunto * 1e6})
+    return filas
+
+def mostrar_no_normal(filas):
+    """Imprime la comparación normal / percentiles"""
+    print(f"Viscosidad (cP), LSL = {VISCOSIDAD['lsl']:g}, USL = {VISCOSIDAD['usl']:g}")
+    print(f"{'Conjunto':<9}  {'n':>9}  {'Cpk normal':>10}  {'Cpk perc.':>10}  "
+          f"{'PPM normal':>10}  {'PPM perc.':>10}  {'PPM real':>10}")
+    for f in filas:
+        print(f"{f['conjunto']:<9}  {f['n']:>9}  {f['cpk_normal']:>10.2f}  {f['cpk_percentiles']:>10.2f}  "
+              f"{f['ppm_normal']:>10.0f}  {f['ppm_percentiles']:>10.0f}  {f['ppm_real']:>10.0f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Figuras de capacidad de proceso")
+    parser.add_argument('--monte-carlo', action='store_true',
+                        help="simular la dispersión de Cp/Cpk con muestras pequeñas en lugar de crear las figuras")
+    parser.add_argument('-n', '--tamanos', type=int, nargs='+', default=TAMANOS_MUESTRA,
+                        help="tamaños de muestra a simular")
+    parser.add_argument('--replicas', type=int, default=REPLICAS,
+                        help=f"réplicas por escenario y tamaño (por defecto {REPLICAS})")
+    parser.add_argument('--percentiles', action='store_true',
+                        help="comparar la capacidad normal y por percentiles de un parámetro asimétrico")
+    args = parser.parse_args()
+    if args.percentiles:
+        mostrar_no_normal(capacidad_no_normal())
+        raise SystemExit
+    if args.monte_carlo:
+        mostrar_simulacion(simular_escenarios(args.tamanos, args.replicas))
+        raise SystemExit
+
+    fig = crear_grafico_capacidad()
+    exportar_figura(fig, 'capacidad_proceso')
+    print("Gráfico de capacidad de proceso guardado como 'capacidad_proceso.png' y '.pdf'")
+    plt.show()
+
+    # Crear un gráfico adicional mostrando la interpretación de los índices
+    fig2 = crear_grafico_interpretacion()
+    exportar_figura(fig2, 'interpretacion_cpk')
+    print("Gráfico de interpretación Cpk guardado como 'interpretacion_cpk.png' y '.pdf'")
+    plt.show()
+
+    # Crear tabla resumen de criterios de capacidad
+    fig3 = crear_tabla_capacidad()
+    exportar_figura(fig3, 'tabla_capacidad')
+    print("Tabla de capacidad guardada como 'tabla_capacidad.png' y '.pdf'")
+    plt.show()
@@ -1,146 +1,210 @@
 import numpy as np
 import matplotlib.pyplot as plt
-from scipy import stats
+import normal
+from histograma_spec import histograma_especificacion
+from especificaciones import REGISTRO
+from exportacion import exportar_figura
+from trazas import trazado
 
-# Configurar semilla para reproducibilidad
-np.random.seed(42)
+# Límites de especificación y valor objetivo del pH (especificaciones.py)
+LSL_pH, USL_pH, TARGET_pH = REGISTRO.limites('solucion', 'pH')
 
-# Definir límites de especificación para pH
-LSL_pH = 6.8  # Límite inferior de especificación
-USL_pH = 7.2  # Límite superior de especificación
-TARGET_pH = 7.0  # Valor objetivo
+@trazado('datos')
+def generar_datos():
+    """Genera los datos de pH de 3 escenarios diferentes"""
+    # Configurar semilla para reproducibilidad
+    np.random.seed(42)
 
-# Generar datos de 3 escenarios diferentes
-# Escenario 1: Proceso centrado y con buena capacidad (100% conforme)
-data_conforme = np.random.normal(7.0, 0.05, 200)
+    # Escenario 1: Proceso centrado y con buena capacidad (100% conforme)
+    data_conforme = np.random.normal(7.0, 0.05, 200)
 
-# Escenario 2: Proceso descentrado (algunos no conformes)
-data_descentrado = np.random.normal(7.15, 0.08, 200)
+    # Escenario 2: Proceso descentrado (algunos no conformes)
+    data_descentrado = np.random.normal(7.15, 0.08, 200)
 
-# Escenario 3: Proceso con alta variabilidad (muchos no conformes)
-data_variable = np.random.normal(7.0, 0.12, 200)
+    # Escenario 3: Proceso con alta variabilidad (muchos no conformes)
+    data_variable = np.random.normal(7.0, 0.12, 200)
+
+    return [
+        ('Proceso Conforme (Centrado y Capaz)', data_conforme, '#2ca02c'),
+        ('Proceso Descentrado', data_descentrado, '#ff7f0e'),
+        ('Proceso con Alta Variabilidad', data_variable, '#d62728')
+    ]
 
 # Función para calcular conformidad
+@trazado('estadistica')
 def calcular_conformidad(data, lsl, usl):
     conformes = np.sum((data >= lsl) & (data <= usl))
     no_conformes = len(data) - conformes
     porcentaje_conforme = (conformes / len(data)) * 100
     return conformes, no_conformes, porcentaje_conforme
 
-# Crear figura con subplots
-fig, axes = plt.subplots(3, 1, figsize=(12, 15))
-
-scenarios = [
-    ('Proceso Conforme (Centrado y Capaz)', data_conforme, '#2ca02c'),
-    ('Proceso Descentrado', data_descentrado, '#ff7f0e'),
-    ('Proceso con Alta Variabilidad', data_variable, '#d62728')
-]
-
-for i, (title, data, color) in enumerate(scenarios):
-    ax = axes[i]
-    
-    # Calcular estadísticas de conformidad
-    conformes, no_conformes, porcentaje_conforme = calcular_conformidad(data, LSL_pH, USL_pH)
-    
-    # Crear histograma
-    counts, bins, patches = ax.hist(data, bins=25, density=False, alpha=0.7, 
-                                   color=color, edgecolor='black', linewidth=0.5)
-    
-    # Colorear barras según conformidad
-    for j, (count, bin_left, patch) in enumerate(zip(counts, bins[:-1], patches)):
-        bin_right = bins[j+1]
-        bin_center = (bin_left + bin_right) / 2
-        if bin_center < LSL_pH or bin_center > USL_pH:
-            patch.set_facecolor('red')
-            patch.set_alpha(0.8)
-    
-    # Añadir curva normal teórica
-    x_curve = np.linspace(data.min(), data.max(), 100)
-    # Escalar la curva normal para que coincida con el histograma
-    mean_data = np.mean(data)
-    std_data = np.std(data, ddof=1)
-    y_curve = stats.norm.pdf(x_curve, mean_data, std_data) * len(data) * (bins[1] - bins[0])
-    ax.plot(x_curve, y_curve, 'k-', linewidth=2, alpha=0.8, label='Distribución teórica')
-    
-    # Líneas de especificación
-    ax.axvline(LSL_pH, color='red', linestyle='--', linewidth=2, label=f'LSL = {LSL_pH}')
-    ax.axvline(USL_pH, color='red', linestyle='--', linewidth=2, label=f'USL = {USL_pH}')
-    ax.axvline(TARGET_pH, color='green', linestyle=':', linewidth=2, alpha=0.7, label=f'Objetivo = {TARGET_pH}')
-    ax.axvline(mean_data, color='blue', linestyle='-', linewidth=2, alpha=0.7, 
-               label=f'Media = {mean_data:.2f}')
-    
-    # Sombrear área de conformidad
-    x_fill = np.linspace(LSL_pH, USL_pH, 100)
-    y_fill = stats.norm.pdf(x_fill, mean_data, std_data) * len(data) * (bins[1] - bins[0])
-    ax.fill_between(x_fill, 0, y_fill, alpha=0.2, color='green', label='Zona de conformidad')
-    
-    # Configurar el gráfico
-    ax.set_title(f'{title}\n{conformes} conformes ({porcentaje_conforme:.1f}%) | {no_conformes} no conformes ({100-porcentaje_conforme:.1f}%)', 
-                fontsize=14, fontweight='bold')
-    ax.set_xlabel('pH', fontsize=12)
-    ax.set_ylabel('Frecuencia', fontsize=12)
-    ax.grid(True, alpha=0.3)
-    ax.legend(loc='upper right', fontsize=10)
-    ax.set_xlim(6.4, 7.6)
-
-plt.suptitle('Análisis de Conformidad - pH de Solución Química', 
-             fontsize=16, fontweight='bold', y=0.98)
-plt.tight_layout()
-plt.savefig('conformidad_histograma.png', dpi=300, bbox_inches='tight')
-plt.savefig('conformidad_histograma.pdf', bbox_inches='tight')
-print("Gráfico de conformidad guardado como 'conformidad_histograma.png' y '.pdf'")
-plt.show()
-
-# Gráfico adicional: Comparación de tasas de conformidad
-fig2, ax = plt.subplots(figsize=(10, 6))
-
-# Datos para el gráfico de barras
-escenarios = ['Proceso Centrado\ny Capaz', 'Proceso\nDescentrado', 'Proceso con Alta\nVariabilidad']
-conformidad_porcentajes = []
-no_conformidad_porcentajes = []
-
-for _, data, _ in scenarios:
-    _, _, porcentaje_conforme = calcular_conformidad(data, LSL_pH, USL_pH)
-    conformidad_porcentajes.append(porcentaje_conforme)
-    no_conformidad_porcentajes.append(100 - porcentaje_conforme)
-
-x = np.arange(len(escenarios))
-width = 0.35
-
-# Crear barras apiladas
-bars1 = ax.bar(x, conformidad_porcentajes, width, label='Conformes', color='#2ca02c', alpha=0.8)
-bars2 = ax.bar(x, no_conformidad_porcentajes, width, bottom=conformidad_porcentajes, 
-               label='No Conformes', color='#d62728', alpha=0.8)
-
-# Añadir etiquetas en las barras
-for i, (bar1, bar2) in enumerate(zip(bars1, bars2)):
-    # Etiqueta para conformes
-    height1 = bar1.get_height()
-    if height1 > 5:  # Solo mostrar si hay suficiente espacio
-        ax.text(bar1.get_x() + bar1.get_width()/2., height1/2,
-               f'{height1:.1f}%', ha='center', va='center', fontweight='bold', color='white')
-    
-    # Etiqueta para no conformes
-    height2 = bar2.get_height()
-    if height2 > 5:  # Solo mostrar si hay suficiente espacio
-        ax.text(bar2.get_x() + bar2.get_width()/2., height1 + height2/2,
-               f'{height2:.1f}%', ha='center', va='center', fontweight='bold', color='white')
-
-ax.set_xlabel('Tipo de Proceso', fontsize=12)
-ax.set_ylabel('Porcentaje (%)', fontsize=12)
-ax.set_title('Comparación de Tasas de Conformidad por Tipo de Proceso', fontsize=14, fontweight='bold')
-ax.set_xticks(x)
-ax.set_xticklabels(escenarios)
-ax.legend()
-ax.set_ylim(0, 100)
-
-# Añadir línea de referencia del 95% (objetivo típico)
-ax.axhline(y=95, color='orange', linestyle='--', alpha=0.7, linewidth=2, 
-           label='Objetivo 95% conformidad')
-ax.legend()
-
-plt.tight_layout()
-plt.savefig('comparacion_conformidad.png', dpi=300, bbox_inches='tight')
-plt.savefig('comparacion_conformidad.pdf', bbox_inches='tight')
-print("Gráfico de comparación de conformidad guardado como 'comparacion_conformidad.png' y '.pdf'")
-plt.show() 
\ No newline at end of file
+def abrir_mediciones(ruta, dtype=np.float64):
+    """Abre un fichero de mediciones como array mapeado en memoria (sin cargarlo)
+
+    Los ficheros ``.npy`` conservan su propio tipo; el resto se leen como
+    binario crudo del tipo ``dtype`` (float32 o float64).
+    """
+    if str(ruta).endswith('.npy'):
+        return np.load(ruta, mmap_mode='r')
+    return np.memmap(ruta, dtype=dtype, mode='r')
+
+def calcular_conformidad_archivo(ruta, lsl, usl, dtype=np.float64, tam_bloque=1 << 20):
+    """Versión de calcular_conformidad para ficheros mayores que la memoria
+
+    Recorre el fichero por bloques de ``tam_bloque`` lecturas, de modo que
+    la memoria usada depende del bloque y no del tamaño del fichero. Las
+    lecturas NaN (sensor sin dato) no se cuentan. Devuelve un diccionario
+    con conformes, no conformes, sus porcentajes y la media y desviación
+    estándar (ddof=1) que usa la curva teórica del histograma.
+    """
+    datos = abrir_mediciones(ruta, dtype).reshape(-1)
+    n = conformes = invalidos = 0
+    media = m2 = 0.0
+    for inicio in range(0, len(datos), tam_bloque):
+        bloque = np.asarray(datos[inicio:inicio + tam_bloque], dtype=np.float64)
+        validos = ~np.isnan(bloque)
+        if not validos.all():
+            invalidos += int(np.count_nonzero(~validos))
+            bloque = bloque[validos]
+        n_bloque = len(bloque)
+        if n_bloque == 0:
+            continue
+        conformes += int(np.count_nonzero((bloque >= lsl) & (bloque <= usl)))
+        # Combinar media y suma de cuadrados del bloque con las acumuladas (Chan)
+        media_bloque = float(bloque.mean())
+        m2_bloque = float(np.sum((bloque - media_bloque) ** 2))
+        delta = media_bloque - media
+        total = n + n_bloque
+        media += delta * n_bloque / total
+        m2 += m2_bloque + delta ** 2 * n * n_bloque / total
+        n = total
+
+    porcentaje_conforme = conformes / n * 100 if n else np.nan
+    return {
+        'conformes': conformes,
+        'no_conformes': n - conformes,
+        'porcentaje_conforme': porcentaje_conforme,
+        'porcentaje_no_conforme': 100 - porcentaje_conforme,
+        'invalidos': invalidos,
+        'media': media if n else np.nan,
+        'std': float(np.sqrt(m2 / (n - 1))) if n > 1 else np.nan,
+    }
+
+def crear_histogramas_conformidad():
+    """Crea los histogramas de conformidad de los tres escenarios"""
+    scenarios = generar_datos()
+
+    # Crear figura con subplots
+    fig, axes = plt.subplots(3, 1, figsize=(12, 15))
+
+    for i, (title, data, color) in enumerate(scenarios):
+        ax = axes[i]
+
+        # Calcular estadísticas de conformidad
+        conformes, no_conformes, porcentaje_conforme = calcular_conformidad(data, LSL_pH, USL_pH)
+
+        # Crear histograma con las barras no conformes (según su centro) en rojo
+        counts, bins, _ = histograma_especificacion(ax, data, bins=25, lsl=LSL_pH, usl=USL_pH,
+                                                    criterio='centro', color=color, alpha=0.7,
+                                                    alpha_fuera=0.8, edgecolor='black',
+                                                    linewidth=0.5)
+
+        # Añadir curva normal teórica
+        x_curve = np.linspace(data.min(), data.max(), 100)
+        # Escalar la curva normal para que coincida con el histograma
+        mean_data = np.mean(data)
+        std_data = np.std(data, ddof=1)
+        y_curve = normal.pdf(x_curve, mean_data, std_data) * len(data) * (bins[1] - bins[0])
+        ax.plot(x_curve, y_curve, 'k-', linewidth=2, alpha=0.8, label='Distribución teórica')
+
+        # Líneas de especificación
+        ax.axvline(LSL_pH, color='red', linestyle='--', linewidth=2, label=f'LSL = {LSL_pH}')
+        ax.axvline(USL_pH, color='red', linestyle='--', linewidth=2, label=f'USL = {USL_pH}')
+        ax.axvline(TARGET_pH, color='green', linestyle=':', linewidth=2, alpha=0.7, label=f'Objetivo = {TARGET_pH}')
+        ax.axvline(mean_data, color='blue', linestyle='-', linewidth=2, alpha=0.7,
+                   label=f'Media = {mean_data:.2f}')
+
+        # Sombrear área de conformidad
+        x_fill = np.linspace(LSL_pH, USL_pH, 100)
+        y_fill = normal.pdf(x_fill, mean_data, std_data) * len(data) * (bins[1] - bins[0])
+        ax.fill_between(x_fill, 0, y_fill, alpha=0.2, color='green', label='Zona de conformidad')
+
+        # Configurar el gráfico
+        ax.set_title(f'{title}\n{conformes} conformes ({porcentaje_conforme:.1f}%) | {no_conformes} no conformes ({100-porcentaje_conforme:.1f}%)',
+                    fontsize=14, fontweight='bold')
+        ax.set_xlabel('pH', fontsize=12)
+        ax.set_ylabel('Frecuencia', fontsize=12)
+        ax.grid(True, alpha=0.3)
+        ax.legend(loc='upper right', fontsize=10)
+        ax.set_xlim(6.4, 7.6)
+
+    fig.suptitle('Análisis de Conformidad - pH de Solución Química',
+                 fontsize=16, fontweight='bold', y=0.98)
+    fig.tight_layout()
+    return fig
+
+def crear_comparacion_conformidad():
+    """Crea el gráfico de barras con la comparación de tasas de conformidad"""
+    scenarios = generar_datos()
+
+    fig2, ax = plt.subplots(figsize=(10, 6))
+
+    # Datos para el gráfico de barras
+    escenarios = ['Proceso Centrado\ny Capaz', 'Proceso\nDescentrado', 'Proceso con Alta\nVariabilidad']
+    conformidad_porcentajes = []
+    no_conformidad_porcentajes = []
+
+    for _, data, _ in scenarios:
+        _, _, porcentaje_conforme = calcular_conformidad(data, LSL_pH, USL_pH)
+        conformidad_porcentajes.append(porcentaje_conforme)
+        no_conformidad_porcentajes.append(100 - porcentaje_conforme)
+
+    x = np.arange(len(escenarios))
+    width = 0.35
+
+    # Crear barras apiladas
+    bars1 = ax.bar(x, conformidad_porcentajes, width, label='Conformes', color='#2ca02c', alpha=0.8)
+    bars2 = ax.bar(x, no_conformidad_porcentajes, width, bottom=conformidad_porcentajes,
+                   label='No Conformes', color='#d62728', alpha=0.8)
+
+    # Añadir etiquetas en las barras
+    for i, (bar1, bar2) in enumerate(zip(bars1, bars2)):
+        # Etiqueta para conformes
+        height1 = bar1.get_height()
+        if height1 > 5:  # Solo mostrar si hay suficiente espacio
+            ax.text(bar1.get_x() + bar1.get_width()/2., height1/2,
+                   f'{height1:.1f}%', ha='center', va='center', fontweight='bold', color='white')
+
+        # Etiqueta para no conformes
+        height2 = bar2.get_height()
+        if height2 > 5:  # Solo mostrar si hay suficiente espacio
+            ax.text(bar2.get_x() + bar2.get_width()/2., height1 + height2/2,
+                   f'{height2:.1f}%', ha='center', va='center', fontweight='bold', color='white')
+
+    ax.set_xlabel('Tipo de Proceso', fontsize=12)
+    ax.set_ylabel('Porcentaje (%)', fontsize=12)
+    ax.set_title('Comparación de Tasas de Conformidad por Tipo de Proceso', fontsize=14, fontweight='bold')
+    ax.set_xticks(x)
+    ax.set_xticklabels(escenarios)
+    ax.legend()
+    ax.set_ylim(0, 100)
+
+    # Añadir línea de referencia del 95% (objetivo típico)
+    ax.axhline(y=95, color='orange', linestyle='--', alpha=0.7, linewidth=2,
+               label='Objetivo 95% conformidad')
+    ax.legend()
+
+    fig2.tight_layout()
+    return fig2
+
+if __name__ == "__main__":
+    fig = crear_histogramas_conformidad()
+    exportar_figura(fig, 'conformidad_histograma')
+    print("Gráfico de conformidad guardado como 'conformidad_histograma.png' y '.pdf'")
+    plt.show()
+
+    # Gráfico adicional: Comparación de tasas de conformidad
+    fig2 = crear_comparacion_conformidad()
+    exportar_figura(fig2, 'comparacion_conformidad')
+    print("Gráfico de comparación de conformidad guardado como 'comparacion_conformidad.png' y '.pdf'")
+    plt.show()
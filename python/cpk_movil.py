@@ -0,0 +1,173 @@
+"""
+Cp/Cpk móviles sobre ventanas deslizantes, por número de lecturas o por tiempo.
+
+En lugar de recalcular ``np.std`` para cada ventana, se mantienen sumas y
+sumas de cuadrados de cada línea:
+
+- ``cpk_movil`` calcula de una vez el índice de la ventana que termina en
+  cada lectura de una serie histórica, para muchas líneas a la vez, con
+  sumas acumuladas (la suma de una ventana es una resta de dos prefijos).
+- ``CpkMovil`` mantiene las sumas de la ventana actual de muchas líneas y
+  las actualiza en O(1) por línea cuando llega una lectura y caduca otra.
+
+Los valores se centran en el punto medio de la especificación antes de
+acumular, para no perder precisión al restar sumas de cuadrados grandes.
+Las lecturas NaN (línea sin dato) no cuentan.
+"""
+
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from capacidad import indices_capacidad
+from trazas import trazado
+
+
+def _indices(n, suma, suma_cuadrados, centro, lsl, usl, minimo):
+    """Media, std (ddof=1) e índices a partir de los momentos centrados"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        media_centrada = suma / n
+        varianza = (suma_cuadrados - suma * media_centrada) / (n - 1)
+        std = np.sqrt(np.maximum(varianza, 0))
+    media = media_centrada + centro
+    std = np.where(n >= minimo, std, np.nan)
+    return {'n': n, 'media': media, 'std': std, **indices_capacidad(media, std, lsl, usl)}
+
+
+@trazado('estadistica')
+def cpk_movil(valores, lsl, usl, ventana=None, tiempos=None, duracion=None, minimo=2):
+    """Índices de capacidad de la ventana que termina en cada lectura
+
+    Parámetros:
+    - valores: array (N,) o (L, N), una fila por línea; NaN = sin lectura.
+    - lsl, usl: límites comunes o uno por línea (arrays de longitud L).
+    - ventana: número de posiciones de la ventana (ventana por cuenta), o
+    - tiempos (N,) ordenados y duracion: la ventana de la posición j son las
+      lecturas con ``tiempos[j] - duracion < t <= tiempos[j]``. Valen
+      números o ``datetime64``/``timedelta64``.
+    - minimo: lecturas válidas mínimas para dar un índice (si no, NaN).
+
+    Devuelve un diccionario de arrays con la forma de ``valores``: n,
+    media, std, cp, cpu, cpl y cpk.
+    """
+    valores = np.asarray(valores, dtype=float)
+    lsl = np.asarray(lsl, dtype=float)
+    usl = np.asarray(usl, dtype=float)
+    if valores.ndim == 2:
+        lsl, usl = np.broadcast_to(lsl, len(valores))[:, None], np.broadcast_to(usl, len(valores))[:, None]
+    centro = (lsl + usl) / 2
+    n_lecturas = valores.shape[-1]
+
+    if ventana is not None:
+        inicio = np.maximum(np.arange(1, n_lecturas + 1) - ventana, 0)
+    elif tiempos is not None and duracion is not None:
+        tiempos = np.asarray(tiempos)
+        inicio = np.searchsorted(tiempos, tiempos - duracion, side='right')
+    else:
+        raise ValueError("Hay que indicar ventana o bien tiempos y duracion")
+
+    validos = ~np.isnan(valores)
+    x = np.where(validos, valores - centro, 0.0)
+    # Prefijos con un cero delante: la suma de [i, j) es P[j] - P[i]
+    forma = valores.shape[:-1] + (1,)
+    cuenta = np.concatenate([np.zeros(forma), np.cumsum(validos, axis=-1)], axis=-1)
+    suma = np.concatenate([np.zeros(forma), np.cumsum(x, axis=-1)], axis=-1)
+    suma_cuadrados = np.concatenate([np.zeros(forma), np.cumsum(x * x, axis=-1)], axis=-1)
+
+    # La ventana de la lectura j es [inicio[j], j + 1)
+    n = cuenta[..., 1:] - cuenta[..., inicio]
+    return _indices(n, suma[..., 1:] - suma[..., inicio],
+                    suma_cuadrados[..., 1:] - suma_cuadrados[..., inicio],
+                    centro, lsl, usl, minimo)
+
+
+class CpkMovil:
+    """Ventana deslizante de Cp/Cpk para muchas líneas, actualizada en O(1)
+
+    Cada llamada a ``anadir`` recibe una lectura por línea (NaN si la línea
+    no tiene dato) y, opcionalmente, su instante. La ventana es de las
+    últimas ``ventana`` lecturas o de las lecturas con ``t > ahora -
+    duracion``. Las lecturas que salen se restan de las sumas; cada vez que
+    se han procesado tantas lecturas como caben en el búfer, las sumas se
+    recalculan desde el búfer para que no se acumule error de redondeo.
+    """
+
+    def __init__(self, n_lineas, lsl, usl, ventana=None, duracion=None, minimo=2, capacidad=64):
+        if ventana is None and duracion is None:
+            raise ValueError("Hay que indicar ventana o duracion")
+        self.lsl = np.broadcast_to(np.asarray(lsl, dtype=float), n_lineas)
+        self.usl = np.broadcast_to(np.asarray(usl, dtype=float), n_lineas)
+        self.centro = (self.lsl + self.usl) / 2
+        self.ventana = ventana
+        self.duracion = np.timedelta64(duracion) if isinstance(duracion, timedelta) else duracion
+        self.minimo = minimo
+        capacidad = ventana if ventana is not None else capacidad
+        # Búfer circular: columnas = lecturas, de la más antigua (cabeza) a la última
+        self.valores = np.full((n_lineas, capacidad), np.nan)
+        self.tiempos = None
+        self.cabeza = 0
+        self.tamano = 0
+        self.n = np.zeros(n_lineas)
+        self.suma = np.zeros(n_lineas)
+        self.suma_cuadrados = np.zeros(n_lineas)
+        self.desde_recalculo = 0
+
+    def _quitar_primera(self):
+        x = self.valores[:, self.cabeza]
+        validos = ~np.isnan(x)
+        self.n -= validos
+        self.suma -= np.where(validos, x, 0.0)
+        self.suma_cuadrados -= np.where(validos, x * x, 0.0)
+        self.valores[:, self.cabeza] = np.nan
+        self.cabeza = (self.cabeza + 1) % self.valores.shape[1]
+        self.tamano -= 1
+
+    def _ampliar(self):
+        """Duplica el búfer (solo en ventanas por tiempo) dejándolo ordenado desde 0"""
+        orden = (self.cabeza + np.arange(self.tamano)) % self.valores.shape[1]
+        valores = np.full((len(self.valores), 2 * self.valores.shape[1]), np.nan)
+        valores[:, :self.tamano] = self.valores[:, orden]
+        tiempos = np.empty(2 * len(self.tiempos), dtype=self.tiempos.dtype)
+        tiempos[:self.tamano] = self.tiempos[orden]
+        self.valores, self.tiempos, self.cabeza = valores, tiempos, 0
+
+    def _recalcular(self):
+        validos = ~np.isnan(self.valores)
+        x = np.where(validos, self.valores, 0.0)
+        self.n = validos.sum(axis=1).astype(float)
+        self.suma = x.sum(axis=1)
+        self.suma_cuadrados = (x * x).sum(axis=1)
+        self.desde_recalculo = 0
+
+    def anadir(self, valores, tiempo=None):
+        """Añade una lectura por línea y hace caducar las que salen de la ventana"""
+        x = np.asarray(valores, dtype=float) - self.centro
+        if self.duracion is not None:
+            tiempo = np.datetime64(tiempo) if isinstance(tiempo, datetime) else np.asarray(tiempo)
+            if self.tiempos is None:
+                self.tiempos = np.empty(self.valores.shape[1], dtype=tiempo.dtype)
+            while self.tamano and self.tiempos[self.cabeza] <= tiempo - self.duracion:
+                self._quitar_primera()
+            if self.tamano == self.valores.shape[1]:
+                self._ampliar()
+        elif self.tamano == self.ventana:
+            self._quitar_primera()
+
+        posicion = (self.cabeza + self.tamano) % self.valores.shape[1]
+        self.valores[:, posicion] = x
+        if self.tiempos is not None:
+            self.tiempos[posicion] = tiempo
+        self.tamano += 1
+        validos = ~np.isnan(x)
+        self.n += validos
+        self.suma += np.where(validos, x, 0.0)
+        self.suma_cuadrados += np.where(validos, x * x, 0.0)
+
+        self.desde_recalculo += 1
+        if self.desde_recalculo >= self.valores.shape[1]:
+            self._recalcular()
+
+    def indices(self):
+        """n, media, std, cp, cpu, cpl y cpk actuales de cada línea"""
+        return _indices(self.n, self.suma, self.suma_cuadrados, self.centro,
+                        self.lsl, self.usl, self.minimo)
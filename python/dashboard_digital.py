@@ -1,219 +1,698 @@
+import argparse
+import time
+
 import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.patches as patches
 from datetime import datetime, timedelta
 import matplotlib.dates as mdates
-
-# Configurar semilla para reproducibilidad
-np.random.seed(42)
-
-# Crear figura principal del dashboard
-fig = plt.figure(figsize=(20, 12))
-
-# Configurar el título principal
-fig.suptitle('Dashboard Digital - Sistema de Control de Calidad Industrial', 
-             fontsize=20, fontweight='bold', y=0.96)
-
-# Crear layout con GridSpec para un dashboard profesional
-gs = fig.add_gridspec(3, 4, hspace=0.3, wspace=0.3)
-
-# === PANEL 1: Gráfico de Control en Tiempo Real ===
-ax1 = fig.add_subplot(gs[0, :2])
-
-# Simular datos de densidad en tiempo real (últimas 24 horas)
-horas = 24
-tiempo = [datetime.now() - timedelta(hours=24-i) for i in range(horas)]
-densidad_actual = 1.00 + 0.008 * np.sin(np.linspace(0, 4*np.pi, horas)) + np.random.normal(0, 0.003, horas)
+from histograma_spec import histograma_especificacion, actualizar_histograma
+from bocetos import HistogramaEspecificacion
+from capa_estatica import CapaEstatica
+from decimacion import decimar, pixeles_eje
+from especificaciones import REGISTRO
+from exportacion import DPI, exportar_figura
+from almacen import AlmacenMediciones
+from cpk_movil import cpk_movil, CpkMovil
+from produccion import (AgregadorProduccion, ETIQUETAS_TURNOS, LOTES_TURNO, N_LINEAS,
+                        dias_y_turnos, formato_porcentaje, inicio_dia, simular_lotes)
+from reglas_control import REGLAS, alertas_reglas, evaluar_reglas
+from trazas import trazado
 
 # Parámetros de control
 CL = 1.00
 UCL = 1.012
 LCL = 0.988
+SIGMA = (UCL - CL) / 3
 
-ax1.plot(tiempo, densidad_actual, 'o-', color='#2E86AB', linewidth=2, markersize=6)
-ax1.axhline(CL, color='green', linewidth=2, label='LC (1.000)')
-ax1.axhline(UCL, color='red', linestyle='--', linewidth=2, label='UCL (1.012)')
-ax1.axhline(LCL, color='red', linestyle='--', linewidth=2, label='LCL (0.988)')
-
-# Marcar último punto
-ax1.scatter(tiempo[-1], densidad_actual[-1], color='red', s=100, zorder=5)
-ax1.annotate(f'ACTUAL:\n{densidad_actual[-1]:.3f} g/cc', 
-             xy=(tiempo[-1], densidad_actual[-1]), 
-             xytext=(tiempo[-1], densidad_actual[-1] + 0.008),
-             arrowprops=dict(arrowstyle='->', color='red'),
-             bbox=dict(boxstyle="round,pad=0.3", facecolor="yellow", alpha=0.8),
-             fontweight='bold', ha='center')
-
-ax1.set_title('Control de Densidad - Últimas 24 Horas', fontsize=14, fontweight='bold')
-ax1.set_ylabel('Densidad (g/cc)', fontsize=12)
-ax1.grid(True, alpha=0.3)
-ax1.legend()
-ax1.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M'))
-ax1.xaxis.set_major_locator(mdates.HourLocator(interval=4))
-
-# === PANEL 2: Indicadores KPI ===
-ax2 = fig.add_subplot(gs[0, 2])
-ax2.axis('off')
-
-# Crear indicadores estilo KPI
-kpis = [
-    ('Cpk Actual', '1.45', '#28A745', 'EXCELENTE'),
-    ('Conformidad', '99.2%', '#FFC107', 'OBJETIVO: 99.5%'),
-    ('Lotes Hoy', '24', '#17A2B8', '2 EN PROCESO')
-]
-
-y_positions = [0.8, 0.5, 0.2]
-for i, (metric, value, color, status) in enumerate(kpis):
-    # Cuadro de KPI
-    rect = patches.Rectangle((0.1, y_positions[i]-0.1), 0.8, 0.15, 
-                           linewidth=2, edgecolor=color, facecolor=color, alpha=0.2)
-    ax2.add_patch(rect)
-    
-    # Texto del KPI
-    ax2.text(0.5, y_positions[i], f'{metric}\n{value}', 
-             ha='center', va='center', fontsize=14, fontweight='bold')
-    ax2.text(0.5, y_positions[i]-0.05, status, 
-             ha='center', va='center', fontsize=10, style='italic')
-
-ax2.set_xlim(0, 1)
-ax2.set_ylim(0, 1)
-ax2.set_title('Indicadores Clave', fontsize=14, fontweight='bold')
-
-# === PANEL 3: Estado de Equipos ===
-ax3 = fig.add_subplot(gs[0, 3])
-ax3.axis('off')
-
-equipos = [
-    ('Reactor A', 'OPERATIVO', '#28A745'),
-    ('Sensor pH-01', 'OPERATIVO', '#28A745'),
-    ('Bomba B-12', 'MANTENIMIENTO', '#FFC107'),
-    ('Mezclador C', 'OPERATIVO', '#28A745')
-]
-
-for i, (equipo, estado, color) in enumerate(equipos):
-    y_pos = 0.8 - i * 0.2
-    circle = patches.Circle((0.2, y_pos), 0.05, color=color)
-    ax3.add_patch(circle)
-    ax3.text(0.35, y_pos, f'{equipo}\n{estado}', 
-             va='center', fontsize=10, fontweight='bold')
-
-ax3.set_xlim(0, 1)
-ax3.set_ylim(0, 1)
-ax3.set_title('Estado de Equipos', fontsize=14, fontweight='bold')
-
-# === PANEL 4: Histograma de Calidad Reciente ===
-ax4 = fig.add_subplot(gs[1, :2])
-
-# Datos de los últimos 100 lotes
-datos_recientes = np.random.normal(1.00, 0.005, 100)
-counts, bins, patches = ax4.hist(datos_recientes, bins=20, alpha=0.7, color='#2E86AB', edgecolor='black')
-
-# Colorear según especificaciones
-LSL, USL = 0.98, 1.02
-for i, (count, bin_left, patch) in enumerate(zip(counts, bins[:-1], patches)):
-    bin_right = bins[i+1]
-    if bin_right <= LSL or bin_left >= USL:
-        patch.set_facecolor('red')
-
-ax4.axvline(LSL, color='red', linestyle='--', linewidth=2, label='LSL')
-ax4.axvline(USL, color='red', linestyle='--', linewidth=2, label='USL')
-ax4.axvline(1.00, color='green', linestyle=':', linewidth=2, label='Objetivo')
-
-ax4.set_title('Distribución de Calidad - Últimos 100 Lotes', fontsize=14, fontweight='bold')
-ax4.set_xlabel('Densidad (g/cc)')
-ax4.set_ylabel('Frecuencia')
-ax4.legend()
-ax4.grid(True, alpha=0.3)
-
-# === PANEL 5: Tendencia de Capacidad ===
-ax5 = fig.add_subplot(gs[1, 2:])
-
-# Simular evolución del Cpk en los últimos 30 días
-dias = 30
-fechas = [datetime.now() - timedelta(days=30-i) for i in range(dias)]
-cpk_tendencia = 1.2 + 0.3 * np.sin(np.linspace(0, 2*np.pi, dias)) + np.random.normal(0, 0.05, dias)
-
-ax5.plot(fechas, cpk_tendencia, 'o-', color='#FF6B35', linewidth=2, markersize=4)
-ax5.axhline(1.33, color='green', linestyle='--', linewidth=2, alpha=0.7, label='Objetivo Cpk ≥ 1.33')
-ax5.axhline(1.0, color='orange', linestyle='--', linewidth=2, alpha=0.7, label='Mínimo Aceptable')
-
-ax5.set_title('Evolución de la Capacidad del Proceso (Cpk)', fontsize=14, fontweight='bold')
-ax5.set_ylabel('Índice Cpk')
-ax5.grid(True, alpha=0.3)
-ax5.legend()
-ax5.xaxis.set_major_formatter(mdates.DateFormatter('%d/%m'))
-ax5.xaxis.set_major_locator(mdates.DayLocator(interval=5))
-
-# === PANEL 6: Alertas y Notificaciones ===
-ax6 = fig.add_subplot(gs[2, :2])
-ax6.axis('off')
-
-alertas = [
-    ('🟡', '10:45', 'Tendencia al alza detectada en Reactor B', '#FFC107'),
-    ('🟢', '09:30', 'Calibración de sensor pH-02 completada', '#28A745'),
-    ('🔴', '08:15', 'Límite de control excedido - Lote #A1547', '#DC3545'),
-    ('🟢', '07:00', 'Proceso estabilizado después de ajuste', '#28A745'),
-]
-
-ax6.text(0.5, 0.95, 'Registro de Alertas del Turno', ha='center', va='top', 
-         fontsize=14, fontweight='bold')
-
-for i, (icono, hora, mensaje, color) in enumerate(alertas):
-    y_pos = 0.8 - i * 0.15
-    ax6.text(0.05, y_pos, f'{icono} {hora}', fontsize=12, fontweight='bold')
-    ax6.text(0.2, y_pos, mensaje, fontsize=11, color=color)
-
-ax6.set_xlim(0, 1)
-ax6.set_ylim(0, 1)
+# Límites de especificación
+LSL, USL, _ = REGISTRO.limites('producto', 'densidad')
 
-# === PANEL 7: Métricas de Producción ===
-ax7 = fig.add_subplot(gs[2, 2:])
+# Bins del histograma de lotes fuera de especificación, a cada lado
+BINS_FUERA_HISTOGRAMA = 5
 
-# Datos de producción por turno
-turnos = ['Turno 1\n(00-08h)', 'Turno 2\n(08-16h)', 'Turno 3\n(16-24h)']
-produccion = [145, 160, 138]  # Lotes producidos
-conformidad_turno = [99.3, 98.8, 99.5]  # % de conformidad
+# Ventanas del Cpk: días para la tendencia y lotes para el KPI
+VENTANA_CPK = timedelta(days=7)
+LOTES_CPK = 100
 
-# Crear gráfico combinado
-ax7_twin = ax7.twinx()
+# Horas del panel de densidad; su eje va de -HORAS_DENSIDAD a 0 (la última lectura)
+HORAS_DENSIDAD = 24
 
-# Barras de producción
-bars = ax7.bar(turnos, produccion, alpha=0.7, color='#2E86AB', label='Lotes Producidos')
-ax7.set_ylabel('Lotes Producidos', color='#2E86AB', fontsize=12)
-ax7.tick_params(axis='y', labelcolor='#2E86AB')
+# Lecturas que se revisan con las reglas de control en cada refresco
+VENTANA_REGLAS = 9
 
-# Línea de conformidad
-line = ax7_twin.plot(turnos, conformidad_turno, 'o-', color='#FF6B35', 
-                     linewidth=3, markersize=8, label='% Conformidad')
-ax7_twin.set_ylabel('Conformidad (%)', color='#FF6B35', fontsize=12)
-ax7_twin.tick_params(axis='y', labelcolor='#FF6B35')
-ax7_twin.set_ylim(98, 100)
-
-# Añadir valores en las barras
-for bar, conf in zip(bars, conformidad_turno):
-    height = bar.get_height()
-    ax7.text(bar.get_x() + bar.get_width()/2., height + 2,
-             f'{int(height)}', ha='center', va='bottom', fontweight='bold')
-
-ax7.set_title('Producción y Conformidad por Turno', fontsize=14, fontweight='bold')
-ax7.grid(True, alpha=0.3)
-
-# Añadir línea de referencia para conformidad objetivo
-ax7_twin.axhline(99.0, color='red', linestyle='--', alpha=0.7, label='Objetivo 99%')
+# Eventos del sistema que no salen de las reglas de control; completan el
+# registro de alertas cuando hay menos de cuatro
+EVENTOS = [
+    ('🟢', '09:30', 'Calibración de sensor pH-02 completada'),
+    ('🟢', '07:00', 'Proceso estabilizado después de ajuste'),
+]
 
-# === Panel de información del sistema ===
-info_text = f"""
+COLORES_ALERTA = {'🟡': '#FFC107', '🟢': '#28A745', '🔴': '#DC3545'}
+
+@trazado('datos')
+def generar_datos(ahora=None, hasta_ahora=False):
+    """Simula los datos que muestra el dashboard
+
+    Los lotes cubren el día completo de ``ahora``, así que la figura
+    exportada no depende de la hora a la que se genera; con ``hasta_ahora``
+    (modo en vivo y servidor) solo los de hoy hasta ``ahora``.
+    """
+    # Configurar semilla para reproducibilidad
+    np.random.seed(42)
+    ahora = ahora or datetime.now()
+
+    # Simular datos de densidad en tiempo real (últimas 24 horas)
+    horas = 24
+    tiempo = [ahora - timedelta(hours=24-i) for i in range(horas)]
+    densidad_actual = 1.00 + 0.008 * np.sin(np.linspace(0, 4*np.pi, horas)) + np.random.normal(0, 0.003, horas)
+
+    # Datos de los últimos 100 lotes
+    datos_recientes = np.random.normal(1.00, 0.005, 100)
+
+    # Histórico horario de densidad (30 días + una ventana de Cpk) con la
+    # media y la dispersión del proceso variando lentamente
+    dias = 30
+    horas_historico = (dias + VENTANA_CPK.days) * 24
+    tiempo_historico = [ahora - timedelta(hours=horas_historico-i) for i in range(horas_historico)]
+    fase = np.linspace(0, 2*np.pi, horas_historico)
+    densidad_historico = (1.00 + 0.002 * np.sin(fase)
+                          + np.random.normal(0, 1, horas_historico) * (0.005 - 0.001 * np.sin(fase)))
+
+    # Cpk móvil de 7 días al final de cada uno de los últimos 30 días
+    fechas = [ahora - timedelta(days=30-i) for i in range(dias)]
+    tiempos = np.array(tiempo_historico, dtype='datetime64[ms]')
+    movil = cpk_movil(densidad_historico, LSL, USL, tiempos=tiempos, duracion=np.timedelta64(VENTANA_CPK))
+    fin_de_dia = np.searchsorted(tiempos, np.array(fechas, dtype='datetime64[ms]'), side='right') - 1
+    cpk_tendencia = movil['cpk'][fin_de_dia]
+
+    # Lotes de hoy (instante, conforme, línea): el día completo o hasta ahora
+    desde = inicio_dia(ahora)
+    lotes = simular_lotes(desde, ahora if hasta_ahora else desde + timedelta(days=1))
+    produccion = resumen_produccion(AgregadorProduccion(N_LINEAS).anadir(*lotes), ahora,
+                                    en_curso=hasta_ahora)
+
+    return {
+        'ahora': ahora,
+        'tiempo': tiempo,
+        'densidad': densidad_actual,
+        'datos_recientes': datos_recientes,
+        'fechas': fechas,
+        'cpk': cpk_tendencia,
+        'tiempo_historico': tiempo_historico,
+        'densidad_historico': densidad_historico,
+        'kpis': [('Cpk Actual', '1.45', '#28A745', 'EXCELENTE')] + produccion.pop('kpis'),
+        'alertas': registro_alertas(tiempo, densidad_actual),
+        'turnos': list(ETIQUETAS_TURNOS),
+        'lotes': lotes,
+        **produccion,
+    }
+
+def resumen_produccion(agregador, ahora, en_curso=True):
+    """Lotes y % de conformidad por turno de hoy y KPIs de conformidad y lotes del día
+
+    Con ``en_curso`` el KPI de lotes indica el turno de ``ahora``; si no,
+    que el día está completo.
+    """
+    resumen = agregador.resumen_dia(ahora)
+    turno = dias_y_turnos([ahora])[1][0]
+    estado = f'TURNO {turno + 1} EN CURSO' if en_curso else 'DÍA COMPLETO'
+    return {
+        'produccion': resumen['lotes_turno'],
+        'conformidad_turno': resumen['conformidad_turno'],
+        'kpis': [
+            ('Conformidad', formato_porcentaje(resumen['conformidad_dia']), '#FFC107', 'OBJETIVO: 99.5%'),
+            ('Lotes Hoy', f"{resumen['lotes_dia']}", '#17A2B8', estado),
+        ],
+    }
+
+def alertas_densidad(tiempo, densidad, desde=0):
+    """Alertas de las reglas de control sobre la densidad, la más reciente primero
+
+    Una alerta por punto: la regla más grave (la de número más bajo) da el
+    texto y el resto se enumeran. Solo se devuelven las que empiezan en la
+    posición ``desde`` o después.
+    """
+    registro = alertas_reglas(densidad, CL, SIGMA, tiempos=np.asarray(tiempo, dtype=object))
+    alertas = []
+    # El registro está ordenado por tiempo y, en cada punto, por regla
+    indices, primeras = np.unique(registro['indice'], return_index=True)
+    for i, inicio, fin in zip(indices, primeras, np.r_[primeras[1:], len(registro['indice'])]):
+        if i < desde:
+            continue
+        reglas = registro['regla'][inicio:fin]
+        mensaje = f"{REGLAS[reglas[0]]} - {registro['valor'][inicio]:.3f} g/cc"
+        if len(reglas) > 1:
+            mensaje += f" (reglas {', '.join(map(str, reglas))})"
+        alertas.append(('🔴' if reglas[0] == 1 else '🟡', registro['tiempo'][inicio].strftime('%H:%M'), mensaje))
+    return alertas[::-1]
+
+def registro_alertas(tiempo, densidad):
+    """Las cuatro últimas alertas de densidad, completadas con eventos del sistema"""
+    return (alertas_densidad(tiempo, densidad) + EVENTOS)[:4]
+
+def horas_hasta_ultima(tiempo):
+    """Horas de cada instante hasta el último (el último es 0, los anteriores negativos)"""
+    tiempo = np.asarray(tiempo, dtype='datetime64[us]')
+    return (tiempo - tiempo[-1]) / np.timedelta64(1, 'h')
+
+def densidad_visible(t, densidad, columnas):
+    """Índices de las lecturas que se dibujan en el panel 1 (ver decimacion.py)
+
+    ``t`` son horas hasta la última lectura. Las lecturas que incumplen
+    alguna regla, incluida la de fuera de límites, se dibujan siempre.
+    """
+    return decimar(t, densidad, columnas, conservar=evaluar_reglas(densidad, CL, SIGMA) != 0)
+
+def histograma_lotes(densidades):
+    """Histograma de bins fijos alineados con LSL/USL de las densidades de los lotes"""
+    return HistogramaEspecificacion(LSL, USL, bins_fuera=BINS_FUERA_HISTOGRAMA).anadir(densidades)
+
+# Recuadro de información del sistema (estático)
+TEXTO_INFO = """
 SISTEMA DE CONTROL DE CALIDAD v2.1
-Última actualización: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}
 Sensores conectados: 12/12 ✓
 Base de datos: Sincronizada ✓
 Estado general: OPERATIVO
 """
 
-fig.text(0.02, 0.02, info_text, fontsize=10, style='italic', 
-         bbox=dict(boxstyle="round,pad=0.3", facecolor="lightgray", alpha=0.8))
-
-plt.savefig('dashboard_digital.png', dpi=300, bbox_inches='tight')
-plt.savefig('dashboard_digital.pdf', bbox_inches='tight')
-print("Dashboard digital guardado como 'dashboard_digital.png' y '.pdf'")
-plt.show() 
\ No newline at end of file
+def texto_actualizacion(ahora):
+    """Hora de la última actualización; va en su propio texto porque cambia en cada refresco"""
+    return f"Última actualización: {ahora.strftime('%d/%m/%Y %H:%M:%S')}"
+
+def construir_dashboard(datos, dpi=None):
+    """Crea la figura del dashboard y devuelve (figura, artistas dinámicos)
+
+    Los artistas dinámicos son los que cambian al llegar datos nuevos;
+    el modo en vivo (DashboardEnVivo) solo actualiza esos.
+    """
+    # Crear figura principal del dashboard
+    fig = plt.figure(figsize=(20, 12), dpi=dpi)
+    artistas = {}
+
+    # Configurar el título principal
+    fig.suptitle('Dashboard Digital - Sistema de Control de Calidad Industrial',
+                 fontsize=20, fontweight='bold', y=0.96)
+
+    # Crear layout con GridSpec para un dashboard profesional
+    gs = fig.add_gridspec(3, 4, hspace=0.3, wspace=0.3)
+
+    # === PANEL 1: Gráfico de Control en Tiempo Real ===
+    ax1 = fig.add_subplot(gs[0, :2])
+    # Eje fijo en horas hasta la última lectura: la ventana deslizante del
+    # modo en vivo no cambia sus límites
+    tiempo = horas_hasta_ultima(datos['tiempo'])
+    densidad_actual = datos['densidad']
+
+    # Con muchas lecturas solo se dibujan las que se distinguen al exportar
+    artistas['columnas_densidad'] = pixeles_eje(ax1, DPI)
+    visibles = densidad_visible(tiempo, densidad_actual, artistas['columnas_densidad'])
+    artistas['densidad'], = ax1.plot(tiempo[visibles], densidad_actual[visibles],
+                                     'o-', color='#2E86AB', linewidth=2, markersize=6)
+    ax1.axhline(CL, color='green', linewidth=2, label='LC (1.000)')
+    ax1.axhline(UCL, color='red', linestyle='--', linewidth=2, label='UCL (1.012)')
+    ax1.axhline(LCL, color='red', linestyle='--', linewidth=2, label='LCL (0.988)')
+
+    # Marcar último punto
+    artistas['actual_punto'] = ax1.scatter(tiempo[-1], densidad_actual[-1], color='red', s=100, zorder=5)
+    artistas['actual_anotacion'] = ax1.annotate(
+        f'ACTUAL:\n{densidad_actual[-1]:.3f} g/cc',
+        xy=(tiempo[-1], densidad_actual[-1]),
+        xytext=(tiempo[-1], densidad_actual[-1] + 0.008),
+        arrowprops=dict(arrowstyle='->', color='red'),
+        bbox=dict(boxstyle="round,pad=0.3", facecolor="yellow", alpha=0.8),
+        fontweight='bold', ha='center')
+
+    ax1.set_title('Control de Densidad - Últimas 24 Horas', fontsize=14, fontweight='bold')
+    ax1.set_xlabel('Horas hasta la última lectura', fontsize=12)
+    ax1.set_ylabel('Densidad (g/cc)', fontsize=12)
+    ax1.grid(True, alpha=0.3)
+    ax1.legend()
+    margen = HORAS_DENSIDAD * 0.05
+    ax1.set_xlim(-HORAS_DENSIDAD - margen, margen)
+    ax1.set_xticks(np.arange(-HORAS_DENSIDAD, 1, 4))
+
+    # === PANEL 2: Indicadores KPI ===
+    ax2 = fig.add_subplot(gs[0, 2])
+    ax2.axis('off')
+
+    # Crear indicadores estilo KPI
+    artistas['kpi_valores'] = []
+    artistas['kpi_estados'] = []
+    y_positions = [0.8, 0.5, 0.2]
+    for i, (metric, value, color, status) in enumerate(datos['kpis']):
+        # Cuadro de KPI
+        rect = patches.Rectangle((0.1, y_positions[i]-0.1), 0.8, 0.15,
+                               linewidth=2, edgecolor=color, facecolor=color, alpha=0.2)
+        ax2.add_patch(rect)
+
+        # Texto del KPI
+        artistas['kpi_valores'].append(ax2.text(0.5, y_positions[i], f'{metric}\n{value}',
+                                                ha='center', va='center', fontsize=14, fontweight='bold'))
+        artistas['kpi_estados'].append(ax2.text(0.5, y_positions[i]-0.05, status,
+                                                ha='center', va='center', fontsize=10, style='italic'))
+
+    ax2.set_xlim(0, 1)
+    ax2.set_ylim(0, 1)
+    ax2.set_title('Indicadores Clave', fontsize=14, fontweight='bold')
+
+    # === PANEL 3: Estado de Equipos ===
+    ax3 = fig.add_subplot(gs[0, 3])
+    ax3.axis('off')
+
+    equipos = [
+        ('Reactor A', 'OPERATIVO', '#28A745'),
+        ('Sensor pH-01', 'OPERATIVO', '#28A745'),
+        ('Bomba B-12', 'MANTENIMIENTO', '#FFC107'),
+        ('Mezclador C', 'OPERATIVO', '#28A745')
+    ]
+
+    for i, (equipo, estado, color) in enumerate(equipos):
+        y_pos = 0.8 - i * 0.2
+        circle = patches.Circle((0.2, y_pos), 0.05, color=color)
+        ax3.add_patch(circle)
+        ax3.text(0.35, y_pos, f'{equipo}\n{estado}',
+                 va='center', fontsize=10, fontweight='bold')
+
+    ax3.set_xlim(0, 1)
+    ax3.set_ylim(0, 1)
+    ax3.set_title('Estado de Equipos', fontsize=14, fontweight='bold')
+
+    # === PANEL 4: Histograma de Calidad Reciente ===
+    ax4 = fig.add_subplot(gs[1, :2])
+
+    # Bins fijos con LSL y USL en sus bordes; colorear según especificaciones
+    histograma = histograma_lotes(datos['datos_recientes'])
+    _, artistas['histograma_bordes'], artistas['histograma'] = histograma_especificacion(
+        ax4, conteos=histograma.conteos_bins, bins=histograma.bordes, lsl=LSL, usl=USL,
+        color='#2E86AB', alpha=0.7, edgecolor='black')
+
+    ax4.axvline(LSL, color='red', linestyle='--', linewidth=2, label='LSL')
+    ax4.axvline(USL, color='red', linestyle='--', linewidth=2, label='USL')
+    ax4.axvline(1.00, color='green', linestyle=':', linewidth=2, label='Objetivo')
+
+    ax4.set_title('Distribución de Calidad - Últimos 100 Lotes', fontsize=14, fontweight='bold')
+    ax4.set_xlabel('Densidad (g/cc)')
+    ax4.set_ylabel('Frecuencia')
+    ax4.legend()
+    ax4.grid(True, alpha=0.3)
+
+    # === PANEL 5: Tendencia de Capacidad ===
+    ax5 = fig.add_subplot(gs[1, 2:])
+
+    artistas['cpk'], = ax5.plot(datos['fechas'], datos['cpk'], 'o-', color='#FF6B35', linewidth=2, markersize=4)
+    ax5.axhline(1.33, color='green', linestyle='--', linewidth=2, alpha=0.7, label='Objetivo Cpk ≥ 1.33')
+    ax5.axhline(1.0, color='orange', linestyle='--', linewidth=2, alpha=0.7, label='Mínimo Aceptable')
+
+    ax5.set_title('Evolución de la Capacidad del Proceso (Cpk)', fontsize=14, fontweight='bold')
+    ax5.set_ylabel('Índice Cpk')
+    ax5.grid(True, alpha=0.3)
+    ax5.legend()
+    ax5.xaxis.set_major_formatter(mdates.DateFormatter('%d/%m'))
+    ax5.xaxis.set_major_locator(mdates.DayLocator(interval=5))
+
+    # === PANEL 6: Alertas y Notificaciones ===
+    ax6 = fig.add_subplot(gs[2, :2])
+    ax6.axis('off')
+
+    ax6.text(0.5, 0.95, 'Registro de Alertas del Turno', ha='center', va='top',
+             fontsize=14, fontweight='bold')
+
+    # Cuatro huecos fijos; las alertas más recientes primero
+    artistas['alertas'] = []
+    alertas = list(datos['alertas'])[:4]
+    for i in range(4):
+        y_pos = 0.8 - i * 0.15
+        icono, hora, mensaje = alertas[i] if i < len(alertas) else ('', '', '')
+        cabecera = ax6.text(0.05, y_pos, f'{icono} {hora}', fontsize=12, fontweight='bold')
+        texto = ax6.text(0.2, y_pos, mensaje, fontsize=11, color=COLORES_ALERTA.get(icono, 'black'))
+        artistas['alertas'].append((cabecera, texto))
+
+    ax6.set_xlim(0, 1)
+    ax6.set_ylim(0, 1)
+
+    # === PANEL 7: Métricas de Producción ===
+    ax7 = fig.add_subplot(gs[2, 2:])
+
+    # Datos de producción por turno
+    turnos = datos['turnos']
+    produccion = datos['produccion']
+    conformidad_turno = datos['conformidad_turno']
+
+    # Crear gráfico combinado
+    ax7_twin = ax7.twinx()
+
+    # Barras de producción
+    bars = ax7.bar(turnos, produccion, alpha=0.7, color='#2E86AB', label='Lotes Producidos')
+    artistas['produccion'] = bars
+    ax7.set_ylabel('Lotes Producidos', color='#2E86AB', fontsize=12)
+    ax7.tick_params(axis='y', labelcolor='#2E86AB')
+
+    # Línea de conformidad
+    line = ax7_twin.plot(turnos, conformidad_turno, 'o-', color='#FF6B35',
+                         linewidth=3, markersize=8, label='% Conformidad')
+    ax7_twin.set_ylabel('Conformidad (%)', color='#FF6B35', fontsize=12)
+    ax7_twin.tick_params(axis='y', labelcolor='#FF6B35')
+    ax7_twin.set_ylim(min(98, np.floor(np.nanmin(np.r_[100, conformidad_turno]))), 100)
+    artistas['conformidad_turno'] = line[0]
+
+    # Añadir valores en las barras
+    artistas['produccion_textos'] = []
+    for bar, conf in zip(bars, conformidad_turno):
+        height = bar.get_height()
+        artistas['produccion_textos'].append(
+            ax7.text(bar.get_x() + bar.get_width()/2., height + 2,
+                     f'{int(height)}', ha='center', va='bottom', fontweight='bold'))
+
+    ax7.set_title('Producción y Conformidad por Turno', fontsize=14, fontweight='bold')
+    ax7.grid(True, alpha=0.3)
+
+    # Añadir línea de referencia para conformidad objetivo
+    ax7_twin.axhline(99.0, color='red', linestyle='--', alpha=0.7, label='Objetivo 99%')
+
+    # === Panel de información del sistema ===
+    fig.text(0.02, 0.02, TEXTO_INFO, fontsize=10, style='italic',
+             bbox=dict(boxstyle="round,pad=0.3", facecolor="lightgray", alpha=0.8))
+    # La hora, abajo a la derecha: su región no se solapa con la de las
+    # alertas, así que refrescarla no obliga a redibujarlas
+    artistas['actualizacion'] = fig.text(0.98, 0.02, texto_actualizacion(datos['ahora']),
+                                         fontsize=10, style='italic', ha='right')
+
+    return fig, artistas
+
+def poblar_almacen(almacen, datos):
+    """Guarda en el almacén las series simuladas de ``generar_datos``
+
+    - ``densidad``: lecturas horarias de densidad.
+    - ``densidad_lote``: densidad de cada lote (un lote cada 10 minutos).
+    - ``cpk``: Cpk diario.
+    """
+    almacen.anadir('densidad', datos['tiempo'], datos['densidad'])
+    n = len(datos['datos_recientes'])
+    tiempos_lote = [datos['ahora'] - timedelta(minutes=10 * (n - i)) for i in range(n)]
+    almacen.anadir('densidad_lote', tiempos_lote, datos['datos_recientes'], lotes=np.arange(n))
+    almacen.anadir('cpk', datos['fechas'], datos['cpk'])
+
+def datos_desde_almacen(almacen, ahora=None, hasta_ahora=False):
+    """Datos del dashboard con las series leídas del almacén de mediciones
+
+    Últimas 24 horas de densidad, últimos 100 lotes y Cpk de los últimos 30
+    días son consultas al almacén y las alertas salen de esa densidad; KPIs
+    y turnos siguen siendo los de ``generar_datos``. Por defecto ``ahora``
+    es la última lectura de densidad guardada.
+    """
+    if ahora is None:
+        ultima, _ = almacen.ultimos('densidad', 1)
+        ahora = ultima[-1].astype('datetime64[us]').tolist() if len(ultima) else datetime.now()
+    datos = generar_datos(ahora, hasta_ahora)
+    tiempo, densidad = almacen.ultimas_horas('densidad', 24, ahora)
+    _, recientes, _ = almacen.ultimos_lotes('densidad_lote', 100)
+    fechas, cpk = almacen.dias('cpk', ahora - timedelta(days=30), ahora)
+    datos.update(tiempo=tiempo.astype('datetime64[us]').tolist(), densidad=np.asarray(densidad),
+                 datos_recientes=np.asarray(recientes),
+                 fechas=fechas.astype('datetime64[us]').tolist(), cpk=np.asarray(cpk))
+    datos['alertas'] = registro_alertas(datos['tiempo'], datos['densidad'])
+    return datos
+
+def abrir_almacen(directorio, ahora=None):
+    """Abre un almacén; si está vacío lo llena con los datos simulados"""
+    almacen = AlmacenMediciones(directorio)
+    if 'densidad' not in almacen.etiquetas():
+        poblar_almacen(almacen, generar_datos(ahora))
+    return almacen
+
+def crear_dashboard_digital(almacen=None, ahora=None, hasta_ahora=False):
+    """Crea el dashboard digital de siete paneles y devuelve la figura
+
+    Sin ``almacen`` los datos se simulan; con él, las series se consultan.
+    ``hasta_ahora``: producción del día solo hasta ``ahora`` (ver ``generar_datos``).
+    """
+    datos = (generar_datos(ahora, hasta_ahora) if almacen is None
+             else datos_desde_almacen(almacen, ahora, hasta_ahora))
+    fig, _ = construir_dashboard(datos)
+    return fig
+
+class SimuladorDashboard:
+    """Genera lecturas nuevas para el modo en vivo a partir de los datos iniciales
+
+    El Cpk no se recalcula desde cero en cada paso: dos ventanas deslizantes
+    (``CpkMovil``) se actualizan con cada lectura, una de 7 días sobre la
+    densidad horaria para la tendencia y otra de los últimos 100 lotes para
+    el KPI. La producción por turno tampoco: los lotes de cada paso se suman
+    a los conteos de un ``AgregadorProduccion``.
+    """
+
+    def __init__(self, datos, paso=timedelta(hours=1), semilla=None):
+        self.rng = np.random.default_rng(semilla)
+        self.paso = paso
+        self.datos = dict(datos)
+        self.datos['tiempo'] = list(datos['tiempo'])
+        self.datos['densidad'] = np.array(datos['densidad'])
+        self.datos['datos_recientes'] = np.array(datos['datos_recientes'])
+        self.datos['fechas'] = list(datos['fechas'])
+        self.datos['cpk'] = np.array(datos['cpk'])
+        self.datos['alertas'] = list(datos['alertas'])
+        self.fase = 0.0
+
+        # Fin del último día cerrado de la tendencia
+        self.cierre = self.datos['fechas'][-1]
+        self.cpk_dias = CpkMovil(1, LSL, USL, duracion=VENTANA_CPK)
+        for t, valor in zip(datos['tiempo_historico'], datos['densidad_historico']):
+            self.cpk_dias.anadir([valor], t)
+        self.cpk_lotes = CpkMovil(1, LSL, USL, ventana=LOTES_CPK)
+        for valor in self.datos['datos_recientes'][-LOTES_CPK:]:
+            self.cpk_lotes.anadir([valor])
+        # Los lotes nuevos de cada paso se suman a los conteos por turno
+        self.produccion = AgregadorProduccion(N_LINEAS).anadir(*datos['lotes'])
+
+    def tick(self):
+        """Avanza un paso: nueva densidad, nuevo lote y KPIs recalculados"""
+        d = self.datos
+        self.fase += 0.5
+        ahora = d['tiempo'][-1] + self.paso
+        lectura = 1.00 + 0.008 * np.sin(self.fase) + self.rng.normal(0, 0.003)
+        lote = self.rng.normal(1.00, 0.005)
+        # Ventana deslizante de tamaño fijo
+        d['tiempo'] = d['tiempo'][1:] + [ahora]
+        d['densidad'] = np.append(d['densidad'][1:], lectura)
+        d['datos_recientes'] = np.append(d['datos_recientes'][1:], lote)
+        d['ahora'] = ahora
+
+        # Tendencia: tras cada cierre de día se abre un punto nuevo (sale el
+        # primero) que sigue el Cpk de los 7 días hasta ahora hasta el cierre
+        self.cpk_dias.anadir([lectura], ahora)
+        cpk_dias = self.cpk_dias.indices()['cpk'][0]
+        if d['fechas'][-1] == self.cierre:
+            d['fechas'] = d['fechas'][1:] + [ahora]
+            d['cpk'] = np.append(d['cpk'][1:], cpk_dias)
+        else:
+            d['fechas'] = d['fechas'][:-1] + [ahora]
+            d['cpk'] = d['cpk'].copy()
+            d['cpk'][-1] = cpk_dias
+        if ahora >= self.cierre + timedelta(days=1):
+            self.cierre = ahora
+
+        self.cpk_lotes.anadir([lote])
+        cpk = self.cpk_lotes.indices()['cpk'][0]
+        self.produccion.anadir(*simular_lotes(ahora - self.paso, ahora, generador=self.rng))
+        produccion = resumen_produccion(self.produccion, ahora)
+        d['kpis'] = [('Cpk Actual', f'{cpk:.2f}', '#28A745',
+                      'EXCELENTE' if cpk >= 1.33 else 'MEJORABLE')] + produccion.pop('kpis')
+        d.update(produccion)
+        # Reglas sobre los últimos puntos (el patrón más largo es de 8); solo
+        # cuentan las alertas que empiezan en la lectura nueva
+        nuevas = alertas_densidad(d['tiempo'][-VENTANA_REGLAS:], d['densidad'][-VENTANA_REGLAS:],
+                                  desde=VENTANA_REGLAS - 1)
+        if nuevas:
+            d['alertas'] = (nuevas + d['alertas'])[:4]
+        return d
+
+class DashboardEnVivo:
+    """Dashboard que se crea una vez y en cada tick solo redibuja lo que cambia
+
+    Lo estático (marcos, títulos, cuadros de KPI, líneas de referencia,
+    leyendas con ``loc='best'`` incluidas) se rasteriza una vez por
+    disposición en una ``CapaEstatica``; cada actualización solo restaura y
+    redibuja las regiones de los grupos de artistas dinámicos (un panel) que
+    han cambiado y las copia a pantalla (blitting). Solo se hace un dibujo
+    completo cuando los datos se salen de los ejes o un artista crece fuera
+    de su región.
+    """
+
+    def __init__(self, datos, dpi=None):
+        self.fig, self.artistas = construir_dashboard(datos, dpi=dpi)
+        self.canvas = self.fig.canvas
+        self.capa = CapaEstatica(self.fig, self.grupos)
+        self._dejar_holgura()
+
+    def _dejar_holgura(self):
+        """Amplía los ejes que crecen en vivo para no forzar dibujos completos
+
+        Densidad hasta ±2 veces la distancia a los límites de control, un
+        turno entero de lotes (con margen), conformidad desde el 95% y tres
+        días más de tendencia de Cpk. Solo en vivo: la figura exportada
+        conserva sus límites.
+        """
+        a = self.artistas
+        ax1 = a['densidad'].axes
+        y0, y1 = ax1.get_ylim()
+        ax1.set_ylim(min(y0, CL - 2 * (UCL - CL)), max(y1, CL + 2 * (UCL - CL)))
+        ax7 = a['produccion'][0].axes
+        ax7.set_ylim(0, max(ax7.get_ylim()[1], LOTES_TURNO * 1.25))
+        ax7_twin = a['conformidad_turno'].axes
+        ax7_twin.set_ylim(min(ax7_twin.get_ylim()[0], 95), 100)
+        ax5 = a['cpk'].axes
+        x0, x1 = ax5.get_xlim()
+        ax5.set_xlim(x0, x1 + 3)
+
+    @property
+    def redibujados(self):
+        """Dibujos completos hechos (fondo rasterizado de nuevo)"""
+        return self.capa.redibujados
+
+    def grupos(self):
+        """Artistas dinámicos agrupados por la región que ocupan"""
+        a = self.artistas
+        return {
+            'densidad': [a['densidad'], a['actual_punto'], a['actual_anotacion']],
+            'histograma': list(a['histograma']),
+            'cpk': [a['cpk']],
+            'kpis': a['kpi_valores'] + a['kpi_estados'],
+            'alertas': [texto for par in a['alertas'] for texto in par],
+            'actualizacion': [a['actualizacion']],
+            'produccion': list(a['produccion']) + [a['conformidad_turno']] + a['produccion_textos'],
+        }
+
+    def _fuera_de_ejes(self, ax, x, y):
+        """Comprueba si los puntos caen fuera de los límites actuales del eje"""
+        x0, x1 = ax.get_xlim()
+        y0, y1 = ax.get_ylim()
+        return np.any((x < x0) | (x > x1) | (y < y0) | (y > y1))
+
+    def actualizar(self, datos):
+        """Aplica datos nuevos a los artistas dinámicos y refresca la pantalla"""
+        a = self.artistas
+        cambiados = {'densidad', 'histograma', 'cpk'}
+
+        def poner_texto(texto, valor, grupo, color=None):
+            if texto.get_text() != valor or (color is not None and texto.get_color() != color):
+                texto.set_text(valor)
+                if color is not None:
+                    texto.set_color(color)
+                cambiados.add(grupo)
+
+        t = horas_hasta_ultima(datos['tiempo'])
+        densidad = np.asarray(datos['densidad'])
+        visibles = densidad_visible(t, densidad, a['columnas_densidad'])
+        a['densidad'].set_data(t[visibles], densidad[visibles])
+        a['actual_punto'].set_offsets([[t[-1], densidad[-1]]])
+        anotacion = a['actual_anotacion']
+        anotacion.set_text(f'ACTUAL:\n{densidad[-1]:.3f} g/cc')
+        anotacion.xy = (t[-1], densidad[-1])
+        anotacion.set_position((t[-1], densidad[-1] + 0.008))
+
+        conteos = histograma_lotes(datos['datos_recientes']).conteos_bins
+        alturas = actualizar_histograma(a['histograma'], conteos, a['histograma_bordes'],
+                                        lsl=LSL, usl=USL)
+
+        fechas = mdates.date2num(datos['fechas'])
+        a['cpk'].set_data(fechas, datos['cpk'])
+
+        for (metric, value, color, status), texto, estado in zip(datos['kpis'], a['kpi_valores'],
+                                                                 a['kpi_estados']):
+            poner_texto(texto, f'{metric}\n{value}', 'kpis')
+            poner_texto(estado, status, 'kpis')
+        alertas = list(datos['alertas'])[:4]
+        for i, (cabecera, texto) in enumerate(a['alertas']):
+            icono, hora, mensaje = alertas[i] if i < len(alertas) else ('', '', '')
+            poner_texto(cabecera, f'{icono} {hora}', 'alertas')
+            poner_texto(texto, mensaje, 'alertas', COLORES_ALERTA.get(icono, 'black'))
+        poner_texto(a['actualizacion'], texto_actualizacion(datos['ahora']), 'actualizacion')
+
+        produccion = np.asarray(datos['produccion'])
+        conformidad_turno = np.asarray(datos['conformidad_turno'], dtype=float)
+        if not (np.array_equal([b.get_height() for b in a['produccion']], produccion)
+                and np.array_equal(a['conformidad_turno'].get_ydata(), conformidad_turno,
+                                   equal_nan=True)):
+            for barra, texto, lotes in zip(a['produccion'], a['produccion_textos'], produccion):
+                barra.set_height(lotes)
+                texto.set_y(lotes + 2)
+                texto.set_text(f'{int(lotes)}')
+            a['conformidad_turno'].set_ydata(conformidad_turno)
+            cambiados.add('produccion')
+
+        # Reajustar ejes solo si hace falta; eso invalida el fondo guardado
+        ax1 = a['densidad'].axes
+        ax4 = a['histograma'][0].axes
+        ax5 = a['cpk'].axes
+        completo = False
+        if self._fuera_de_ejes(ax1, t, densidad):
+            # El eje x es fijo (horas hasta la última lectura); solo crece el
+            # y, con holgura para que el siguiente extremo no obligue a redibujar
+            y0, y1 = ax1.get_ylim()
+            holgura = (y1 - y0) * 0.1
+            ax1.set_ylim(min(y0, densidad.min() - holgura), max(y1, densidad.max() + holgura))
+            completo = True
+        if alturas.max(initial=0) > ax4.get_ylim()[1]:
+            ax4.set_ylim(0, alturas.max() * 1.25)
+            completo = True
+        if self._fuera_de_ejes(ax5, fechas, np.asarray(datos['cpk'])):
+            ax5.relim()
+            ax5.autoscale_view()
+            # Hueco de unos días a la derecha: la tendencia avanza con cada tick
+            x0, x1 = ax5.get_xlim()
+            ax5.set_xlim(x0, x1 + 3)
+            completo = True
+        ax7 = a['produccion'][0].axes
+        ax7_twin = a['conformidad_turno'].axes
+        if produccion.max() + 2 > ax7.get_ylim()[1]:
+            # Hueco para que el turno en curso crezca sin redibujar en cada lote
+            ax7.set_ylim(0, produccion.max() * 1.25)
+            completo = True
+        if np.nanmin(np.r_[100, conformidad_turno]) < ax7_twin.get_ylim()[0]:
+            # Un punto de holgura para que la siguiente bajada no obligue a redibujar
+            ax7_twin.set_ylim(np.floor(np.nanmin(conformidad_turno)) - 1, 100)
+            completo = True
+        self.capa.refrescar(cambiados, completo)
+
+def ejecutar_en_vivo(intervalo_ms=1000, almacen=None):
+    """Muestra el dashboard en una ventana y lo actualiza periódicamente"""
+    datos = (generar_datos(hasta_ahora=True) if almacen is None
+             else datos_desde_almacen(almacen, hasta_ahora=True))
+    simulador = SimuladorDashboard(datos)
+    tablero = DashboardEnVivo(datos)
+    temporizador = tablero.fig.canvas.new_timer(interval=intervalo_ms)
+    temporizador.add_callback(lambda: tablero.actualizar(simulador.tick()))
+    temporizador.start()
+    plt.show()
+
+def medir_refresco(ticks=50, dpi=100):
+    """Mide la latencia media de refresco (en ms) del modo en vivo"""
+    datos = generar_datos(hasta_ahora=True)
+    simulador = SimuladorDashboard(datos, semilla=0)
+    tablero = DashboardEnVivo(datos, dpi=dpi)
+    inicio = time.perf_counter()
+    tablero.canvas.draw()
+    primer_dibujo = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    for _ in range(ticks):
+        tablero.actualizar(simulador.tick())
+    refresco = (time.perf_counter() - inicio) / ticks
+    plt.close(tablero.fig)
+    return {'dibujo_completo_ms': primer_dibujo * 1000, 'refresco_ms': refresco * 1000,
+            'redibujados_completos': tablero.redibujados}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Dashboard digital de control de calidad")
+    parser.add_argument('--en-vivo', action='store_true', help="mostrar el dashboard actualizándose")
+    parser.add_argument('--almacen', help="directorio del almacén de mediciones "
+                                          "(si está vacío se llena con datos simulados)")
+    args = parser.parse_args()
+    almacen = abrir_almacen(args.almacen) if args.almacen else None
+    if args.en_vivo:
+        ejecutar_en_vivo(almacen=almacen)
+    else:
+        fig = crear_dashboard_digital(almacen)
+        exportar_figura(fig, 'dashboard_digital')
+        print("Dashboard digital guardado como 'dashboard_digital.png' y '.pdf'")
+        plt.show()
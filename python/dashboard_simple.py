@@ -1,122 +1,295 @@
+import argparse
+
 import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.patches as patches
 from datetime import datetime, timedelta
+from capa_estatica import CapaEstatica
+from exportacion import exportar_figura
+from almacen import AlmacenMediciones
+from produccion import (AgregadorProduccion, ETIQUETAS_TURNOS, LOTES_TURNO, N_LINEAS,
+                        formato_porcentaje, simular_lotes)
+
+# Ventana del panel de densidad
+HORAS = 12
+
+def densidad_almacen(almacen, ahora=None):
+    """Últimas ``HORAS`` de densidad del almacén: (horas desde el inicio, valores, instante final)
+
+    Devuelve None si no hay lecturas en la ventana.
+    """
+    if ahora is None:
+        ultimas, _ = almacen.ultimos('densidad', 1)
+        if not len(ultimas):
+            return None
+        ahora = ultimas[-1]
+    instantes, densidad = almacen.ultimas_horas('densidad', HORAS, ahora)
+    if not len(instantes):
+        return None
+    # Horas transcurridas desde el inicio de la ventana
+    tiempo = (instantes - instantes[0]) / np.timedelta64(1, 'h')
+    return tiempo, densidad, ahora
+
+def crear_dashboard_simple(almacen=None, ahora=None, hasta_ahora=False):
+    """Crea el dashboard simple de cuatro paneles y devuelve la figura
+
+    Con un ``almacen`` (ver almacen.py) el panel de densidad muestra las
+    últimas 12 horas de la etiqueta ``densidad`` hasta ``ahora`` (por
+    defecto, la última lectura guardada) en lugar de datos simulados. La
+    producción por turno es la del día completo o, con ``hasta_ahora``
+    (modo en vivo y servidor), la de hoy hasta ``ahora``.
+    """
+    return construir_dashboard_simple(almacen, ahora, hasta_ahora)[0]
+
+def construir_dashboard_simple(almacen=None, ahora=None, hasta_ahora=False):
+    """Crea la figura del dashboard simple y devuelve (fig, artistas dinámicos)
+
+    El diccionario incluye también ``agregador``, los conteos de lotes del
+    día, para que el modo en vivo siga sumando lotes.
+    """
+    # Configurar semilla para reproducibilidad
+    np.random.seed(42)
+
+    # Crear figura del dashboard
+    fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(16, 12))
+    fig.suptitle('Dashboard Digital - Sistema de Control de Calidad Industrial',
+                 fontsize=18, fontweight='bold')
+
+    # === PANEL 1: Gráfico de Control en Tiempo Real ===
+    # Simular datos de las últimas 12 horas
+    tiempo = list(range(HORAS))
+    densidad = 1.00 + 0.005 * np.sin(np.linspace(0, 2*np.pi, HORAS)) + np.random.normal(0, 0.002, HORAS)
+    leidas = densidad_almacen(almacen, ahora) if almacen is not None else None
+    if leidas is not None:
+        tiempo, densidad, ahora = leidas
+    ahora = np.datetime64(datetime.now() if ahora is None else ahora, 'ms')
+
+    # Lotes del día (completo o hasta ahora), agregados por turno y línea
+    dia = ahora.astype('datetime64[D]')
+    hasta = ahora if hasta_ahora else dia + np.timedelta64(1, 'D')
+    agregador = AgregadorProduccion(N_LINEAS).anadir(*simular_lotes(dia, hasta))
+    produccion = agregador.resumen_dia(dia)
+
+    linea_densidad, = ax1.plot(tiempo, densidad, 'o-', color='#2E86AB', linewidth=2, markersize=6)
+    ax1.axhline(1.00, color='green', linewidth=2, label='LC (1.000)')
+    ax1.axhline(1.008, color='red', linestyle='--', linewidth=2, label='UCL')
+    ax1.axhline(0.992, color='red', linestyle='--', linewidth=2, label='LCL')
+
+    ax1.set_title('Control de Densidad - Tiempo Real', fontsize=14, fontweight='bold')
+    ax1.set_xlabel('Tiempo (horas)')
+    ax1.set_ylabel('Densidad (g/cc)')
+    ax1.grid(True, alpha=0.3)
+    ax1.legend()
+
+    # === PANEL 2: Indicadores KPI ===
+    ax2.axis('off')
+
+    # Simular KPIs actuales
+    kpi_data = [
+        ('Cpk Actual', '1.42', 'EXCELENTE'),
+        ('Conformidad', formato_porcentaje(produccion['conformidad_dia']), 'OBJETIVO: 99.5%'),
+        ('Lotes Procesados', f"{produccion['lotes_dia']}", 'HOY'),
+        ('Eficiencia', '94.5%', 'META: 95%')
+    ]
+
+    colors = ['#28A745', '#FFC107', '#17A2B8', '#6F42C1']
+    kpi_valores = []
+
+    for i, ((metric, value, status), color) in enumerate(zip(kpi_data, colors)):
+        y_pos = 0.85 - i * 0.2
+
+        # Cuadro de fondo
+        rect = patches.Rectangle((0.05, y_pos-0.08), 0.9, 0.12,
+                               linewidth=2, edgecolor=color, facecolor=color, alpha=0.1)
+        ax2.add_patch(rect)
+
+        # Texto principal
+        ax2.text(0.1, y_pos, metric, fontsize=12, fontweight='bold')
+        kpi_valores.append(ax2.text(0.8, y_pos, value, fontsize=14, fontweight='bold',
+                                    color=color, ha='right'))
+        ax2.text(0.5, y_pos-0.04, status, fontsize=10, style='italic', ha='center')
+
+    ax2.set_xlim(0, 1)
+    ax2.set_ylim(0, 1)
+    ax2.set_title('Indicadores Clave de Rendimiento', fontsize=14, fontweight='bold')
+
+    # === PANEL 3: Estado de Equipos ===
+    ax3.axis('off')
+
+    equipos = [
+        ('Reactor Principal', 'OPERATIVO', '#28A745'),
+        ('Sensor pH-01', 'OPERATIVO', '#28A745'),
+        ('Bomba Dosificadora', 'MANTENIMIENTO', '#FFC107'),
+        ('Mezclador A', 'OPERATIVO', '#28A745'),
+        ('Sistema Filtrado', 'OPERATIVO', '#28A745'),
+        ('Válvula Control', 'WARNING', '#FF6B35')
+    ]
+
+    ax3.set_title('Estado de Equipos Críticos', fontsize=14, fontweight='bold')
+
+    for i, (equipo, estado, color) in enumerate(equipos):
+        y_pos = 0.9 - i * 0.13
+
+        # Indicador circular
+        circle = patches.Circle((0.1, y_pos), 0.03, color=color, alpha=0.8)
+        ax3.add_patch(circle)
+
+        # Texto del equipo
+        ax3.text(0.18, y_pos + 0.02, equipo, fontsize=11, fontweight='bold')
+        ax3.text(0.18, y_pos - 0.02, estado, fontsize=10, color=color, style='italic')
+
+    ax3.set_xlim(0, 1)
+    ax3.set_ylim(0, 1)
+
+    # === PANEL 4: Producción por Turno ===
+    turnos = list(ETIQUETAS_TURNOS)
+    conformidad = produccion['conformidad_turno']
+
+    # Crear gráfico combinado
+    ax4_twin = ax4.twinx()
+
+    # Barras de producción
+    bars = ax4.bar(turnos, produccion['lotes_turno'], alpha=0.7, color='#2E86AB', label='Lotes')
+    ax4.set_ylabel('Lotes Producidos', color='#2E86AB')
+    if not produccion['lotes_dia']:
+        # Sin lotes (recién empezado el día) la escala automática no deja sitio a las etiquetas
+        ax4.set_ylim(0, LOTES_TURNO)
+
+    # Línea de conformidad
+    linea_conformidad, = ax4_twin.plot(turnos, conformidad, 'o-', color='#FF6B35',
+                         linewidth=3, markersize=8, label='% Conformidad')
+    ax4_twin.set_ylabel('Conformidad (%)', color='#FF6B35')
+    ax4_twin.set_ylim(min(98, np.floor(np.nanmin(np.r_[100, conformidad]))), 100)
+
+    # Añadir valores
+    textos_lotes = [ax4.text(bar.get_x() + bar.get_width()/2., bar.get_height() + 2,
+                             f'{int(bar.get_height())}', ha='center', fontweight='bold')
+                    for bar in bars]
+
+    ax4.set_title('Producción y Conformidad por Turno', fontsize=14, fontweight='bold')
+    ax4.grid(True, alpha=0.3)
+
+    # Línea objetivo
+    ax4_twin.axhline(99.0, color='red', linestyle='--', alpha=0.7)
+
+    fig.tight_layout()
+    return fig, {'densidad': linea_densidad, 'kpi_valores': kpi_valores,
+                 'produccion': list(bars), 'produccion_textos': textos_lotes,
+                 'conformidad_turno': linea_conformidad, 'agregador': agregador}
+
+class DashboardSimpleEnVivo:
+    """Dashboard simple que relee el almacén y solo redibuja lo que cambia
+
+    Marcos, títulos, cuadros de KPI, indicadores de equipos y líneas de
+    referencia forman la capa estática (ver capa_estatica.py), que se
+    rasteriza una vez por tamaño y resolución. Son dinámicos la línea de
+    densidad, los valores de los KPI y el panel de producción, al que se
+    suman los lotes simulados desde la lectura anterior. Si no han llegado
+    lecturas nuevas, ``actualizar`` no dibuja nada.
+    """
+
+    def __init__(self, almacen, dpi=None, semilla=None):
+        self.almacen = almacen
+        self.fig, self.artistas = construir_dashboard_simple(almacen, hasta_ahora=True)
+        if dpi is not None:
+            self.fig.set_dpi(dpi)
+        self.canvas = self.fig.canvas
+        self.capa = CapaEstatica(self.fig, self.grupos)
+        self.rng = np.random.default_rng(semilla)
+        # Instante hasta el que se han contado lotes (la última lectura o, sin lecturas, ahora)
+        leidas = densidad_almacen(almacen)
+        self.ultimo = np.datetime64(datetime.now() if leidas is None else leidas[2], 'ms')
+
+    def grupos(self):
+        """Artistas dinámicos agrupados por la región que ocupan"""
+        a = self.artistas
+        return {
+            'densidad': [a['densidad']],
+            'kpis': list(a['kpi_valores']),
+            'produccion': a['produccion'] + a['produccion_textos'] + [a['conformidad_turno']],
+        }
+
+    def _actualizar_produccion(self, ahora):
+        """Suma los lotes desde la lectura anterior; devuelve (grupos cambiados, completo)"""
+        a = self.artistas
+        a['agregador'].anadir(*simular_lotes(self.ultimo, ahora, generador=self.rng))
+        produccion = a['agregador'].resumen_dia(ahora.astype('datetime64[D]'))
+        cambiados = set()
+        valores = {1: formato_porcentaje(produccion['conformidad_dia']), 2: f"{produccion['lotes_dia']}"}
+        for i, valor in valores.items():
+            if a['kpi_valores'][i].get_text() != valor:
+                a['kpi_valores'][i].set_text(valor)
+                cambiados.add('kpis')
+
+        lotes = produccion['lotes_turno']
+        conformidad = produccion['conformidad_turno']
+        if np.array_equal([b.get_height() for b in a['produccion']], lotes):
+            return cambiados, False
+        for barra, texto, n in zip(a['produccion'], a['produccion_textos'], lotes):
+            barra.set_height(n)
+            texto.set_y(n + 2)
+            texto.set_text(f'{int(n)}')
+        a['conformidad_turno'].set_ydata(conformidad)
+        cambiados.add('produccion')
+        # Ejes con holgura para que el turno en curso crezca sin redibujar en cada lectura
+        ax, ax_conformidad = a['produccion'][0].axes, a['conformidad_turno'].axes
+        completo = False
+        if lotes.max() + 2 > ax.get_ylim()[1]:
+            ax.set_ylim(0, lotes.max() * 1.25)
+            completo = True
+        if np.nanmin(np.r_[100, conformidad]) < ax_conformidad.get_ylim()[0]:
+            ax_conformidad.set_ylim(np.floor(np.nanmin(conformidad)) - 1, 100)
+            completo = True
+        return cambiados, completo
+
+    def actualizar(self, ahora=None):
+        """Lee las últimas horas del almacén y refresca densidad, KPIs y producción"""
+        leidas = densidad_almacen(self.almacen, ahora)
+        if leidas is None:
+            return
+        tiempo, densidad, ahora = leidas
+        ahora = np.datetime64(ahora, 'ms')
+        if ahora == self.ultimo:
+            return
+        cambiados, completo = self._actualizar_produccion(ahora)
+        self.ultimo = ahora
+        linea = self.artistas['densidad']
+        linea.set_data(tiempo, densidad)
+        ax = linea.axes
+        (x0, x1), (y0, y1) = ax.get_xlim(), ax.get_ylim()
+        if np.any((tiempo < x0) | (tiempo > x1) | (densidad < y0) | (densidad > y1)):
+            ax.relim()
+            ax.autoscale_view()
+            completo = True
+        self.capa.refrescar(cambiados | {'densidad'}, completo)
+
+def ejecutar_en_vivo(almacen, intervalo_ms=1000):
+    """Muestra el dashboard simple y lo actualiza con las lecturas nuevas del almacén"""
+    tablero = DashboardSimpleEnVivo(almacen)
+    temporizador = tablero.fig.canvas.new_timer(interval=intervalo_ms)
+    temporizador.add_callback(tablero.actualizar)
+    temporizador.start()
+    plt.show()
 
-# Configurar semilla para reproducibilidad
-np.random.seed(42)
-
-# Crear figura del dashboard
-fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(16, 12))
-fig.suptitle('Dashboard Digital - Sistema de Control de Calidad Industrial', 
-             fontsize=18, fontweight='bold')
-
-# === PANEL 1: Gráfico de Control en Tiempo Real ===
-# Simular datos de las últimas 12 horas
-horas = 12
-tiempo = list(range(horas))
-densidad = 1.00 + 0.005 * np.sin(np.linspace(0, 2*np.pi, horas)) + np.random.normal(0, 0.002, horas)
-
-ax1.plot(tiempo, densidad, 'o-', color='#2E86AB', linewidth=2, markersize=6)
-ax1.axhline(1.00, color='green', linewidth=2, label='LC (1.000)')
-ax1.axhline(1.008, color='red', linestyle='--', linewidth=2, label='UCL')
-ax1.axhline(0.992, color='red', linestyle='--', linewidth=2, label='LCL')
-
-ax1.set_title('Control de Densidad - Tiempo Real', fontsize=14, fontweight='bold')
-ax1.set_xlabel('Tiempo (horas)')
-ax1.set_ylabel('Densidad (g/cc)')
-ax1.grid(True, alpha=0.3)
-ax1.legend()
-
-# === PANEL 2: Indicadores KPI ===
-ax2.axis('off')
-
-# Simular KPIs actuales
-kpi_data = [
-    ('Cpk Actual', '1.42', 'EXCELENTE'),
-    ('Conformidad', '99.1%', 'OBJETIVO: 99.5%'),
-    ('Lotes Procesados', '18', 'HOY'),
-    ('Eficiencia', '94.5%', 'META: 95%')
-]
-
-colors = ['#28A745', '#FFC107', '#17A2B8', '#6F42C1']
-
-for i, ((metric, value, status), color) in enumerate(zip(kpi_data, colors)):
-    y_pos = 0.85 - i * 0.2
-    
-    # Cuadro de fondo
-    rect = patches.Rectangle((0.05, y_pos-0.08), 0.9, 0.12, 
-                           linewidth=2, edgecolor=color, facecolor=color, alpha=0.1)
-    ax2.add_patch(rect)
-    
-    # Texto principal
-    ax2.text(0.1, y_pos, metric, fontsize=12, fontweight='bold')
-    ax2.text(0.8, y_pos, value, fontsize=14, fontweight='bold', color=color, ha='right')
-    ax2.text(0.5, y_pos-0.04, status, fontsize=10, style='italic', ha='center')
-
-ax2.set_xlim(0, 1)
-ax2.set_ylim(0, 1)
-ax2.set_title('Indicadores Clave de Rendimiento', fontsize=14, fontweight='bold')
-
-# === PANEL 3: Estado de Equipos ===
-ax3.axis('off')
-
-equipos = [
-    ('Reactor Principal', 'OPERATIVO', '#28A745'),
-    ('Sensor pH-01', 'OPERATIVO', '#28A745'),
-    ('Bomba Dosificadora', 'MANTENIMIENTO', '#FFC107'),
-    ('Mezclador A', 'OPERATIVO', '#28A745'),
-    ('Sistema Filtrado', 'OPERATIVO', '#28A745'),
-    ('Válvula Control', 'WARNING', '#FF6B35')
-]
-
-ax3.set_title('Estado de Equipos Críticos', fontsize=14, fontweight='bold')
-
-for i, (equipo, estado, color) in enumerate(equipos):
-    y_pos = 0.9 - i * 0.13
-    
-    # Indicador circular
-    circle = patches.Circle((0.1, y_pos), 0.03, color=color, alpha=0.8)
-    ax3.add_patch(circle)
-    
-    # Texto del equipo
-    ax3.text(0.18, y_pos + 0.02, equipo, fontsize=11, fontweight='bold')
-    ax3.text(0.18, y_pos - 0.02, estado, fontsize=10, color=color, style='italic')
-
-ax3.set_xlim(0, 1)
-ax3.set_ylim(0, 1)
-
-# === PANEL 4: Producción por Turno ===
-turnos = ['Turno 1', 'Turno 2', 'Turno 3']
-produccion = [142, 158, 135]
-conformidad = [99.3, 98.7, 99.6]
-
-# Crear gráfico combinado
-ax4_twin = ax4.twinx()
-
-# Barras de producción
-bars = ax4.bar(turnos, produccion, alpha=0.7, color='#2E86AB', label='Lotes')
-ax4.set_ylabel('Lotes Producidos', color='#2E86AB')
-
-# Línea de conformidad
-line = ax4_twin.plot(turnos, conformidad, 'o-', color='#FF6B35', 
-                     linewidth=3, markersize=8, label='% Conformidad')
-ax4_twin.set_ylabel('Conformidad (%)', color='#FF6B35')
-ax4_twin.set_ylim(98, 100)
-
-# Añadir valores
-for bar, conf in zip(bars, conformidad):
-    ax4.text(bar.get_x() + bar.get_width()/2., bar.get_height() + 2,
-             f'{int(bar.get_height())}', ha='center', fontweight='bold')
-
-ax4.set_title('Producción y Conformidad por Turno', fontsize=14, fontweight='bold')
-ax4.grid(True, alpha=0.3)
-
-# Línea objetivo
-ax4_twin.axhline(99.0, color='red', linestyle='--', alpha=0.7)
-
-plt.tight_layout()
-plt.savefig('dashboard_simple.png', dpi=300, bbox_inches='tight')
-plt.savefig('dashboard_simple.pdf', bbox_inches='tight')
-print("Dashboard simple guardado como 'dashboard_simple.png' y '.pdf'")
-plt.show() 
\ No newline at end of file
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Dashboard simple de control de calidad")
+    parser.add_argument('--almacen', help="directorio del almacén de mediciones "
+                                          "(creado con dashboard_digital.py --almacen)")
+    parser.add_argument('--en-vivo', action='store_true',
+                        help="mostrar el dashboard releyendo el almacén cada segundo")
+    args = parser.parse_args()
+    if args.en_vivo and not args.almacen:
+        parser.error("--en-vivo necesita --almacen")
+    almacen = None
+    if args.almacen:
+        almacen = AlmacenMediciones(args.almacen)
+        if 'densidad' not in almacen.etiquetas():
+            parser.error(f"{args.almacen} no tiene lecturas de densidad; "
+                         "créalo con 'python dashboard_digital.py --almacen DIR'")
+    if args.en_vivo:
+        ejecutar_en_vivo(almacen)
+        raise SystemExit
+    fig = crear_dashboard_simple(almacen)
+    exportar_figura(fig, 'dashboard_simple')
+    print("Dashboard simple guardado como 'dashboard_simple.png' y '.pdf'")
+    plt.show()
@@ -0,0 +1,60 @@
+"""
+Reducción de series largas a los puntos que se distinguen en pantalla.
+
+Un gráfico de control de un mes a 1 Hz tiene millones de lecturas, pero el
+eje solo tiene unos miles de columnas de píxeles. Con el criterio M4, de
+cada columna basta dibujar la primera y la última lectura y la mínima y la
+máxima: la línea resultante cubre los mismos píxeles que la serie completa.
+Además se conservan siempre los puntos que se indiquen (fuera de los
+límites de control, reglas incumplidas...), para que ninguna alarma
+desaparezca del gráfico. Todo se calcula con NumPy, sin bucles por columna.
+"""
+
+import numpy as np
+
+
+def pixeles_eje(ax, dpi=None):
+    """Ancho del eje en píxeles a ``dpi`` (por defecto, la resolución de la figura)"""
+    figura = ax.figure
+    ancho = ax.get_position().width * figura.get_figwidth() * (dpi or figura.dpi)
+    return max(1, int(round(ancho)))
+
+
+def _primero_de_cada_tramo(posiciones, tramo):
+    """Primera de las ``posiciones`` (ordenadas) de cada tramo"""
+    tramos = tramo[posiciones]
+    return posiciones[np.r_[True, tramos[1:] != tramos[:-1]]]
+
+
+def decimar(x, y, columnas, conservar=None):
+    """Índices (ordenados) de los puntos a dibujar de la serie ``y`` frente a ``x``
+
+    Parámetros:
+    - x: posiciones ordenadas (números; las fechas, con ``mdates.date2num``).
+    - columnas: columnas de píxeles del eje (ver ``pixeles_eje``).
+    - conservar: máscara booleana de puntos que se dibujan siempre.
+
+    Si la serie tiene como mucho cuatro puntos por columna se devuelven
+    todos. Los NaN no cuentan como mínimo ni máximo.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n <= 4 * columnas:
+        return np.arange(n)
+
+    # Columna de cada punto y tramos de puntos consecutivos en la misma columna
+    escala = columnas / (x[-1] - x[0]) if x[-1] > x[0] else 0.0
+    columna = np.minimum(((x - x[0]) * escala).astype(np.intp), columnas - 1)
+    inicios = np.flatnonzero(np.r_[True, columna[1:] != columna[:-1]])
+    longitudes = np.diff(np.r_[inicios, n])
+    tramo = np.repeat(np.arange(len(inicios)), longitudes)
+
+    minimos = np.fmin.reduceat(y, inicios)
+    maximos = np.fmax.reduceat(y, inicios)
+    indices = [inicios, inicios + longitudes - 1,
+               _primero_de_cada_tramo(np.flatnonzero(y == minimos[tramo]), tramo),
+               _primero_de_cada_tramo(np.flatnonzero(y == maximos[tramo]), tramo)]
+    if conservar is not None:
+        indices.append(np.flatnonzero(conservar))
+    return np.unique(np.concatenate(indices))
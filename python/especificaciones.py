@@ -0,0 +1,120 @@
+"""
+Registro de especificaciones por producto × parámetro y conformidad de lotes.
+
+Los límites (LSL, USL) y el objetivo de cada parámetro de cada producto se
+guardan en matrices densas producto × parámetro, así que la conformidad de
+una matriz de mediciones lotes × parámetros se evalúa en una sola pasada
+vectorizada, sin una llamada por parámetro. El resultado pasa/no pasa de
+cada celda se devuelve empaquetado en bits (``np.packbits``, un byte por
+cada 8 parámetros) junto con los resúmenes por lote y por parámetro que
+necesita la liberación de lotes.
+
+``REGISTRO`` contiene las especificaciones de los productos del informe;
+los scripts leen de él sus límites en lugar de repetirlos como constantes.
+"""
+
+import numpy as np
+
+# (producto, parámetro): (LSL, USL, objetivo); None = sin ese límite
+ESPECIFICACIONES = {
+    ('producto', 'densidad'): (0.98, 1.02, 1.00),     # g/cc
+    ('producto', 'viscosidad'): (70, 140, 100),       # cP
+    ('solucion', 'pH'): (6.8, 7.2, 7.0),
+}
+
+
+class RegistroEspecificaciones:
+    """Límites y objetivos de muchos parámetros de muchos productos"""
+
+    def __init__(self, especificaciones=None):
+        self._productos = {}
+        self._parametros = {}
+        self._limites = {}
+        self._matrices = None
+        for (producto, parametro), (lsl, usl, objetivo) in (especificaciones or {}).items():
+            self.definir(producto, parametro, lsl, usl, objetivo)
+
+    def definir(self, producto, parametro, lsl=None, usl=None, objetivo=None):
+        """Añade o cambia la especificación de un parámetro de un producto"""
+        self._productos.setdefault(producto, len(self._productos))
+        self._parametros.setdefault(parametro, len(self._parametros))
+        self._limites[producto, parametro] = (
+            -np.inf if lsl is None else float(lsl),
+            np.inf if usl is None else float(usl),
+            np.nan if objetivo is None else float(objetivo))
+        self._matrices = None
+
+    def limites(self, producto, parametro):
+        """(LSL, USL, objetivo) de un parámetro de un producto"""
+        return self._limites[producto, parametro]
+
+    def parametros(self, producto):
+        """Parámetros especificados de un producto, en orden de definición"""
+        return [p for (producto_, p) in self._limites if producto_ == producto]
+
+    def _construir(self):
+        """Matrices producto × parámetro de LSL, USL, objetivo y definido"""
+        if self._matrices is None:
+            forma = (len(self._productos), len(self._parametros))
+            lsl, usl = np.full(forma, -np.inf), np.full(forma, np.inf)
+            objetivo = np.full(forma, np.nan)
+            definido = np.zeros(forma, dtype=bool)
+            for (producto, parametro), limites in self._limites.items():
+                celda = self._productos[producto], self._parametros[parametro]
+                lsl[celda], usl[celda], objetivo[celda] = limites
+                definido[celda] = True
+            self._matrices = lsl, usl, objetivo, definido
+        return self._matrices
+
+    def evaluar(self, productos, parametros, mediciones):
+        """Conformidad de una matriz de mediciones lotes × parámetros
+
+        Parámetros:
+        - productos: producto de todos los lotes o uno por lote.
+        - parametros: nombres de las P columnas de ``mediciones``.
+        - mediciones: array (L, P); una medición ausente (NaN) no es conforme.
+
+        Devuelve un diccionario con ``bits`` (L, ceil(P/8)) uint8, pasa/no
+        pasa de cada celda empaquetado (ver ``desempaquetar``), ``bajo`` y
+        ``alto`` (L, P) empaquetados igual para las celdas bajo LSL y sobre
+        USL, ``fallos_lote`` y ``liberable`` (L,), ``fallos_parametro`` y
+        ``pct_conforme_parametro`` (P,). Lanza KeyError si algún parámetro
+        no está especificado para algún producto.
+        """
+        mediciones = np.atleast_2d(np.asarray(mediciones, dtype=float))
+        lsl, usl, _, definido = self._construir()
+        columnas = np.fromiter((self._parametros[p] for p in parametros), dtype=np.intp)
+        if isinstance(productos, str):
+            filas = np.full(len(mediciones), self._productos[productos], dtype=np.intp)
+        else:
+            filas = np.fromiter((self._productos[p] for p in productos), dtype=np.intp)
+        # Solo hay tantas combinaciones como productos distintos
+        unicas, inversa = np.unique(filas, return_inverse=True)
+        sin_definir = ~definido[np.ix_(unicas, columnas)]
+        if sin_definir.any():
+            i, j = np.argwhere(sin_definir)[0]
+            producto = next(p for p, k in self._productos.items() if k == unicas[i])
+            raise KeyError(f"{parametros[j]!r} no está especificado para {producto!r}")
+
+        bajo = mediciones < lsl[np.ix_(unicas, columnas)][inversa]
+        alto = mediciones > usl[np.ix_(unicas, columnas)][inversa]
+        pasa = ~(bajo | alto | np.isnan(mediciones))
+        fallos_lote = pasa.shape[1] - np.count_nonzero(pasa, axis=1)
+        fallos_parametro = pasa.shape[0] - np.count_nonzero(pasa, axis=0)
+        return {
+            'bits': np.packbits(pasa, axis=1),
+            'bajo': np.packbits(bajo, axis=1),
+            'alto': np.packbits(alto, axis=1),
+            'fallos_lote': fallos_lote,
+            'liberable': fallos_lote == 0,
+            'fallos_parametro': fallos_parametro,
+            'pct_conforme_parametro': (1 - fallos_parametro / pasa.shape[0]) * 100,
+        }
+
+
+def desempaquetar(bits, n_parametros):
+    """Matriz booleana (L, P) a partir de los bits de ``evaluar``"""
+    return np.unpackbits(bits, axis=1, count=n_parametros).view(bool)
+
+
+REGISTRO = RegistroEspecificaciones(ESPECIFICACIONES)
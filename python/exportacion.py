@@ -0,0 +1,170 @@
+"""
+Exportación de figuras a varios formatos con un solo renderizado raster.
+
+``fig.savefig(..., bbox_inches='tight')`` dibuja la figura dos veces por
+formato: una pasada en seco para calcular la caja ajustada y otra para
+escribir. Guardar PNG y PDF así cuesta cuatro dibujos por figura. Aquí:
+
+- la figura se dibuja una vez con Agg a la resolución final; de ese dibujo
+  salen la caja ajustada y los píxeles del PNG (recortados a la caja);
+- los formatos vectoriales (PDF, SVG...) se dibujan con su propio backend
+  reutilizando la caja ya calculada, sin pasada en seco;
+- la compresión PNG y la escritura de ficheros se hacen en un pool de
+  hilos (zlib y Pillow liberan el GIL), mientras se crea la siguiente figura.
+
+Los formatos y la resolución de todo el informe se definen aquí.
+"""
+
+import io
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import matplotlib
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.image import imsave
+from matplotlib.transforms import Bbox
+
+import trazas
+
+# Formatos de salida y resolución de los ficheros raster
+FORMATOS = ('png', 'pdf')
+DPI = 300
+
+trazas.instrumentar_matplotlib()
+
+def _escribir_png(ruta, pixeles, dpi):
+    with trazas.tramo('savefig', formato='png'):
+        imsave(ruta, pixeles, format='png', dpi=dpi)
+    return os.path.getsize(ruta), time.perf_counter()
+
+def _escribir_bytes(ruta, contenido):
+    with open(ruta, 'wb') as f:
+        f.write(contenido)
+    return len(contenido), time.perf_counter()
+
+def dibujar_raster(fig, dpi=DPI):
+    """Dibuja la figura con Agg y devuelve (pixeles, caja_ajustada)
+
+    ``pixeles`` es el RGBA de la región ``bbox_inches='tight'`` (o ``None``
+    si la caja se sale de la figura y no se puede recortar) y
+    ``caja_ajustada`` está en pulgadas, lista para ``savefig(bbox_inches=...)``.
+    La figura queda con su lienzo y resolución originales.
+    """
+    lienzo_original, dpi_original = fig.canvas, fig.dpi
+    try:
+        lienzo = FigureCanvasAgg(fig)
+        fig.dpi = dpi
+        with trazas.tramo('dibujo'):
+            lienzo.draw()
+        renderer = lienzo.get_renderer()
+        with trazas.tramo('layout', metodo='caja_ajustada'):
+            caja = fig.get_tightbbox(renderer).padded(matplotlib.rcParams['savefig.pad_inches'])
+        pixeles = None
+        limite = fig.bbox_inches
+        if (caja.x0 >= limite.x0 and caja.y0 >= limite.y0
+                and caja.x1 <= limite.x1 and caja.y1 <= limite.y1):
+            # Ajustar la caja a píxeles enteros (hacia fuera) para recortar sin
+            # interpolar; el resultado es el de savefig con esa misma caja
+            x0, y0 = np.floor(caja.p0 * dpi).astype(int)
+            x1, y1 = np.ceil(caja.p1 * dpi).astype(int)
+            caja = Bbox([[x0 / dpi, y0 / dpi], [x1 / dpi, y1 / dpi]])
+            ancho, alto = x1 - x0, y1 - y0
+            buffer = np.asarray(lienzo.buffer_rgba())
+            fila = buffer.shape[0] - y1
+            pixeles = np.ascontiguousarray(buffer[fila:fila + alto, x0:x1])
+            if fila < 0 or pixeles.shape[:2] != (alto, ancho):
+                pixeles = None
+    finally:
+        fig.dpi = dpi_original
+        fig.set_canvas(lienzo_original)
+    return pixeles, caja
+
+class Exportador:
+    """Guarda figuras en varios formatos y escribe los ficheros en segundo plano
+
+    ``exportar`` vuelve en cuanto la figura está dibujada (se puede cerrar
+    o modificar); ``esperar`` espera a que se escriba todo y devuelve, por
+    figura, las rutas, los bytes por formato y el tiempo total.
+    Se usa como gestor de contexto::
+
+        with Exportador('imagenes') as exportador:
+            exportador.exportar(fig, 'capacidad_proceso')
+        informes = exportador.informes
+    """
+
+    def __init__(self, directorio='.', formatos=FORMATOS, dpi=DPI, trabajadores=None):
+        self.directorio = directorio
+        self.formatos = tuple(formatos)
+        self.dpi = dpi
+        self.pool = ThreadPoolExecutor(max_workers=trabajadores or os.cpu_count() or 1)
+        self.pendientes = []
+        self.informes = []
+
+    def exportar(self, fig, nombre):
+        """Dibuja ``fig`` y encola la escritura de ``nombre.<formato>`` en cada formato"""
+        inicio = time.perf_counter()
+        pixeles, caja = dibujar_raster(fig, self.dpi)
+        futuros = {}
+        for formato in self.formatos:
+            ruta = os.path.join(self.directorio, f'{nombre}.{formato}')
+            if formato == 'png' and pixeles is not None:
+                futuros[formato] = self.pool.submit(_escribir_png, ruta, pixeles, self.dpi)
+            else:
+                buffer = io.BytesIO()
+                fig.savefig(buffer, format=formato, dpi=self.dpi, bbox_inches=caja)
+                futuros[formato] = self.pool.submit(_escribir_bytes, ruta, buffer.getvalue())
+        informe = {'nombre': nombre,
+                   'rutas': [os.path.join(self.directorio, f'{nombre}.{formato}')
+                             for formato in self.formatos],
+                   'segundos_dibujo': time.perf_counter() - inicio}
+        self.pendientes.append((informe, inicio, futuros))
+        return informe
+
+    def esperar(self):
+        """Espera las escrituras pendientes y devuelve todos los informes
+
+        Cada informe añade ``bytes`` (por formato), ``bytes_total`` y
+        ``segundos`` (desde que empezó el dibujo hasta el último fichero
+        escrito). Si una escritura falla se relanza su excepción.
+        """
+        pendientes, self.pendientes = self.pendientes, []
+        for informe, inicio, futuros in pendientes:
+            resultados = {formato: futuro.result() for formato, futuro in futuros.items()}
+            informe['bytes'] = {formato: n for formato, (n, _) in resultados.items()}
+            informe['bytes_total'] = sum(informe['bytes'].values())
+            informe['segundos'] = max(fin for _, fin in resultados.values()) - inicio
+            self.informes.append(informe)
+        return self.informes
+
+    def cerrar(self):
+        try:
+            self.esperar()
+        finally:
+            self.pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, valor, traza):
+        if tipo is None:
+            self.cerrar()
+        else:
+            self.pool.shutdown(cancel_futures=True)
+
+def exportar_figura(fig, nombre, directorio='.'):
+    """Guarda una figura en todos los formatos y devuelve su informe"""
+    with Exportador(directorio) as exportador:
+        exportador.exportar(fig, nombre)
+    return exportador.informes[0]
+
+def figura_a_bytes(fig, formato='png', dpi=DPI):
+    """Contenido del fichero de una figura en un formato, recortado como en ``Exportador``"""
+    pixeles, caja = dibujar_raster(fig, dpi)
+    buffer = io.BytesIO()
+    if formato == 'png' and pixeles is not None:
+        imsave(buffer, pixeles, format='png', dpi=dpi)
+    else:
+        fig.savefig(buffer, format=formato, dpi=dpi, bbox_inches=caja)
+    return buffer.getvalue()
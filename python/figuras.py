@@ -0,0 +1,70 @@
+"""
+Registro de todas las figuras del informe.
+
+Cada entrada asocia el nombre de la figura (el mismo que su fichero en
+``imagenes/``) con la función que la crea. Importar este módulo carga
+NumPy y Matplotlib una sola vez (SciPy no: lo comprueba
+``tests/test_importacion.py``), y a partir de ahí cualquier figura se
+puede renderizar en el mismo intérprete sin lanzar un proceso nuevo.
+"""
+
+import sys
+
+import matplotlib.pyplot as plt
+
+import capacidad_proceso
+import conformidad_histograma
+import dashboard_digital
+import dashboard_simple
+import estudio_estabilidad
+import grafico_control_basico
+from exportacion import Exportador
+from trazas import tramo
+
+FIGURAS = {
+    'grafico_control_basico': grafico_control_basico.crear_grafico_control,
+    'estudio_estabilidad': estudio_estabilidad.crear_grafico_estabilidad,
+    'tabla_estabilidad': estudio_estabilidad.crear_tabla_estabilidad,
+    'capacidad_proceso': capacidad_proceso.crear_grafico_capacidad,
+    'interpretacion_cpk': capacidad_proceso.crear_grafico_interpretacion,
+    'tabla_capacidad': capacidad_proceso.crear_tabla_capacidad,
+    'conformidad_histograma': conformidad_histograma.crear_histogramas_conformidad,
+    'comparacion_conformidad': conformidad_histograma.crear_comparacion_conformidad,
+    'dashboard_simple': dashboard_simple.crear_dashboard_simple,
+    'dashboard_digital': dashboard_digital.crear_dashboard_digital,
+}
+
+def estilo_figura(nombre):
+    """Parámetros de estilo (rcParams) que el script de la figura define en ESTILO"""
+    modulo = sys.modules[FIGURAS[nombre].__module__]
+    return getattr(modulo, 'ESTILO', {})
+
+def renderizar(nombre, directorio='.', exportador=None):
+    """Crea una figura, la guarda en cada formato de FORMATOS y la cierra
+
+    El estilo de cada script se aplica solo mientras se crea y dibuja su
+    figura, para que no afecte a las demás en el mismo intérprete. Con un
+    ``exportador`` compartido la escritura de ficheros queda pendiente en
+    él; si no, se espera a que termine. Devuelve el informe de exportación.
+    """
+    if exportador is None:
+        with Exportador(directorio) as exportador:
+            return renderizar(nombre, directorio, exportador)
+    with plt.rc_context(estilo_figura(nombre)):
+        with tramo('figura', figura=nombre):
+            fig = FIGURAS[nombre]()
+        try:
+            return exportador.exportar(fig, nombre)
+        finally:
+            plt.close(fig)
+
+def renderizar_todas(directorio='.', nombres=None):
+    """Renderiza varias figuras (todas por defecto) y devuelve sus informes
+
+    Mientras se crea una figura, las anteriores se comprimen y escriben en
+    segundo plano.
+    """
+    with Exportador(directorio) as exportador:
+        for nombre in nombres or FIGURAS:
+            renderizar(nombre, directorio, exportador)
+    return exportador.informes
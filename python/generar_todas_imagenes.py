@@ -10,59 +10,276 @@ Este script ejecuta todos los scripts individuales para generar:
 - Capacidad de proceso
 - Dashboard digital
 
+Los scripts se ejecutan en paralelo (opción -j/--trabajadores) o, con
+--en-proceso, todas las figuras se renderizan en un único intérprete a partir
+del registro de figuras.py. Al final se muestra una tabla con el tiempo de
+cada trabajo; --comparar mide ambos modos. Con --cache las figuras se
+escriben en imagenes/ y solo se renderizan las que han cambiado. Con
+--trazas FICHERO se guarda una traza de las fases de cada figura, también
+las de los subprocesos (ver trazas.py).
+
 Autor: Generado para el informe de digitalización en química
 Fecha: 2024
 """
 
+import argparse
+import os
 import subprocess
 import sys
-import os
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 
-def ejecutar_script(script_name):
-    """Ejecuta un script de Python y maneja errores"""
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+
+# Scripts a ejecutar y scripts que deben terminar antes de lanzar cada uno.
+# Hoy todos son independientes, pero el planificador respeta el orden si
+# alguno pasa a depender de los resultados de otro.
+SCRIPTS = {
+    "grafico_control_basico.py": [],
+    "estudio_estabilidad.py": [],
+    "capacidad_proceso.py": [],
+    "conformidad_histograma.py": [],
+    "dashboard_simple.py": [],
+    "dashboard_digital.py": [],
+}
+
+def ejecutar_trabajo(script_name):
+    """Ejecuta un script en un proceso propio y devuelve su resultado sin imprimir nada"""
+    # Backend sin ventanas: plt.show() no bloquea la generación
+    entorno = dict(os.environ, MPLBACKEND="Agg")
+    # Con trazas, trazas.py separa la importación de módulos del script en sí
+    comando = [sys.executable, script_name]
+    if os.environ.get("TRAZAS"):
+        comando.insert(1, "trazas.py")
+    inicio = time.perf_counter()
     try:
-        print(f"🔄 Ejecutando {script_name}...")
-        result = subprocess.run([sys.executable, script_name], 
-                              capture_output=True, text=True, check=True)
-        print(f"✅ {script_name} completado exitosamente")
-        if result.stdout:
-            print(f"   📄 Salida: {result.stdout.strip()}")
-        return True
-    except subprocess.CalledProcessError as e:
-        print(f"❌ Error ejecutando {script_name}: {e}")
-        if e.stderr:
-            print(f"   🚨 Error: {e.stderr}")
-        return False
+        result = subprocess.run(comando, cwd=DIRECTORIO, env=entorno,
+                                capture_output=True, text=True)
+        ok, stdout, stderr = result.returncode == 0, result.stdout, result.stderr
+        error = None if ok else f"código de salida {result.returncode}"
     except FileNotFoundError:
-        print(f"❌ Archivo {script_name} no encontrado")
-        return False
+        ok, stdout, stderr, error = False, "", "", "archivo no encontrado"
+    return {"script": script_name, "ok": ok, "stdout": stdout, "stderr": stderr,
+            "error": error, "segundos": time.perf_counter() - inicio}
+
+def mostrar_resultado(resultado):
+    """Imprime la salida de un trabajo terminado"""
+    script_name = resultado["script"]
+    if resultado["ok"]:
+        print(f"✅ {script_name} completado exitosamente")
+        if resultado["stdout"]:
+            print(f"   📄 Salida: {resultado['stdout'].strip()}")
+    else:
+        print(f"❌ Error ejecutando {script_name}: {resultado['error']}")
+        if resultado["stderr"]:
+            print(f"   🚨 Error: {resultado['stderr']}")
+
+def ejecutar_script(script_name):
+    """Ejecuta un script de Python y maneja errores"""
+    print(f"🔄 Ejecutando {script_name}...")
+    resultado = ejecutar_trabajo(script_name)
+    mostrar_resultado(resultado)
+    return resultado
+
+def construir_en_paralelo(scripts, trabajadores):
+    """Ejecuta los scripts en paralelo respetando sus dependencias
 
-def main():
+    Cada trabajo es un proceso independiente; el pool limita cuántos hay
+    en marcha a la vez. Un script cuya dependencia falla no se lanza.
+    """
+    pendientes = dict(scripts)
+    resultados = {}
+    en_curso = {}
+    with ThreadPoolExecutor(max_workers=trabajadores) as pool:
+        while pendientes or en_curso:
+            for script, dependencias in list(pendientes.items()):
+                if not all(d in resultados for d in dependencias):
+                    continue
+                del pendientes[script]
+                fallidas = [d for d in dependencias if not resultados[d]["ok"]]
+                if fallidas:
+                    resultados[script] = {"script": script, "ok": False, "stdout": "",
+                                          "stderr": "", "segundos": 0.0,
+                                          "error": f"dependencia fallida: {', '.join(fallidas)}"}
+                    mostrar_resultado(resultados[script])
+                    continue
+                print(f"🔄 Lanzando {script}...")
+                en_curso[pool.submit(ejecutar_trabajo, script)] = script
+            if not en_curso:
+                if pendientes:
+                    # Dependencias que nunca se resolverán (ciclos o scripts inexistentes)
+                    for script in pendientes:
+                        resultados[script] = {"script": script, "ok": False, "stdout": "",
+                                              "stderr": "", "segundos": 0.0,
+                                              "error": "dependencias no resolubles"}
+                        mostrar_resultado(resultados[script])
+                    pendientes.clear()
+                continue
+            hechos, _ = wait(en_curso, return_when=FIRST_COMPLETED)
+            for futuro in hechos:
+                del en_curso[futuro]
+                resultado = futuro.result()
+                resultados[resultado["script"]] = resultado
+                mostrar_resultado(resultado)
+    return [resultados[script] for script in scripts]
+
+def mostrar_tiempos(resultados, total):
+    """Imprime la tabla de tiempos por trabajo"""
+    ancho = max(len(r["script"]) for r in resultados)
+    print(f"{'Trabajo':<{ancho}}  {'Estado':<6}  {'Tiempo (s)':>10}")
+    for r in resultados:
+        estado = "OK" if r["ok"] else "ERROR"
+        print(f"{r['script']:<{ancho}}  {estado:<6}  {r['segundos']:>10.2f}")
+    suma = sum(r["segundos"] for r in resultados)
+    print(f"{'Suma de trabajos':<{ancho}}  {'':<6}  {suma:>10.2f}")
+    print(f"{'Tiempo total real':<{ancho}}  {'':<6}  {total:>10.2f}")
+
+def construir_secuencial(scripts):
+    """Ejecuta los scripts uno detrás de otro, cada uno en un proceso nuevo"""
+    resultados = []
+    for i, script in enumerate(scripts, 1):
+        print(f"[{i}/{len(scripts)}] ", end="")
+        resultados.append(ejecutar_script(script))
+        print()
+    return resultados
+
+def construir_en_proceso():
+    """Renderiza todas las figuras del registro en este mismo intérprete
+
+    NumPy y Matplotlib se importan una sola vez (con el backend Agg)
+    y cada figura se crea llamando a su función en ``figuras.FIGURAS``.
+    La compresión y escritura de ficheros (exportacion.py) se solapan con
+    la creación de la figura siguiente.
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    inicio = time.perf_counter()
+    from trazas import tramo
+    with tramo("importacion", script="figuras"):
+        import figuras
+    from exportacion import Exportador
+    resultados = [{"script": "(importaciones)", "ok": True, "stdout": "", "stderr": "",
+                   "error": None, "segundos": time.perf_counter() - inicio}]
+    with Exportador(DIRECTORIO) as exportador:
+        for nombre in figuras.FIGURAS:
+            print(f"🔄 Renderizando {nombre}...")
+            inicio = time.perf_counter()
+            try:
+                informe = figuras.renderizar(nombre, DIRECTORIO, exportador)
+                rutas = ", ".join(os.path.basename(r) for r in informe["rutas"])
+                resultado = {"ok": True, "stdout": f"Exportando a {rutas}", "stderr": "", "error": None}
+            except Exception as e:
+                resultado = {"ok": False, "stdout": "", "stderr": "", "error": repr(e)}
+            resultado.update(script=nombre, segundos=time.perf_counter() - inicio)
+            mostrar_resultado(resultado)
+            resultados.append(resultado)
+    mostrar_exportacion(exportador.informes)
+    return resultados
+
+def mostrar_exportacion(informes):
+    """Imprime los bytes escritos y el tiempo de exportación de cada figura"""
+    if not informes:
+        return
+    formatos = list(informes[0]["bytes"])
+    ancho = max(len(i["nombre"]) for i in informes)
+    print(f"{'Figura':<{ancho}}" + "".join(f"  {f.upper() + ' (KB)':>10}" for f in formatos)
+          + f"  {'Dibujo (s)':>10}  {'Total (s)':>10}")
+    for i in informes:
+        print(f"{i['nombre']:<{ancho}}" + "".join(f"  {i['bytes'][f] / 1024:>10.1f}" for f in formatos)
+              + f"  {i['segundos_dibujo']:>10.2f}  {i['segundos']:>10.2f}")
+    total = sum(i["bytes_total"] for i in informes)
+    print(f"📦 {total / 1024 ** 2:.2f} MB escritos en {len(informes)} figuras")
+
+def construir_con_cache(forzar=False):
+    """Renderiza en este intérprete solo las figuras cuyo contenido ha cambiado
+
+    Los ficheros se escriben directamente en imagenes/ (ver cache_figuras.py).
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    import cache_figuras
+    resultados = []
+    aciertos = 0
+    for r in cache_figuras.construir(forzar=forzar):
+        aciertos += r["acierto"]
+        if r["acierto"]:
+            print(f"♻️  {r['nombre']} sin cambios (caché)")
+        resultado = {"script": r["nombre"], "ok": r["error"] is None, "stdout": "",
+                     "stderr": "", "error": r["error"], "segundos": r["segundos"]}
+        if not r["acierto"]:
+            resultado["stdout"] = f"Renderizado en {cache_figuras.IMAGENES}"
+            mostrar_resultado(resultado)
+        resultados.append(resultado)
+    print(f"📦 Caché: {aciertos} aciertos, {len(resultados) - aciertos} figuras renderizadas")
+    return resultados
+
+def comparar_modos():
+    """Mide la generación completa en procesos nuevos frente al intérprete caliente"""
+    inicio = time.perf_counter()
+    frio = [ejecutar_trabajo(script) for script in SCRIPTS]
+    tiempo_frio = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    caliente = construir_en_proceso()
+    tiempo_caliente = time.perf_counter() - inicio
+
+    print("=" * 60)
+    print(f"🧊 Un proceso por script ({len(frio)} procesos): {tiempo_frio:8.2f} s")
+    print(f"🔥 Intérprete único en caliente:          {tiempo_caliente:8.2f} s")
+    print(f"   Ahorro: {tiempo_frio - tiempo_caliente:.2f} s ({tiempo_frio / tiempo_caliente:.2f}x)")
+    return frio + caliente
+
+def main(argv=None):
     """Función principal que ejecuta todos los scripts"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("-j", "--trabajadores", type=int, default=os.cpu_count() or 1,
+                        help="número de scripts en ejecución simultánea (1 = secuencial)")
+    modo = parser.add_mutually_exclusive_group()
+    modo.add_argument("--en-proceso", action="store_true",
+                      help="renderizar todas las figuras en este intérprete, sin subprocesos")
+    modo.add_argument("--cache", action="store_true",
+                      help="renderizar en imagenes/ solo las figuras que han cambiado")
+    modo.add_argument("--comparar", action="store_true",
+                      help="medir procesos nuevos frente a intérprete en caliente")
+    parser.add_argument("--forzar", action="store_true",
+                        help="con --cache, renderizar todo aunque no haya cambios")
+    parser.add_argument("--trazas", metavar="FICHERO",
+                        help="guardar una traza Chrome de las fases de cada figura")
+    args = parser.parse_args(argv)
+    if args.trazas:
+        # trazas.py lee la variable al importarse, en este proceso y en los hijos
+        os.environ["TRAZAS"] = os.path.abspath(args.trazas)
+    trazas = None
+    if os.environ.get("TRAZAS"):
+        # Importarlo antes de lanzar subprocesos marca este proceso como raíz
+        import trazas
+
     print("🧪 GENERADOR DE GRÁFICOS - CONTROL DE CALIDAD QUÍMICA")
     print("=" * 60)
     
-    # Lista de scripts a ejecutar
-    scripts = [
-        "grafico_control_basico.py",
-        "estudio_estabilidad.py", 
-        "capacidad_proceso.py",
-        "conformidad_histograma.py",
-        "dashboard_simple.py"
-    ]
-    
-    # Ejecutar cada script
-    exitos = 0
-    for i, script in enumerate(scripts, 1):
-        print(f"[{i}/{len(scripts)}] ", end="")
-        if ejecutar_script(script):
-            exitos += 1
-        print()
+    inicio = time.perf_counter()
+    if args.comparar:
+        resultados = comparar_modos()
+    elif args.cache:
+        resultados = construir_con_cache(args.forzar)
+    elif args.en_proceso:
+        resultados = construir_en_proceso()
+    elif args.trabajadores <= 1:
+        resultados = construir_secuencial(SCRIPTS)
+    else:
+        resultados = construir_en_paralelo(SCRIPTS, args.trabajadores)
+    total = time.perf_counter() - inicio
     
+    exitos = sum(r["ok"] for r in resultados)
+    print("=" * 60)
+    mostrar_tiempos(resultados, total)
     print("=" * 60)
-    print(f"✅ Scripts exitosos: {exitos}/{len(scripts)}")
-    if exitos == len(scripts):
+    print(f"✅ Trabajos exitosos: {exitos}/{len(resultados)}")
+    if exitos == len(resultados):
         print("🎉 ¡Todas las imágenes generadas exitosamente!")
+    if trazas is not None:
+        print(f"🔍 Traza: {trazas.fusionar()}")
+    return 0 if exitos == len(resultados) else 1
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    sys.exit(main())
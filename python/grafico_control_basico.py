@@ -1,73 +1,107 @@
 import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.style as style
+from limites_control import LimitesControl, SOBRE_UCL, BAJO_LCL
+from reglas_control import evaluar_reglas
+from decimacion import decimar, pixeles_eje
+from especificaciones import REGISTRO
+from exportacion import DPI, exportar_figura
+from trazas import trazado
 
-# Configurar estilo para mayor legibilidad
-plt.style.use('default')
-plt.rcParams.update({'font.size': 12})
+# Estilo para mayor legibilidad (se aplica al crear y guardar la figura)
+ESTILO = {'font.size': 12}
 
-# Configurar semilla para reproducibilidad
-np.random.seed(42)
+# Límites de especificación
+LSL, USL, _ = REGISTRO.limites('producto', 'densidad')
 
-# Generar datos simulados de densidad (en g/cc):
-# 20 datos iniciales con media 1.00 (proceso estable)
-# 10 datos posteriores con media 1.03 (proceso desviado)
-data_estable = np.random.normal(1.00, 0.005, 20)
-data_inestable = np.random.normal(1.03, 0.008, 10)
-data = np.concatenate([data_estable, data_inestable])
+@trazado('datos')
+def generar_datos():
+    """Genera los datos simulados de densidad (en g/cc)"""
+    # Configurar semilla para reproducibilidad
+    np.random.seed(42)
 
-# Calcular límites de control basados en la fase estable
-CL = data_estable.mean()  # Línea Central
-sigma = data_estable.std(ddof=1)  # Desviación estándar
-UCL = CL + 3*sigma  # Límite de Control Superior
-LCL = CL - 3*sigma  # Límite de Control Inferior
+    # 20 datos iniciales con media 1.00 (proceso estable)
+    # 10 datos posteriores con media 1.03 (proceso desviado)
+    data_estable = np.random.normal(1.00, 0.005, 20)
+    data_inestable = np.random.normal(1.03, 0.008, 10)
+    return data_estable, np.concatenate([data_estable, data_inestable])
 
-# Límites de especificación
-LSL, USL = 0.98, 1.02
+def crear_grafico_control():
+    """Crea el gráfico de control de densidad y devuelve la figura"""
+    data_estable, data = generar_datos()
 
-# Crear el gráfico
-fig, ax = plt.subplots(figsize=(12, 8))
+    # Calcular límites de control basados en la fase estable (fase I)
+    control = LimitesControl(k_sigma=3)
+    for valor in data_estable:
+        control.actualizar('densidad', valor)
+    control.congelar('densidad')
+    CL, UCL, LCL = control.limites('densidad')  # Línea Central y límites de control
 
-# Datos
-x = np.arange(1, len(data) + 1)
-ax.plot(x, data, 'o-', color='#2E86AB', markersize=6, linewidth=2, label='Densidad medida')
+    # Puntos fuera de control (por encima de UCL o por debajo de LCL) y puntos
+    # que completan un patrón de las reglas 2-5 (Western Electric / Nelson)
+    clasificacion = control.clasificar('densidad', data)
+    puntos_fuera = (clasificacion == SOBRE_UCL) | (clasificacion == BAJO_LCL)
+    reglas = evaluar_reglas(data, CL, (UCL - CL) / control.k_sigma)
+    patron = reglas & 0b11110 != 0
 
-# Líneas de control
-ax.axhline(CL, color='#28A745', linewidth=2, label=f'Línea Central (CL = {CL:.3f})')
-ax.axhline(UCL, color='#DC3545', linestyle='--', linewidth=2, label=f'UCL = {UCL:.3f}')
-ax.axhline(LCL, color='#DC3545', linestyle='--', linewidth=2, label=f'LCL = {LCL:.3f}')
+    # Crear el gráfico
+    fig, ax = plt.subplots(figsize=(12, 8))
 
-# Límites de especificación
-ax.axhline(USL, color='#6F42C1', linestyle=':', linewidth=2, label=f'USL = {USL}')
-ax.axhline(LSL, color='#6F42C1', linestyle=':', linewidth=2, label=f'LSL = {LSL}')
-
-# Zonas de control (opcional)
-ax.fill_between(x, LCL, UCL, alpha=0.1, color='green', label='Zona de control')
-ax.fill_between(x, LSL, USL, alpha=0.05, color='purple', label='Zona de especificación')
-
-# Marcar puntos fuera de control
-puntos_fuera = data > UCL
-if np.any(puntos_fuera):
-    ax.scatter(x[puntos_fuera], data[puntos_fuera], color='red', s=100, marker='x', 
-               linewidth=3, label='Fuera de control', zorder=5)
-
-# Línea vertical para separar fases
-ax.axvline(x=20.5, color='orange', linestyle='-', alpha=0.7, linewidth=2)
-ax.text(10, 1.035, 'Proceso Estable', fontsize=14, ha='center', 
-        bbox=dict(boxstyle="round,pad=0.3", facecolor="lightgreen", alpha=0.7))
-ax.text(25, 1.035, 'Proceso Desviado', fontsize=14, ha='center',
-        bbox=dict(boxstyle="round,pad=0.3", facecolor="lightcoral", alpha=0.7))
-
-# Configuración del gráfico
-ax.set_xlabel('Número de muestra (orden temporal)', fontsize=14)
-ax.set_ylabel('Densidad (g/cc)', fontsize=14)
-ax.set_title('Gráfico de Control - Densidad de Producto Químico', fontsize=16, fontweight='bold')
-ax.grid(True, alpha=0.3)
-ax.legend(loc='upper left', fontsize=10)
-
-# Ajustar layout y guardar
-plt.tight_layout()
-plt.savefig('grafico_control_basico.png', dpi=300, bbox_inches='tight')
-plt.savefig('grafico_control_basico.pdf', bbox_inches='tight')
-print("Gráfico de control básico guardado como 'grafico_control_basico.png' y '.pdf'")
-plt.show() 
\ No newline at end of file
+    # Datos: en series largas solo los puntos que se distinguen a la resolución
+    # de exportación, más todos los fuera de control o con patrón
+    x = np.arange(1, len(data) + 1)
+    visibles = decimar(x, data, pixeles_eje(ax, DPI), conservar=puntos_fuera | patron)
+    ax.plot(x[visibles], data[visibles], 'o-', color='#2E86AB', markersize=6, linewidth=2,
+            label='Densidad medida')
+
+    # Líneas de control
+    ax.axhline(CL, color='#28A745', linewidth=2, label=f'Línea Central (CL = {CL:.3f})')
+    ax.axhline(UCL, color='#DC3545', linestyle='--', linewidth=2, label=f'UCL = {UCL:.3f}')
+    ax.axhline(LCL, color='#DC3545', linestyle='--', linewidth=2, label=f'LCL = {LCL:.3f}')
+
+    # Límites de especificación
+    ax.axhline(USL, color='#6F42C1', linestyle=':', linewidth=2, label=f'USL = {USL}')
+    ax.axhline(LSL, color='#6F42C1', linestyle=':', linewidth=2, label=f'LSL = {LSL}')
+
+    # Zonas de control (opcional)
+    ax.fill_between(x[[0, -1]], LCL, UCL, alpha=0.1, color='green', label='Zona de control')
+    ax.fill_between(x[[0, -1]], LSL, USL, alpha=0.05, color='purple', label='Zona de especificación')
+
+    # Marcar puntos fuera de control
+    if np.any(puntos_fuera):
+        ax.scatter(x[puntos_fuera], data[puntos_fuera], color='red', s=100, marker='x',
+                   linewidth=3, label='Fuera de control', zorder=5)
+
+    # Rodear los puntos que completan un patrón, estén o no fuera de los límites
+    if np.any(patron):
+        numeros = [str(r) for r in range(2, 6) if np.any(reglas[patron] & (1 << (r - 1)))]
+        ax.scatter(x[patron], data[patron], s=160, facecolors='none', edgecolors='#FD7E14',
+                   linewidth=2.5, label=f'Patrón (reglas {", ".join(numeros)})', zorder=5)
+
+    # Línea vertical para separar fases
+    ax.axvline(x=20.5, color='orange', linestyle='-', alpha=0.7, linewidth=2)
+    ax.text(10, 1.035, 'Proceso Estable', fontsize=14, ha='center',
+            bbox=dict(boxstyle="round,pad=0.3", facecolor="lightgreen", alpha=0.7))
+    ax.text(25, 1.035, 'Proceso Desviado', fontsize=14, ha='center',
+            bbox=dict(boxstyle="round,pad=0.3", facecolor="lightcoral", alpha=0.7))
+
+    # Configuración del gráfico
+    ax.set_xlabel('Número de muestra (orden temporal)', fontsize=14)
+    ax.set_ylabel('Densidad (g/cc)', fontsize=14)
+    ax.set_title('Gráfico de Control - Densidad de Producto Químico', fontsize=16, fontweight='bold')
+    ax.grid(True, alpha=0.3)
+    ax.legend(loc='upper left', fontsize=10)
+
+    # Ajustar layout
+    fig.tight_layout()
+    return fig
+
+if __name__ == "__main__":
+    # Configurar estilo para mayor legibilidad
+    plt.style.use('default')
+    plt.rcParams.update(ESTILO)
+
+    fig = crear_grafico_control()
+    exportar_figura(fig, 'grafico_control_basico')
+    print("Gráfico de control básico guardado como 'grafico_control_basico.png' y '.pdf'")
+    plt.show()
@@ -0,0 +1,125 @@
+"""
+Histograma con las barras fuera de especificación resaltadas.
+
+Sustituye al patrón ``ax.hist`` + bucle ``patch.set_facecolor`` de los
+scripts: los conteos se calculan por bloques (o se reciben ya calculados),
+los bins se clasifican frente a LSL/USL de forma vectorizada y las barras
+se dibujan como dos colecciones (dentro y fuera de especificación). El
+coste de dibujo depende solo del número de bins, no del número de lecturas,
+por lo que sirve igual para 10^3 que para 10^8 mediciones.
+"""
+
+import numpy as np
+from matplotlib.collections import PolyCollection
+
+# Tamaño de bloque para contar arrays muy grandes sin copias temporales enormes
+TAM_BLOQUE = 1 << 22
+
+def contar_histograma(datos, bins=10, rango=None, tam_bloque=TAM_BLOQUE):
+    """Calcula (conteos, bordes) recorriendo los datos por bloques
+
+    Con ``bins`` entero y sin ``rango`` se usa [min, max] de los datos,
+    igual que ``np.histogram``. Acepta arrays en memoria o ``np.memmap``.
+    """
+    datos = np.asarray(datos).ravel()
+    if np.ndim(bins) == 0:
+        if rango is None:
+            rango = (float(datos.min()), float(datos.max()))
+        bordes = np.histogram_bin_edges(np.asarray(rango, dtype=float), bins=bins, range=rango)
+    else:
+        bordes = np.asarray(bins, dtype=float)
+    conteos = np.zeros(len(bordes) - 1, dtype=np.int64)
+    for inicio in range(0, len(datos), tam_bloque):
+        conteos += np.histogram(datos[inicio:inicio + tam_bloque], bins=bordes)[0]
+    return conteos, bordes
+
+def bins_fuera_especificacion(bordes, lsl=None, usl=None, criterio='borde'):
+    """Devuelve un array booleano con los bins fuera de especificación
+
+    - ``criterio='borde'``: el bin está entero fuera (derecha <= LSL o
+      izquierda >= USL).
+    - ``criterio='centro'``: el centro del bin queda fuera de [LSL, USL].
+    """
+    bordes = np.asarray(bordes, dtype=float)
+    izquierda, derecha = bordes[:-1], bordes[1:]
+    fuera = np.zeros(len(izquierda), dtype=bool)
+    if criterio == 'borde':
+        if lsl is not None:
+            fuera |= derecha <= lsl
+        if usl is not None:
+            fuera |= izquierda >= usl
+    elif criterio == 'centro':
+        centro = (izquierda + derecha) / 2
+        if lsl is not None:
+            fuera |= centro < lsl
+        if usl is not None:
+            fuera |= centro > usl
+    else:
+        raise ValueError(f"Criterio desconocido: {criterio!r}")
+    return fuera
+
+def _rectangulos(izquierda, derecha, alturas):
+    """Vértices (k, 4, 2) de k rectángulos apoyados en y=0"""
+    verts = np.empty((len(alturas), 4, 2))
+    verts[:, 0, 0] = verts[:, 1, 0] = izquierda
+    verts[:, 2, 0] = verts[:, 3, 0] = derecha
+    verts[:, 0, 1] = verts[:, 3, 1] = 0
+    verts[:, 1, 1] = verts[:, 2, 1] = alturas
+    return verts
+
+def histograma_especificacion(ax, datos=None, bins=10, conteos=None, lsl=None, usl=None,
+                              criterio='borde', density=False, color='#2E86AB',
+                              color_fuera='red', alpha=0.7, alpha_fuera=None,
+                              edgecolor='black', linewidth=1.0, label=None):
+    """Dibuja un histograma con las barras fuera de especificación resaltadas
+
+    Se pasa ``datos`` (array o memmap; ``bins`` como en ``np.histogram``) o
+    bien ``conteos`` ya calculados junto con sus ``bins`` (bordes). Devuelve
+    (alturas, bordes, (coleccion_dentro, coleccion_fuera)) de forma análoga
+    a ``ax.hist``.
+    """
+    if conteos is None:
+        conteos, bordes = contar_histograma(datos, bins)
+    else:
+        bordes = np.asarray(bins, dtype=float)
+        conteos = np.asarray(conteos)
+    alturas = conteos.astype(float)
+    if density:
+        alturas = alturas / (conteos.sum() * np.diff(bordes))
+
+    fuera = bins_fuera_especificacion(bordes, lsl, usl, criterio)
+    verts = _rectangulos(bordes[:-1], bordes[1:], alturas)
+    colecciones = []
+    for seleccion, cara, transparencia, etiqueta in (
+            (~fuera, color, alpha, label),
+            (fuera, color_fuera, alpha if alpha_fuera is None else alpha_fuera, None)):
+        coleccion = PolyCollection(verts[seleccion], facecolors=cara, edgecolors=edgecolor,
+                                   linewidths=linewidth, alpha=transparencia, label=etiqueta)
+        # Igual que ax.hist: el eje y arranca exactamente en 0
+        coleccion.sticky_edges.y.append(0)
+        ax.add_collection(coleccion, autolim=False)
+        colecciones.append(coleccion)
+
+    ax.update_datalim([(bordes[0], 0), (bordes[-1], alturas.max(initial=0))])
+    ax.autoscale_view()
+    return alturas, bordes, tuple(colecciones)
+
+def actualizar_histograma(colecciones, conteos, bordes, lsl=None, usl=None, criterio='borde',
+                          density=False):
+    """Cambia las alturas de un histograma ya dibujado sin crear artistas nuevos
+
+    ``colecciones`` es la tupla devuelta por ``histograma_especificacion``.
+    Los ejes no se reescalan: si las barras nuevas no caben, quien llama
+    decide si ajusta los límites. Devuelve las alturas dibujadas.
+    """
+    bordes = np.asarray(bordes, dtype=float)
+    conteos = np.asarray(conteos)
+    alturas = conteos.astype(float)
+    if density:
+        alturas = alturas / (conteos.sum() * np.diff(bordes))
+    fuera = bins_fuera_especificacion(bordes, lsl, usl, criterio)
+    verts = _rectangulos(bordes[:-1], bordes[1:], alturas)
+    coleccion_dentro, coleccion_fuera = colecciones
+    coleccion_dentro.set_verts(verts[~fuera])
+    coleccion_fuera.set_verts(verts[fuera])
+    return alturas
@@ -0,0 +1,368 @@
+"""
+Ingesta de lecturas de sensores con asyncio hacia el almacén de mediciones.
+
+Los sensores envían registros binarios de tamaño fijo (``TIPO_LECTURA``:
+sensor, instante en ms desde epoch y valor) por TCP, UDP o socket Unix. Un
+bloque recibido se interpreta de una vez con ``np.frombuffer``, sin tratar
+las lecturas una a una, y se copia en búferes NumPy de capacidad fija:
+
+- Hay un número fijo de búferes. Cuando el escritor va retrasado y no
+  queda ninguno libre, las conexiones TCP/Unix dejan de leer del socket
+  hasta que se libera uno (contrapresión: el control de flujo de TCP frena
+  al emisor). En UDP no hay a quién frenar y las lecturas se descartan y
+  se cuentan.
+- Cada búfer lleno (o el parcial, cada ``intervalo`` segundos) se guarda en
+  el almacén en un hilo aparte con una llamada a ``anadir`` por sensor.
+
+``SimuladorSensores`` genera las señales de densidad y pH que los scripts
+simulan dentro de cada gráfico, para probar el caudal sin planta conectada:
+
+    python ingesta.py --prueba-carga 2000000 --transporte tcp
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import tempfile
+import time
+
+import numpy as np
+
+from almacen import AlmacenMediciones
+
+# Registro en la red (little endian, sin relleno: 18 bytes)
+TIPO_LECTURA = np.dtype([('sensor', '<u2'), ('tiempo', '<i8'), ('valor', '<f8')])
+
+# Sensores de la planta: el número de sensor es la posición en la lista
+SENSORES = [f'densidad-{i:02d}' for i in range(1, 7)] + [f'pH-{i:02d}' for i in range(1, 7)]
+
+CAPACIDAD_BUFER = 1 << 16
+N_BUFERES = 4
+INTERVALO_VACIADO = 1.0
+
+# Lecturas por datagrama UDP (< 1500 bytes de MTU)
+LECTURAS_DATAGRAMA = 1400 // TIPO_LECTURA.itemsize
+
+DIRECCION_TCP = ('127.0.0.1', 9500)
+
+
+class _ProtocoloUDP(asyncio.DatagramProtocol):
+    def __init__(self, servicio):
+        self.servicio = servicio
+
+    def datagram_received(self, datos, direccion):
+        n = len(datos) // TIPO_LECTURA.itemsize
+        resto = self.servicio.copiar(np.frombuffer(datos, TIPO_LECTURA, count=n))
+        self.servicio.estadisticas['descartadas'] += len(resto)
+
+
+class ServicioIngesta:
+    """Recibe lecturas de muchos sensores y las guarda en bloque
+
+    Uso dentro de un bucle asyncio::
+
+        servicio = ServicioIngesta(AlmacenMediciones('datos'))
+        await servicio.iniciar()
+        await servicio.escuchar('tcp', ('127.0.0.1', 9500))
+        ...
+        await servicio.cerrar()
+    """
+
+    def __init__(self, almacen, sensores=SENSORES, capacidad=CAPACIDAD_BUFER,
+                 n_buferes=N_BUFERES, intervalo=INTERVALO_VACIADO):
+        self.almacen = almacen
+        self.sensores = list(sensores)
+        self.capacidad = capacidad
+        self.n_buferes = n_buferes
+        self.intervalo = intervalo
+        self.estadisticas = {'recibidas': 0, 'guardadas': 0, 'descartadas': 0,
+                             'bloques': 0, 'esperas': 0}
+        self.servidores = []
+        self.conexiones = set()
+        # Última marca guardada de cada sensor: el almacén no admite lecturas anteriores
+        self._ultimo = np.full(len(self.sensores), np.iinfo(np.int64).min)
+        for i, etiqueta in enumerate(self.sensores):
+            tiempos, _ = almacen.ultimos(etiqueta, 1)
+            if len(tiempos):
+                self._ultimo[i] = tiempos[-1].astype(np.int64)
+
+    async def iniciar(self):
+        """Reserva los búferes y arranca el escritor y el vaciado periódico"""
+        self.libres = asyncio.Queue()
+        self.llenos = asyncio.Queue()
+        for _ in range(self.n_buferes):
+            self.libres.put_nowait(np.empty(self.capacidad, dtype=TIPO_LECTURA))
+        self.actual = None
+        self.ocupadas = 0
+        self._escritor = asyncio.create_task(self._escribir())
+        self._vaciador = asyncio.create_task(self._vaciar_periodicamente())
+
+    def copiar(self, registros):
+        """Copia registros en los búferes libres; devuelve los que no caben"""
+        self.estadisticas['recibidas'] += len(registros)
+        while len(registros):
+            if self.actual is None:
+                if self.libres.empty():
+                    break
+                self.actual = self.libres.get_nowait()
+            n = min(len(registros), self.capacidad - self.ocupadas)
+            self.actual[self.ocupadas:self.ocupadas + n] = registros[:n]
+            self.ocupadas += n
+            registros = registros[n:]
+            if self.ocupadas == self.capacidad:
+                self._entregar()
+        self.estadisticas['recibidas'] -= len(registros)
+        return registros
+
+    async def recibir(self, registros):
+        """Como ``copiar``, pero espera a que haya búfer libre (contrapresión)"""
+        while len(registros := self.copiar(registros)):
+            self.estadisticas['esperas'] += 1
+            bufer = await self.libres.get()
+            # Mientras se esperaba, otra conexión ha podido tomar un búfer
+            if self.actual is None:
+                self.actual = bufer
+            else:
+                self.libres.put_nowait(bufer)
+
+    def _entregar(self):
+        if self.ocupadas:
+            self.llenos.put_nowait((self.actual, self.ocupadas))
+            self.actual = None
+            self.ocupadas = 0
+
+    async def _vaciar_periodicamente(self):
+        while True:
+            await asyncio.sleep(self.intervalo)
+            self._entregar()
+
+    async def _escribir(self):
+        while True:
+            bufer, n = await self.llenos.get()
+            if bufer is None:
+                break
+            guardadas, descartadas = await asyncio.to_thread(self._guardar, bufer[:n])
+            self.libres.put_nowait(bufer)
+            self.estadisticas['guardadas'] += guardadas
+            self.estadisticas['descartadas'] += descartadas
+            self.estadisticas['bloques'] += 1
+
+    def _guardar(self, bloque):
+        """Guarda un bloque en el almacén (una escritura por sensor)
+
+        Se ejecuta en un hilo; devuelve (guardadas, descartadas) para que las
+        estadísticas solo se toquen desde el bucle.
+        """
+        sensores = bloque['sensor'].astype(np.intp)
+        conocidos = sensores < len(self.sensores)
+        # Lecturas anteriores a la última guardada de su sensor: fuera de orden
+        validos = conocidos.copy()
+        validos[conocidos] = bloque['tiempo'][conocidos] >= self._ultimo[sensores[conocidos]]
+        orden = np.argsort(sensores[validos], kind='stable')
+        bloque = bloque[validos][orden]
+        cuentas = np.bincount(bloque['sensor'], minlength=len(self.sensores))
+        fin = np.cumsum(cuentas)
+        for i in np.flatnonzero(cuentas):
+            lecturas = bloque[fin[i] - cuentas[i]:fin[i]]
+            self.almacen.anadir(self.sensores[i], lecturas['tiempo'].astype('datetime64[ms]'),
+                                lecturas['valor'])
+            self._ultimo[i] = max(self._ultimo[i], lecturas['tiempo'].max())
+        return len(bloque), len(validos) - len(bloque)
+
+    async def _conexion(self, lector, escritor):
+        self.conexiones.add(escritor)
+        resto = b''
+        try:
+            while datos := await lector.read(1 << 16):
+                if resto:
+                    datos = resto + datos
+                n = len(datos) // TIPO_LECTURA.itemsize
+                resto = datos[n * TIPO_LECTURA.itemsize:]
+                await self.recibir(np.frombuffer(datos, TIPO_LECTURA, count=n))
+        finally:
+            self.conexiones.discard(escritor)
+            escritor.close()
+
+    async def escuchar(self, transporte, direccion):
+        """Abre un punto de escucha: 'tcp' o 'udp' con (host, puerto), 'unix' con una ruta
+
+        Devuelve la dirección real (útil con el puerto 0).
+        """
+        bucle = asyncio.get_running_loop()
+        if transporte == 'tcp':
+            servidor = await asyncio.start_server(self._conexion, *direccion)
+            direccion = servidor.sockets[0].getsockname()
+        elif transporte == 'unix':
+            servidor = await asyncio.start_unix_server(self._conexion, direccion)
+        elif transporte == 'udp':
+            servidor, _ = await bucle.create_datagram_endpoint(
+                lambda: _ProtocoloUDP(self), local_addr=direccion)
+            sock = servidor.get_extra_info('socket')
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 22)
+            direccion = sock.getsockname()
+        else:
+            raise ValueError(f"Transporte desconocido: {transporte!r}")
+        self.servidores.append(servidor)
+        return direccion
+
+    async def cerrar(self):
+        """Deja de escuchar, guarda lo pendiente y espera al escritor"""
+        for servidor in self.servidores:
+            servidor.close()
+        for escritor in list(self.conexiones):
+            escritor.close()
+        self._vaciador.cancel()
+        self._entregar()
+        self.llenos.put_nowait((None, 0))
+        await self._escritor
+
+
+class SimuladorSensores:
+    """Señales de densidad (g/cc) y pH como las de los scripts de gráficos
+
+    Densidad: ``1.00 + 0.008·sin(fase) + N(0, 0.003)`` con una fase por
+    sensor. pH: ``N(7.0, 0.05)``. Todas las lecturas de un instante se
+    generan juntas y cada llamada continúa donde acabó la anterior.
+    """
+
+    def __init__(self, sensores=SENSORES, periodo_ms=1000, inicio=None, semilla=None):
+        self.sensores = list(sensores)
+        self.periodo_ms = periodo_ms
+        self.rng = np.random.default_rng(semilla)
+        self.paso = 0
+        self.inicio = int(time.time() * 1000) if inicio is None else inicio
+        self.es_densidad = np.array([s.startswith('densidad') for s in self.sensores])
+        self.desfase = self.rng.uniform(0, 2 * np.pi, len(self.sensores))
+
+    def generar(self, instantes):
+        """Lecturas de todos los sensores en los ``instantes`` siguientes, en orden de tiempo"""
+        pasos = self.paso + np.arange(instantes)
+        self.paso += instantes
+        n_sensores = len(self.sensores)
+        lecturas = np.empty((instantes, n_sensores), dtype=TIPO_LECTURA)
+        lecturas['sensor'] = np.arange(n_sensores)
+        lecturas['tiempo'] = (self.inicio + pasos * self.periodo_ms)[:, None]
+        fase = 0.01 * pasos[:, None] + self.desfase
+        lecturas['valor'] = np.where(self.es_densidad,
+                                     1.00 + 0.008 * np.sin(fase) + self.rng.normal(0, 0.003, fase.shape),
+                                     self.rng.normal(7.0, 0.05, fase.shape))
+        return lecturas.ravel()
+
+
+async def enviar(transporte, direccion, lecturas, tam_bloque=4096):
+    """Envía lecturas al servicio por bloques de ``tam_bloque`` registros"""
+    datos = memoryview(np.ascontiguousarray(lecturas, dtype=TIPO_LECTURA).view(np.uint8))
+    if transporte == 'udp':
+        bucle = asyncio.get_running_loop()
+        transporte_udp, _ = await bucle.create_datagram_endpoint(asyncio.DatagramProtocol,
+                                                                  remote_addr=direccion)
+        paso = LECTURAS_DATAGRAMA * TIPO_LECTURA.itemsize
+        for inicio in range(0, len(datos), paso):
+            transporte_udp.sendto(datos[inicio:inicio + paso])
+            # Ceder el bucle para que el receptor (si es el mismo proceso) lea
+            await asyncio.sleep(0)
+        transporte_udp.close()
+        return
+    if transporte == 'tcp':
+        lector, escritor = await asyncio.open_connection(*direccion)
+    else:
+        lector, escritor = await asyncio.open_unix_connection(direccion)
+    paso = tam_bloque * TIPO_LECTURA.itemsize
+    for inicio in range(0, len(datos), paso):
+        escritor.write(datos[inicio:inicio + paso])
+        await escritor.drain()
+    escritor.close()
+    await escritor.wait_closed()
+
+
+async def prueba_carga(n_lecturas, transporte='tcp', directorio=None, n_conexiones=4, semilla=0):
+    """Mide el caudal de ingesta con el simulador en el mismo proceso (un núcleo)
+
+    Devuelve las estadísticas del servicio con ``perdidas`` (UDP: no
+    llegaron al servicio), ``segundos`` y ``lecturas_por_segundo`` (lecturas
+    guardadas en el almacén).
+    """
+    with tempfile.TemporaryDirectory() as temporal:
+        almacen = AlmacenMediciones(directorio or os.path.join(temporal, 'almacen'))
+        servicio = ServicioIngesta(almacen)
+        await servicio.iniciar()
+        direccion = os.path.join(temporal, 'ingesta.sock') if transporte == 'unix' else ('127.0.0.1', 0)
+        direccion = await servicio.escuchar(transporte, direccion)
+
+        # Cada conexión lleva sensores distintos (como una pasarela por zona).
+        # En UDP el receptor lee un datagrama por vuelta del bucle: con un
+        # solo emisor en el mismo proceso van a la par
+        if transporte == 'udp':
+            n_conexiones = 1
+        simulador = SimuladorSensores(semilla=semilla)
+        lecturas = simulador.generar(-(-n_lecturas // len(SENSORES)))[:n_lecturas]
+        grupos = [lecturas[lecturas['sensor'] % n_conexiones == c] for c in range(n_conexiones)]
+
+        inicio = time.perf_counter()
+        await asyncio.gather(*(enviar(transporte, direccion, g) for g in grupos))
+        # Esperar a que el servidor lea lo que queda en los sockets (en UDP
+        # lo que se pierda no llega nunca: se espera a que deje de llegar)
+        anteriores = -1
+        while (llegadas := servicio.estadisticas['recibidas'] + servicio.estadisticas['descartadas']) \
+                not in (n_lecturas, anteriores):
+            anteriores = llegadas
+            await asyncio.sleep(0.05)
+        await servicio.cerrar()
+        segundos = time.perf_counter() - inicio
+
+    resultado = dict(servicio.estadisticas)
+    resultado['perdidas'] = n_lecturas - resultado['recibidas'] - resultado['descartadas']
+    resultado['segundos'] = segundos
+    resultado['lecturas_por_segundo'] = resultado['guardadas'] / segundos
+    return resultado
+
+
+async def servir(transporte, direccion, directorio):
+    """Servicio de ingesta hasta Ctrl+C, con un resumen periódico"""
+    servicio = ServicioIngesta(AlmacenMediciones(directorio))
+    await servicio.iniciar()
+    direccion = await servicio.escuchar(transporte, direccion)
+    print(f"Escuchando por {transporte} en {direccion}; almacén en '{directorio}'")
+    try:
+        while True:
+            await asyncio.sleep(10)
+            print(servicio.estadisticas)
+    finally:
+        await servicio.cerrar()
+
+
+def _direccion(transporte, texto):
+    if transporte == 'unix':
+        return texto or os.path.join(tempfile.gettempdir(), 'ingesta.sock')
+    if not texto:
+        return DIRECCION_TCP
+    host, _, puerto = texto.rpartition(':')
+    return host or DIRECCION_TCP[0], int(puerto)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingesta de lecturas de sensores")
+    parser.add_argument('--transporte', choices=['tcp', 'udp', 'unix'], default='tcp')
+    parser.add_argument('--direccion', help="host:puerto (tcp/udp) o ruta del socket (unix)")
+    parser.add_argument('--almacen', default='almacen', help="directorio del almacén de mediciones")
+    modo = parser.add_mutually_exclusive_group()
+    modo.add_argument('--simular', type=int, metavar='INSTANTES',
+                      help="envía INSTANTES lecturas de cada sensor a un servicio en marcha")
+    modo.add_argument('--prueba-carga', type=int, metavar='LECTURAS',
+                      help="mide el caudal con el simulador en el mismo proceso")
+    args = parser.parse_args()
+
+    if args.prueba_carga:
+        resultado = asyncio.run(prueba_carga(args.prueba_carga, args.transporte))
+        print(f"{resultado['guardadas']} lecturas guardadas en {resultado['segundos']:.2f} s: "
+              f"{resultado['lecturas_por_segundo']:,.0f} lecturas/s "
+              f"(descartadas: {resultado['descartadas']}, perdidas: {resultado['perdidas']}, esperas por búfer: {resultado['esperas']})")
+    elif args.simular:
+        direccion = _direccion(args.transporte, args.direccion)
+        asyncio.run(enviar(args.transporte, direccion, SimuladorSensores().generar(args.simular)))
+    else:
+        try:
+            asyncio.run(servir(args.transporte, _direccion(args.transporte, args.direccion), args.almacen))
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,156 @@
+"""
+Límites de control incrementales para muchas variables (tags) a la vez.
+
+Cada lectura actualiza la media y la varianza en O(1) con el algoritmo de
+Welford, sin volver a recorrer el histórico. El estado de cada tag son unos
+pocos números guardados en arrays de NumPy compartidos, por lo que miles de
+tags ocupan memoria plana y proporcional a su número.
+
+Flujo típico:
+- Fase I: se acumulan lecturas del proceso estable (línea base).
+- ``congelar``: se fijan CL, UCL y LCL a partir de la fase I.
+- Fase II: cada lectura nueva se clasifica frente a los límites congelados,
+  mientras se siguen acumulando estadísticas en vivo.
+"""
+
+import numpy as np
+
+# Códigos de clasificación de un punto
+EN_CONTROL = 0
+SOBRE_UCL = 1
+BAJO_LCL = -1
+
+
+class LimitesControl:
+    """Estado de gráficos de control para un conjunto creciente de tags"""
+
+    def __init__(self, k_sigma=3.0, capacidad=64):
+        self.k_sigma = k_sigma
+        self._indices = {}
+        self._crear_arrays(capacidad)
+
+    def _crear_arrays(self, capacidad):
+        # Estadísticas en curso (fase I o, tras congelar, fase II en vivo)
+        self.n = np.zeros(capacidad, dtype=np.int64)
+        self.media = np.zeros(capacidad)
+        self.m2 = np.zeros(capacidad)
+        # Límites congelados (NaN hasta que el tag se congela)
+        self.cl = np.full(capacidad, np.nan)
+        self.ucl = np.full(capacidad, np.nan)
+        self.lcl = np.full(capacidad, np.nan)
+        self.congelado = np.zeros(capacidad, dtype=bool)
+
+    def _ampliar(self):
+        """Duplica la capacidad de los arrays conservando el estado"""
+        anterior = {nombre: getattr(self, nombre)
+                    for nombre in ('n', 'media', 'm2', 'cl', 'ucl', 'lcl', 'congelado')}
+        self._crear_arrays(2 * len(self.n))
+        for nombre, valores in anterior.items():
+            getattr(self, nombre)[:len(valores)] = valores
+
+    def __len__(self):
+        return len(self._indices)
+
+    def indice(self, tag):
+        """Devuelve el índice interno de un tag, registrándolo si es nuevo"""
+        idx = self._indices.get(tag)
+        if idx is None:
+            idx = len(self._indices)
+            if idx == len(self.n):
+                self._ampliar()
+            self._indices[tag] = idx
+        return idx
+
+    def indices(self, tags):
+        """Convierte una secuencia de tags en un array de índices internos"""
+        return np.fromiter((self.indice(t) for t in tags), dtype=np.intp)
+
+    def sigma(self, tag):
+        """Desviación estándar muestral (ddof=1) de las lecturas acumuladas"""
+        idx = self.indice(tag)
+        n = self.n[idx]
+        return np.sqrt(self.m2[idx] / (n - 1)) if n > 1 else np.nan
+
+    def actualizar(self, tag, valor):
+        """Incorpora una lectura y devuelve su clasificación
+
+        En fase I la lectura amplía la línea base y se devuelve EN_CONTROL.
+        En fase II se clasifica frente a los límites congelados.
+        """
+        idx = self.indice(tag)
+        n = self.n[idx] + 1
+        delta = valor - self.media[idx]
+        self.media[idx] += delta / n
+        self.m2[idx] += delta * (valor - self.media[idx])
+        self.n[idx] = n
+        if not self.congelado[idx]:
+            return EN_CONTROL
+        if valor > self.ucl[idx]:
+            return SOBRE_UCL
+        if valor < self.lcl[idx]:
+            return BAJO_LCL
+        return EN_CONTROL
+
+    def actualizar_lote(self, indices, valores):
+        """Incorpora un lote de lecturas de varios tags en una sola pasada
+
+        ``indices`` son índices internos (ver ``indices``). Las estadísticas
+        del lote se combinan con las acumuladas mediante la fórmula de Chan,
+        equivalente a aplicar Welford lectura a lectura. Devuelve un array
+        con la clasificación de cada lectura.
+        """
+        indices = np.asarray(indices, dtype=np.intp)
+        valores = np.asarray(valores, dtype=float)
+        clasificacion = self.clasificar_indices(indices, valores)
+
+        m = len(self.n)
+        cuenta = np.bincount(indices, minlength=m)
+        presentes = cuenta > 0
+        media_lote = np.zeros(m)
+        media_lote[presentes] = (np.bincount(indices, valores, minlength=m)[presentes]
+                                 / cuenta[presentes])
+        m2_lote = np.bincount(indices, (valores - media_lote[indices]) ** 2, minlength=m)
+
+        n_total = self.n + cuenta
+        delta = media_lote - self.media
+        peso = np.zeros(m)
+        peso[presentes] = cuenta[presentes] / n_total[presentes]
+        self.m2 += m2_lote + delta ** 2 * self.n * peso
+        self.media += delta * peso
+        self.n = n_total
+        return clasificacion
+
+    def congelar(self, tag):
+        """Fija CL/UCL/LCL con la línea base y pasa el tag a fase II"""
+        idx = self.indice(tag)
+        if self.n[idx] < 2:
+            raise ValueError(f"El tag {tag!r} necesita al menos 2 lecturas en fase I")
+        sigma = np.sqrt(self.m2[idx] / (self.n[idx] - 1))
+        self.cl[idx] = self.media[idx]
+        self.ucl[idx] = self.media[idx] + self.k_sigma * sigma
+        self.lcl[idx] = self.media[idx] - self.k_sigma * sigma
+        self.congelado[idx] = True
+        # Las estadísticas en vivo de la fase II empiezan de cero
+        self.n[idx] = 0
+        self.media[idx] = 0.0
+        self.m2[idx] = 0.0
+
+    def limites(self, tag):
+        """Devuelve (CL, UCL, LCL) congelados de un tag"""
+        idx = self.indice(tag)
+        if not self.congelado[idx]:
+            raise ValueError(f"El tag {tag!r} todavía está en fase I")
+        return self.cl[idx], self.ucl[idx], self.lcl[idx]
+
+    def clasificar(self, tag, valores):
+        """Clasifica valores de un tag sin modificar su estado"""
+        valores = np.asarray(valores, dtype=float)
+        return self.clasificar_indices(np.full(valores.shape, self.indice(tag)), valores)
+
+    def clasificar_indices(self, indices, valores):
+        """Clasificación vectorizada de lecturas frente a los límites congelados"""
+        # Con NaN (tags en fase I) ambas comparaciones son falsas: EN_CONTROL
+        clasificacion = np.zeros(np.shape(valores), dtype=np.int8)
+        clasificacion[valores > self.ucl[indices]] = SOBRE_UCL
+        clasificacion[valores < self.lcl[indices]] = BAJO_LCL
+        return clasificacion
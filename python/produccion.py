@@ -0,0 +1,168 @@
+"""
+Agregación de lotes por día, turno y línea para los KPI de producción.
+
+Cada lote es un registro (instante, conforme sí/no, línea). ``AgregadorProduccion``
+guarda solo los conteos de lotes y de lotes conformes en un array
+día × turno × línea: el turno de cada lote sale de ``np.searchsorted``
+sobre los segundos desde medianoche y los conteos de ``np.bincount`` sobre
+un índice plano, sin bucles por lote. Añadir lotes nuevos solo recorre esos
+lotes (no se vuelve a contar el día), así que el dashboard puede
+actualizarse con cada lote que llega.
+"""
+
+from datetime import datetime
+
+import numpy as np
+
+# Hora de inicio de cada turno y etiquetas de los paneles
+INICIO_TURNOS = (0, 8, 16)
+ETIQUETAS_TURNOS = ('Turno 1\n(00-08h)', 'Turno 2\n(08-16h)', 'Turno 3\n(16-24h)')
+
+# Simulación: líneas de la planta, lotes por turno (todas las líneas) y
+# fracción de lotes no conformes
+N_LINEAS = 3
+LOTES_TURNO = 150
+FRACCION_NO_CONFORME = 0.01
+
+
+def _a_datetime64(tiempos):
+    tiempos = np.asarray(tiempos)
+    if tiempos.dtype == object:
+        tiempos = tiempos.astype('datetime64[us]')
+    return tiempos
+
+
+def dias_y_turnos(tiempos, inicio_turnos=INICIO_TURNOS):
+    """Día (datetime64[D]) y turno (0..T-1) de cada instante"""
+    tiempos = _a_datetime64(tiempos)
+    dias = tiempos.astype('datetime64[D]')
+    segundos = (tiempos - dias) // np.timedelta64(1, 's')
+    inicios = np.asarray(inicio_turnos) * 3600
+    return dias, np.searchsorted(inicios, segundos, side='right') - 1
+
+
+def _porcentaje(conformes, lotes):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return conformes / lotes * 100
+
+
+class AgregadorProduccion:
+    """Conteos de lotes y lotes conformes por día × turno × línea, incrementales
+
+    Los días se guardan desde el primero visto; el array crece (duplicando
+    su capacidad) cuando llegan días nuevos o anteriores.
+    """
+
+    def __init__(self, n_lineas=1, inicio_turnos=INICIO_TURNOS, capacidad=32):
+        self.n_lineas = n_lineas
+        self.inicio_turnos = tuple(inicio_turnos)
+        forma = (capacidad, len(self.inicio_turnos), n_lineas)
+        self.lotes = np.zeros(forma, dtype=np.int64)
+        self.conformes = np.zeros(forma, dtype=np.int64)
+        self.primer_dia = None
+        self.n_dias = 0
+
+    def _ampliar(self, desde, hasta):
+        """Asegura sitio para los días ``desde``..``hasta`` (datetime64[D])"""
+        un_dia = np.timedelta64(1, 'D')
+        primer_dia = desde if self.primer_dia is None else min(self.primer_dia, desde)
+        delante = 0 if self.primer_dia is None else int((self.primer_dia - primer_dia) // un_dia)
+        n_dias = max(self.n_dias + delante, int((hasta - primer_dia) // un_dia) + 1)
+        if delante or n_dias > len(self.lotes):
+            capacidad = max(n_dias, 2 * len(self.lotes))
+            for nombre in ('lotes', 'conformes'):
+                nuevo = np.zeros((capacidad,) + self.lotes.shape[1:], dtype=np.int64)
+                nuevo[delante:delante + self.n_dias] = getattr(self, nombre)[:self.n_dias]
+                setattr(self, nombre, nuevo)
+        self.primer_dia, self.n_dias = primer_dia, n_dias
+
+    def anadir(self, tiempos, conformes, lineas=None):
+        """Añade lotes (instantes, conformes booleanos y líneas 0..L-1) y devuelve el agregador"""
+        dias, turnos = dias_y_turnos(tiempos, self.inicio_turnos)
+        if dias.size == 0:
+            return self
+        conformes = np.asarray(conformes, dtype=bool)
+        lineas = np.zeros(len(dias), dtype=np.intp) if lineas is None else np.asarray(lineas, dtype=np.intp)
+        desde, hasta = dias.min(), dias.max()
+        self._ampliar(desde, hasta)
+
+        # Solo se cuentan los días que tocan estos lotes
+        un_dia = np.timedelta64(1, 'D')
+        n_turnos = len(self.inicio_turnos)
+        forma = (int((hasta - desde) // un_dia) + 1, n_turnos, self.n_lineas)
+        indice = (((dias - desde) // un_dia) * n_turnos + turnos) * self.n_lineas + lineas
+        inicio = int((desde - self.primer_dia) // un_dia)
+        tramo = slice(inicio, inicio + forma[0])
+        celdas = int(np.prod(forma))
+        self.lotes[tramo] += np.bincount(indice, minlength=celdas).reshape(forma)
+        self.conformes[tramo] += np.bincount(indice[conformes], minlength=celdas).reshape(forma)
+        return self
+
+    @property
+    def dias(self):
+        """Días cubiertos (datetime64[D]), del primero al último"""
+        if self.primer_dia is None:
+            return np.empty(0, dtype='datetime64[D]')
+        return self.primer_dia + np.arange(self.n_dias)
+
+    def _posicion(self, dia):
+        dia = np.datetime64(dia, 'D')
+        if self.primer_dia is None:
+            return None
+        posicion = int((dia - self.primer_dia) // np.timedelta64(1, 'D'))
+        return posicion if 0 <= posicion < self.n_dias else None
+
+    def resumen_dia(self, dia):
+        """Lotes y conformidad de un día por turno y línea y en total
+
+        Devuelve un diccionario con ``lotes`` y ``conformes`` (T, L),
+        ``lotes_turno`` y ``conformidad_turno`` (T,), ``lotes_linea`` y
+        ``conformidad_linea`` (L,), ``lotes_dia`` y ``conformidad_dia``. Las
+        conformidades son porcentajes (NaN sin lotes).
+        """
+        posicion = self._posicion(dia)
+        forma = self.lotes.shape[1:]
+        lotes = self.lotes[posicion] if posicion is not None else np.zeros(forma, dtype=np.int64)
+        conformes = self.conformes[posicion] if posicion is not None else np.zeros(forma, dtype=np.int64)
+        return {
+            'lotes': lotes, 'conformes': conformes,
+            'lotes_turno': lotes.sum(axis=1),
+            'conformidad_turno': _porcentaje(conformes.sum(axis=1), lotes.sum(axis=1)),
+            'lotes_linea': lotes.sum(axis=0),
+            'conformidad_linea': _porcentaje(conformes.sum(axis=0), lotes.sum(axis=0)),
+            'lotes_dia': int(lotes.sum()),
+            'conformidad_dia': _porcentaje(conformes.sum(), lotes.sum()),
+        }
+
+    def por_dia(self):
+        """Lotes y conformidad de cada día cubierto: ``dias``, ``lotes``, ``conformidad``"""
+        lotes = self.lotes[:self.n_dias].sum(axis=(1, 2))
+        conformes = self.conformes[:self.n_dias].sum(axis=(1, 2))
+        return {'dias': self.dias, 'lotes': lotes, 'conformidad': _porcentaje(conformes, lotes)}
+
+
+def simular_lotes(desde, hasta, lotes_turno=LOTES_TURNO, n_lineas=N_LINEAS,
+                  fraccion_no_conforme=FRACCION_NO_CONFORME, generador=np.random):
+    """Lotes simulados entre ``desde`` y ``hasta``: (instantes, conformes, líneas)
+
+    Llegan al azar (proceso de Poisson) con ``lotes_turno`` lotes cada 8
+    horas entre todas las líneas. ``generador`` es ``np.random`` (estado
+    global, para las semillas de los scripts) o un ``np.random.Generator``.
+    """
+    desde, hasta = np.datetime64(desde, 'ms'), np.datetime64(hasta, 'ms')
+    duracion = max(0, int((hasta - desde) // np.timedelta64(1, 'ms')))
+    n = generador.poisson(lotes_turno * duracion / (8 * 3600 * 1000))
+    tiempos = desde + np.sort((generador.random(n) * duracion).astype(np.int64)).astype('timedelta64[ms]')
+    conformes = generador.random(n) >= fraccion_no_conforme
+    lineas = (generador.random(n) * n_lineas).astype(np.intp)
+    return tiempos, conformes, lineas
+
+
+def formato_porcentaje(valor):
+    """Porcentaje con un decimal para los KPI; '—' si no hay lotes (NaN)"""
+    return '—' if np.isnan(valor) else f'{valor:.1f}%'
+
+
+def inicio_dia(ahora):
+    """Medianoche del día de ``ahora``"""
+    return datetime.combine(ahora.date(), datetime.min.time())
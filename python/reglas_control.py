@@ -0,0 +1,169 @@
+"""
+Reglas de Western Electric / Nelson sobre muchos tags a la vez.
+
+Las lecturas van en un array (tags × tiempo) y se pasan a unidades de sigma,
+``z = (x - CL) / sigma``. Las reglas se evalúan sobre todo el array con
+ventanas deslizantes en la dimensión del tiempo, sin bucles por tag ni por
+lectura: cada punto se resume en un byte con su zona (lado y número de
+sigmas) y cada regla se reduce a operaciones bit a bit entre vistas
+desplazadas de esos bytes:
+
+1. Un punto más allá de 3σ.
+2. 2 de 3 puntos seguidos más allá de 2σ, del mismo lado.
+3. 4 de 5 puntos seguidos más allá de 1σ, del mismo lado.
+4. 8 puntos seguidos del mismo lado de la línea central.
+5. 6 puntos seguidos crecientes o decrecientes (tendencia).
+
+Una regla se marca en el punto que completa el patrón. Los tags se
+procesan por bloques para acotar la memoria de los temporales.
+"""
+
+import numpy as np
+
+from trazas import trazado
+
+REGLAS = {
+    1: 'Punto fuera de los límites de control (3σ)',
+    2: '2 de 3 puntos más allá de 2σ',
+    3: '4 de 5 puntos más allá de 1σ',
+    4: '8 puntos seguidos del mismo lado de la línea central',
+    5: '6 puntos seguidos en tendencia',
+}
+
+# Elementos por bloque de tags: temporales pequeños que caben en caché
+# (un día de lecturas a 1 Hz por bloque)
+MAX_ELEMENTOS = 1 << 17
+
+
+def _seguidos(a, k):
+    """AND bit a bit de ``k`` posiciones seguidas, para j >= k-1 (última dimensión)
+
+    Cada paso une dos tramos solapados de la longitud ya cubierta, así que
+    hacen falta log2(k) pasadas en lugar de k.
+    """
+    cubiertos = 1
+    while cubiertos < k:
+        paso = min(cubiertos, k - cubiertos)
+        a = a[..., paso:] & a[..., :a.shape[-1] - paso]
+        cubiertos += paso
+    return a
+
+
+def _zonas(z):
+    """Código de zona de cada punto: bit 2k si z > k, bit 2k+1 si z < -k (k = 0..3)
+
+    Con los dos lados y los cuatro umbrales en un byte, cada operación bit a
+    bit posterior evalúa a la vez ambos lados y todas las zonas.
+    """
+    codigo = np.zeros(z.shape, dtype=np.uint8)
+    for k in range(4):
+        codigo |= (z > k).view(np.uint8) * np.uint8(1 << 2 * k)
+        codigo |= (z < -k).view(np.uint8) * np.uint8(2 << 2 * k)
+    return codigo
+
+
+def _marca(a, mascara, bit):
+    """Bit ``bit`` donde ``a`` tiene algún bit de ``mascara``"""
+    # Multiplicar es mucho más rápido que desplazar en arrays de uint8
+    return ((a & np.uint8(mascara)) != 0).view(np.uint8) * np.uint8(1 << bit)
+
+
+def _evaluar_bloque(z):
+    bits = np.zeros(z.shape, dtype=np.uint8)
+    codigo = _zonas(z)
+    # Regla 1: bits de |z| > 3
+    bits |= _marca(codigo, 0xC0, 0)
+    # Regla 2: al menos 2 de 3 es el acarreo de un sumador completo de los
+    # tres códigos, calculado bit a bit
+    a, b, c = codigo[..., :-2], codigo[..., 1:-1], codigo[..., 2:]
+    ab = a ^ b
+    suma3 = ab ^ c
+    acarreo3 = (a & b) | (c & ab)
+    bits[..., 2:] |= _marca(acarreo3, 0x30, 1)
+    # Regla 3: la ventana de 5 es la de 3 que acaba dos puntos antes más dos
+    # códigos; hay al menos 4 si los dos sumadores llevan acarreo
+    s, d, e = suma3[..., :-2], codigo[..., 3:-1], codigo[..., 4:]
+    sd = s ^ d
+    acarreo5 = (s & d) | (e & sd)
+    bits[..., 4:] |= _marca(acarreo3[..., :-2] & acarreo5, 0x0C, 2)
+    # Regla 4: 8 seguidos con el mismo bit de lado
+    bits[..., 7:] |= _marca(_seguidos(codigo, 8), 0x03, 3)
+    # Regla 5: 5 subidas (o bajadas) seguidas
+    anterior, siguiente = z[..., :-1], z[..., 1:]
+    signo = (siguiente > anterior).view(np.uint8) | (siguiente < anterior).view(np.uint8) * np.uint8(2)
+    bits[..., 5:] |= _marca(_seguidos(signo, 5), 0x03, 4)
+    return bits
+
+
+@trazado('estadistica')
+def evaluar_reglas(valores, cl, sigma, max_elementos=MAX_ELEMENTOS):
+    """Reglas que cumple cada punto, como bits (bit r-1 = regla r)
+
+    Parámetros:
+    - valores: array (T,) o (L, T) con una fila por tag; NaN = sin lectura
+      (no cuenta para ninguna regla).
+    - cl, sigma: línea central y sigma, comunes o uno por tag.
+
+    Devuelve un array ``uint8`` con la forma de ``valores``.
+    """
+    valores = np.asarray(valores)
+    una_serie = valores.ndim == 1
+    valores = np.atleast_2d(valores)
+    n_tags, n_tiempos = valores.shape
+    cl = np.broadcast_to(np.asarray(cl, dtype=np.float32), n_tags)
+    sigma = np.broadcast_to(np.asarray(sigma, dtype=np.float32), n_tags)
+    bits = np.empty(valores.shape, dtype=np.uint8)
+    por_bloque = max(1, max_elementos // max(n_tiempos, 1))
+    for inicio in range(0, n_tags, por_bloque):
+        fin = min(inicio + por_bloque, n_tags)
+        z = np.subtract(valores[inicio:fin], cl[inicio:fin, None], dtype=np.float32)
+        z /= sigma[inicio:fin, None]
+        bits[inicio:fin] = _evaluar_bloque(z)
+    return bits[0] if una_serie else bits
+
+
+@trazado('estadistica')
+def alertas_reglas(valores, cl, sigma, tiempos=None, tags=None, max_elementos=MAX_ELEMENTOS):
+    """Registro de alertas: una por regla y por cada vez que empieza a cumplirse
+
+    Mientras un patrón se mantiene (p. ej. el 9.º, 10.º... punto seguido del
+    mismo lado) la regla sigue marcada, pero solo genera alerta el primer
+    punto. Devuelve un diccionario de arrays ordenados por tiempo: ``tag``
+    (índice o nombre si se da ``tags``), ``indice`` (posición en el tiempo),
+    ``tiempo`` (si se da ``tiempos``), ``regla`` y ``valor``.
+    """
+    valores = np.atleast_2d(np.asarray(valores))
+    n_tags, n_tiempos = valores.shape
+    por_bloque = max(1, max_elementos // max(n_tiempos, 1))
+    filas, columnas, reglas = [], [], []
+    for inicio in range(0, n_tags, por_bloque):
+        fin = min(inicio + por_bloque, n_tags)
+        cl_bloque = np.broadcast_to(np.asarray(cl), n_tags)[inicio:fin]
+        sigma_bloque = np.broadcast_to(np.asarray(sigma), n_tags)[inicio:fin]
+        bits = evaluar_reglas(valores[inicio:fin], cl_bloque, sigma_bloque, max_elementos)
+        nuevos = bits.copy()
+        nuevos[:, 1:] &= ~bits[:, :-1]
+        posicion = np.flatnonzero(nuevos)
+        fila, columna = np.divmod(posicion, n_tiempos)
+        marcadas = nuevos.ravel()[posicion]
+        for regla in REGLAS:
+            cumple = (marcadas & np.uint8(1 << (regla - 1))) != 0
+            filas.append(fila[cumple] + inicio)
+            columnas.append(columna[cumple])
+            reglas.append(np.full(np.count_nonzero(cumple), regla, dtype=np.uint8))
+
+    fila = np.concatenate(filas)
+    columna = np.concatenate(columnas)
+    regla = np.concatenate(reglas)
+    # Orden por tiempo, tag y regla con una sola clave entera
+    orden = np.argsort((columna * n_tags + fila) * 8 + regla, kind='stable')
+    fila, columna, regla = fila[orden], columna[orden], regla[orden]
+    alertas = {
+        'tag': fila if tags is None else np.asarray(tags)[fila],
+        'indice': columna,
+        'regla': regla,
+        'valor': valores[fila, columna],
+    }
+    if tiempos is not None:
+        alertas['tiempo'] = np.asarray(tiempos)[columna]
+    return alertas
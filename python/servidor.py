@@ -0,0 +1,274 @@
+"""
+Servidor HTTP local de los dashboards y las figuras del informe.
+
+    python servidor.py [--puerto 8000] [--almacen DIR] [-j 2]
+
+- ``/``: índice; los dashboards se muestran y la página se recarga sola.
+- ``/<figura>.png`` (``?dpi=N``) y ``/<figura>.svg``: cualquier figura de
+  ``figuras.FIGURAS``.
+- ``/estado``: contadores de peticiones, renders y caché (JSON).
+
+Cada figura tiene una versión: la clave de ``cache_figuras`` (código y
+parámetros) más, en los dashboards, la versión del almacén o, sin almacén,
+el minuto de la simulación. Con ella:
+
+- el ETag se calcula sin dibujar nada, y un ``If-None-Match`` que coincide
+  se responde con 304;
+- los bytes dibujados se guardan en una caché LRU limitada en bytes;
+- las peticiones simultáneas de la misma figura y versión esperan a un
+  único render.
+
+Los renders se hacen en un pool de procesos acotado (Matplotlib no es
+seguro entre hilos). Cincuenta pantallas que piden el mismo dashboard
+cuestan un render por versión de los datos, no cincuenta.
+"""
+
+import argparse
+import hashlib
+import html
+import json
+import multiprocessing
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import matplotlib
+matplotlib.use('Agg')
+
+import cache_figuras
+import figuras
+from almacen import AlmacenMediciones
+from dashboard_digital import abrir_almacen
+
+PUERTO = 8000
+TRABAJADORES = 2
+TAM_CACHE = 64 << 20
+
+# Resolución por defecto (pantalla) y máxima de los PNG
+DPI_PANTALLA = 100
+DPI_MINIMO, DPI_MAXIMO = 20, 300
+
+TIPOS = {'png': 'image/png', 'svg': 'image/svg+xml'}
+
+# Figuras que dependen del almacén o, sin él, de la hora (se simulan al minuto)
+DASHBOARDS = ('dashboard_digital', 'dashboard_simple')
+
+# Segundos entre recargas de la página de índice
+RECARGA = 60
+
+_RUTA_FIGURA = re.compile(r'^/([A-Za-z0-9_]+)\.(png|svg)$')
+
+# Almacenes abiertos en cada proceso de render (sus memmaps se reutilizan)
+_almacenes = {}
+
+
+def _renderizar(nombre, formato, dpi, almacen=None, ahora=None):
+    """En un proceso del pool: crea la figura y devuelve los bytes del fichero"""
+    import matplotlib.pyplot as plt
+    from exportacion import figura_a_bytes
+    argumentos = {}
+    if nombre in DASHBOARDS:
+        if almacen is not None and almacen not in _almacenes:
+            _almacenes[almacen] = AlmacenMediciones(almacen)
+        # Como en el modo en vivo, la producción del día llega hasta ``ahora``
+        argumentos = {'almacen': _almacenes.get(almacen), 'ahora': ahora, 'hasta_ahora': True}
+    with plt.rc_context(figuras.estilo_figura(nombre)):
+        fig = figuras.FIGURAS[nombre](**argumentos)
+        try:
+            return figura_a_bytes(fig, formato, dpi)
+        finally:
+            plt.close(fig)
+
+
+class CacheRenders:
+    """Renders de figuras por versión: caché LRU, ETag y peticiones agrupadas
+
+    ``preparar`` da la clave (figura, formato, dpi, versión) y su ETag sin
+    dibujar; ``obtener`` devuelve los bytes de la caché, espera al render
+    en curso de esa misma clave o lanza uno nuevo en el pool.
+    """
+
+    def __init__(self, almacen=None, trabajadores=TRABAJADORES, tam_cache=TAM_CACHE):
+        self.almacen = almacen
+        self.tam_cache = tam_cache
+        # 'spawn': los procesos no heredan los hilos del servidor; cada uno
+        # importa Matplotlib y los scripts una vez, al importar este módulo
+        self.pool = ProcessPoolExecutor(max_workers=trabajadores,
+                                        mp_context=multiprocessing.get_context('spawn'))
+        self.claves_codigo = {nombre: cache_figuras.clave_figura(nombre) for nombre in figuras.FIGURAS}
+        self.cache = OrderedDict()
+        self.bytes_cache = 0
+        self.en_curso = {}
+        self.cerrojo = threading.Lock()
+        self.contadores = {'peticiones': 0, 'aciertos': 0, 'agrupadas': 0, 'renders': 0,
+                           'no_modificadas': 0, 'errores': 0}
+
+    def version(self, nombre):
+        """Versión de una figura y ``ahora`` con el que se dibuja (None: el de la figura)"""
+        if nombre not in DASHBOARDS:
+            return self.claves_codigo[nombre], None
+        if self.almacen is not None:
+            return f'{self.claves_codigo[nombre]}:{self.almacen.version()}', None
+        ahora = datetime.now().replace(second=0, microsecond=0)
+        return f'{self.claves_codigo[nombre]}:{ahora.isoformat()}', ahora
+
+    def preparar(self, nombre, formato, dpi):
+        """(clave, etag, ahora) de la versión actual de una figura"""
+        version, ahora = self.version(nombre)
+        clave = (nombre, formato, dpi if formato == 'png' else None, version)
+        etag = '"' + hashlib.sha256(repr(clave).encode()).hexdigest()[:32] + '"'
+        return clave, etag, ahora
+
+    def _guardar(self, clave, datos):
+        self.cache[clave] = datos
+        self.bytes_cache += len(datos)
+        while self.bytes_cache > self.tam_cache and len(self.cache) > 1:
+            _, expulsado = self.cache.popitem(last=False)
+            self.bytes_cache -= len(expulsado)
+
+    def _terminado(self, clave, futuro):
+        with self.cerrojo:
+            self.en_curso.pop(clave, None)
+            if futuro.exception() is None:
+                self._guardar(clave, futuro.result())
+            else:
+                self.contadores['errores'] += 1
+
+    def obtener(self, clave, ahora=None):
+        """Bytes de la figura de ``clave``: de la caché o de un único render compartido"""
+        with self.cerrojo:
+            self.contadores['peticiones'] += 1
+            datos = self.cache.get(clave)
+            if datos is not None:
+                self.cache.move_to_end(clave)
+                self.contadores['aciertos'] += 1
+                return datos
+            futuro = self.en_curso.get(clave)
+            nuevo = futuro is None
+            if nuevo:
+                nombre, formato, dpi, _ = clave
+                almacen = self.almacen.directorio if self.almacen is not None else None
+                futuro = self.pool.submit(_renderizar, nombre, formato, dpi or DPI_PANTALLA,
+                                          almacen, ahora)
+                self.en_curso[clave] = futuro
+                self.contadores['renders'] += 1
+            else:
+                self.contadores['agrupadas'] += 1
+        if nuevo:
+            futuro.add_done_callback(lambda f: self._terminado(clave, f))
+        return futuro.result()
+
+    def estado(self):
+        with self.cerrojo:
+            return dict(self.contadores, en_cache=len(self.cache), bytes_cache=self.bytes_cache,
+                        en_curso=len(self.en_curso))
+
+    def cerrar(self):
+        self.pool.shutdown(cancel_futures=True)
+
+
+def pagina_indice():
+    """HTML con los dashboards en pantalla y enlaces a todas las figuras"""
+    dashboards = ''.join(f'<h2>{html.escape(nombre)}</h2><img src="/{nombre}.png" '
+                         f'style="max-width:100%">' for nombre in DASHBOARDS)
+    enlaces = ''.join(f'<li>{html.escape(nombre)}: <a href="/{nombre}.png">PNG</a> · '
+                      f'<a href="/{nombre}.svg">SVG</a></li>' for nombre in figuras.FIGURAS)
+    return (f'<!DOCTYPE html><html><head><meta charset="utf-8">'
+            f'<meta http-equiv="refresh" content="{RECARGA}">'
+            f'<title>Control de calidad</title></head><body>'
+            f'{dashboards}<h2>Figuras</h2><ul>{enlaces}</ul></body></html>')
+
+
+class Manejador(BaseHTTPRequestHandler):
+    """Peticiones GET y HEAD del índice, el estado y las figuras"""
+
+    def _responder(self, estado, tipo=None, cuerpo=b'', cabeceras=()):
+        self.send_response(estado)
+        if tipo is not None:
+            self.send_header('Content-Type', tipo)
+        for nombre, valor in cabeceras:
+            self.send_header(nombre, valor)
+        self.send_header('Content-Length', str(len(cuerpo)))
+        self.end_headers()
+        # HEAD: mismas cabeceras (Content-Length incluido) sin cuerpo
+        if self.command != 'HEAD':
+            self.wfile.write(cuerpo)
+
+    def do_GET(self):
+        renders = self.server.renders
+        url = urlsplit(self.path)
+        if url.path == '/':
+            self._responder(HTTPStatus.OK, 'text/html; charset=utf-8', pagina_indice().encode())
+            return
+        if url.path == '/estado':
+            self._responder(HTTPStatus.OK, 'application/json',
+                            json.dumps(renders.estado()).encode())
+            return
+        ruta = _RUTA_FIGURA.match(url.path)
+        if ruta is None or ruta.group(1) not in figuras.FIGURAS:
+            self._responder(HTTPStatus.NOT_FOUND, 'text/plain; charset=utf-8', b'Figura desconocida\n')
+            return
+        nombre, formato = ruta.groups()
+        try:
+            dpi = int(parse_qs(url.query).get('dpi', [DPI_PANTALLA])[0])
+        except ValueError:
+            dpi = None
+        if dpi is None or not DPI_MINIMO <= dpi <= DPI_MAXIMO:
+            self._responder(HTTPStatus.BAD_REQUEST, 'text/plain; charset=utf-8',
+                            f'dpi debe estar entre {DPI_MINIMO} y {DPI_MAXIMO}\n'.encode())
+            return
+
+        clave, etag, ahora = renders.preparar(nombre, formato, dpi)
+        cabeceras = [('ETag', etag), ('Cache-Control', 'no-cache')]
+        # Comparación débil (RFC 7232): W/"x" coincide con "x"
+        etiquetas = {e.strip().removeprefix('W/') for e in self.headers.get('If-None-Match', '').split(',')}
+        if etag in etiquetas or '*' in etiquetas:
+            with renders.cerrojo:
+                renders.contadores['no_modificadas'] += 1
+            self._responder(HTTPStatus.NOT_MODIFIED, cabeceras=cabeceras)
+            return
+        try:
+            datos = renders.obtener(clave, ahora)
+        except Exception as error:
+            self._responder(HTTPStatus.INTERNAL_SERVER_ERROR, 'text/plain; charset=utf-8',
+                            f'Error al dibujar {nombre}: {error}\n'.encode())
+            return
+        self._responder(HTTPStatus.OK, TIPOS[formato], datos, cabeceras)
+
+    do_HEAD = do_GET
+
+
+def servir(host='127.0.0.1', puerto=PUERTO, almacen=None, trabajadores=TRABAJADORES,
+           tam_cache=TAM_CACHE):
+    """Arranca el servidor y atiende peticiones hasta Ctrl+C"""
+    servidor = ThreadingHTTPServer((host, puerto), Manejador)
+    servidor.daemon_threads = True
+    servidor.renders = CacheRenders(almacen, trabajadores, tam_cache)
+    print(f"🌐 Dashboards en http://{host}:{servidor.server_port}/")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+        servidor.renders.cerrar()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor local de dashboards y figuras")
+    parser.add_argument('--host', default='127.0.0.1', help="dirección en la que escuchar")
+    parser.add_argument('--puerto', type=int, default=PUERTO)
+    parser.add_argument('--almacen', help="directorio del almacén de mediciones "
+                                          "(si está vacío se llena con datos simulados)")
+    parser.add_argument('-j', '--trabajadores', type=int, default=TRABAJADORES,
+                        help="procesos de render")
+    parser.add_argument('--cache-mb', type=int, default=TAM_CACHE >> 20,
+                        help="tamaño máximo de la caché de imágenes (MB)")
+    args = parser.parse_args()
+    almacen = abrir_almacen(args.almacen) if args.almacen else None
+    servir(args.host, args.puerto, almacen, args.trabajadores, args.cache_mb << 20)
@@ -0,0 +1,8 @@
+import os
+import sys
+
+import matplotlib
+matplotlib.use('Agg')
+
+# Los scripts se importan por su nombre, como al ejecutarlos desde python/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
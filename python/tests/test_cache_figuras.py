@@ -0,0 +1,25 @@
+from datetime import date
+
+import cache_figuras
+
+
+def _aciertos(directorio, hoy):
+    resultados = cache_figuras.construir(str(directorio), ['dashboard_simple', 'grafico_control_basico'],
+                                         hoy=hoy)
+    assert all(r['error'] is None for r in resultados)
+    return [r['acierto'] for r in resultados]
+
+
+def test_figuras_con_fecha_se_reconstruyen_al_cambiar_de_dia(tmp_path):
+    dia, siguiente = date(2026, 1, 1), date(2026, 1, 2)
+    assert _aciertos(tmp_path, dia) == [False, False]
+    assert _aciertos(tmp_path, dia) == [True, True]
+    # Cambia el día: solo el dashboard (depende de la fecha) se vuelve a generar
+    assert _aciertos(tmp_path, siguiente) == [False, True]
+    assert _aciertos(tmp_path, siguiente) == [True, True]
+
+
+def test_clave_estable_entre_llamadas():
+    hoy = date(2026, 1, 1)
+    for nombre in cache_figuras.figuras.FIGURAS:
+        assert cache_figuras.clave_figura(nombre, hoy) == cache_figuras.clave_figura(nombre, hoy)
@@ -0,0 +1,10 @@
+import pytest
+
+import benchmark
+
+
+@pytest.mark.parametrize('modulo', benchmark.PUNTOS_ENTRADA)
+def test_arranque_dentro_del_presupuesto(modulo):
+    # Intérpretes nuevos: ni módulos prohibidos (SciPy) ni más de PRESUPUESTO_IMPORTACION s
+    resultados = benchmark.medir_importacion([modulo])
+    assert benchmark.comprobar_importacion(resultados) == []
@@ -0,0 +1,199 @@
+"""
+Trazas opcionales de las fases de construcción de las figuras.
+
+Se activan con la variable de entorno ``TRAZAS`` (ruta del fichero de
+salida) o con ``--trazas`` en generar_todas_imagenes.py. Cada fase queda
+como un tramo con inicio y duración: importación, generación de datos,
+estadística, creación de la figura, layout (``tight_layout`` y la caja
+ajustada de la exportación) y cada ``savefig``, con el pico de memoria
+residente (RSS) del proceso al cerrar el tramo.
+
+El resultado es un JSON en formato Chrome trace (chrome://tracing o
+https://ui.perfetto.dev). Los procesos hijos heredan la variable, dejan sus
+tramos en ``<fichero>.partes/`` al terminar y el proceso raíz los fusiona
+al salir.
+
+Desactivadas, ``trazado`` devuelve la función sin envolver y ``tramo`` un
+contexto vacío compartido: el coste es nulo o de unos 100 ns por tramo.
+
+Para trazar un script suelto: ``TRAZAS=traza.json python dashboard_digital.py``
+o ``python trazas.py dashboard_digital.py`` con la variable definida.
+"""
+
+import atexit
+import contextlib
+import functools
+import glob
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+RUTA = os.environ.get('TRAZAS') or None
+ACTIVO = RUTA is not None
+
+# Reloj común a todos los procesos: hora de pared al importar + reloj monótono
+_ORIGEN_PARED = time.time_ns() // 1000
+_ORIGEN_MONOTONO = time.perf_counter_ns() // 1000
+
+_eventos = []
+_fusionados = []
+_NULO = contextlib.nullcontext()
+
+
+def _ahora_us():
+    return _ORIGEN_PARED + time.perf_counter_ns() // 1000 - _ORIGEN_MONOTONO
+
+
+def rss_pico_mb():
+    """Pico de memoria residente del proceso en MB (None si no se puede medir)"""
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux da KB y macOS bytes
+    return pico / (1024 ** 2 if sys.platform == 'darwin' else 1024)
+
+
+@contextlib.contextmanager
+def _tramo(nombre, categoria, args):
+    inicio = _ahora_us()
+    try:
+        yield
+    finally:
+        fin = _ahora_us()
+        pico = rss_pico_mb()
+        pid, tid = os.getpid(), threading.get_ident()
+        _eventos.append({'name': nombre, 'cat': categoria, 'ph': 'X', 'ts': inicio,
+                         'dur': fin - inicio, 'pid': pid, 'tid': tid,
+                         'args': dict(args, rss_pico_mb=pico)})
+        if pico is not None:
+            _eventos.append({'name': 'rss_pico', 'ph': 'C', 'ts': fin, 'pid': pid,
+                             'args': {'MB': pico}})
+
+
+def tramo(nombre, categoria='fase', **args):
+    """Contexto que registra un tramo con nombre (nada si las trazas están desactivadas)"""
+    if not ACTIVO:
+        return _NULO
+    return _tramo(nombre, categoria, args)
+
+
+def trazado(nombre, categoria='fase'):
+    """Decorador: cada llamada a la función es un tramo ``nombre``
+
+    Con las trazas desactivadas devuelve la función tal cual.
+    """
+    def decorador(funcion):
+        if not ACTIVO:
+            return funcion
+
+        @functools.wraps(funcion)
+        def envoltura(*a, **kw):
+            with _tramo(nombre, categoria, {'funcion': funcion.__qualname__}):
+                return funcion(*a, **kw)
+        return envoltura
+    return decorador
+
+
+def nombrar_proceso(nombre):
+    """Nombre con el que aparece este proceso en el visor"""
+    if ACTIVO:
+        _eventos.append({'name': 'process_name', 'ph': 'M', 'pid': os.getpid(),
+                         'args': {'name': nombre}})
+
+
+def instrumentar_matplotlib():
+    """Traza ``Figure.tight_layout`` y ``Figure.savefig`` (solo con las trazas activas)"""
+    if not ACTIVO:
+        return
+    from matplotlib.figure import Figure
+    if getattr(Figure.savefig, '_trazado', False):
+        return
+    tight_layout, savefig = Figure.tight_layout, Figure.savefig
+
+    @functools.wraps(tight_layout)
+    def tight_layout_trazado(self, *a, **kw):
+        with _tramo('layout', 'fase', {'metodo': 'tight_layout'}):
+            return tight_layout(self, *a, **kw)
+
+    @functools.wraps(savefig)
+    def savefig_trazado(self, fname, *a, **kw):
+        formato = kw.get('format') or os.path.splitext(str(fname))[1].lstrip('.') or None
+        with _tramo('savefig', 'fase', {'formato': formato}):
+            return savefig(self, fname, *a, **kw)
+
+    savefig_trazado._trazado = True
+    Figure.tight_layout, Figure.savefig = tight_layout_trazado, savefig_trazado
+
+
+def _partes(ruta):
+    return ruta + '.partes'
+
+
+def _guardar_parte():
+    """Escribe los tramos de este proceso para que los fusione el proceso raíz"""
+    if not _eventos:
+        return
+    os.makedirs(_partes(RUTA), exist_ok=True)
+    with open(os.path.join(_partes(RUTA), f'{os.getpid()}.json'), 'w', encoding='utf-8') as f:
+        json.dump(_eventos, f)
+    _eventos.clear()
+
+
+def fusionar(ruta=None):
+    """Une los tramos de este proceso y de sus hijos en un fichero Chrome trace
+
+    Se puede llamar varias veces: cada llamada reescribe el fichero con todo
+    lo fusionado hasta entonces.
+    """
+    ruta = ruta or RUTA
+    eventos = _fusionados
+    eventos.extend(_eventos)
+    _eventos.clear()
+    for parte in sorted(glob.glob(os.path.join(_partes(ruta), '*.json'))):
+        with open(parte, encoding='utf-8') as f:
+            eventos.extend(json.load(f))
+    shutil.rmtree(_partes(ruta), ignore_errors=True)
+    with open(ruta, 'w', encoding='utf-8') as f:
+        json.dump({'traceEvents': eventos, 'displayTimeUnit': 'ms'}, f)
+    return ruta
+
+
+def _al_salir():
+    if os.environ.get('TRAZAS_RAIZ') == str(os.getpid()):
+        if _eventos or os.path.isdir(_partes(RUTA)):
+            fusionar()
+    else:
+        _guardar_parte()
+
+
+if ACTIVO and __name__ != '__main__':
+    # El primer proceso con las trazas activas es el raíz: sus hijos lo heredan
+    os.environ.setdefault('TRAZAS_RAIZ', str(os.getpid()))
+    nombrar_proceso(os.path.basename(sys.argv[0]) or 'python')
+    atexit.register(_al_salir)
+
+
+if __name__ == "__main__":
+    # python trazas.py script.py [args]: ejecuta el script separando la
+    # importación de sus módulos de la ejecución de su bloque principal
+    import importlib
+    import runpy
+
+    script = sys.argv[1]
+    sys.argv = sys.argv[1:]
+    sys.path.insert(0, os.path.dirname(os.path.abspath(script)))
+    nombre = os.path.splitext(os.path.basename(script))[0]
+    # El módulo importado (no este __main__) es el que ven los scripts
+    import trazas
+    with trazas.tramo('importacion', script=nombre):
+        importlib.import_module(nombre)
+    with trazas.tramo('script', script=nombre):
+        runpy.run_path(script, run_name='__main__')
@@ -0,0 +1,194 @@
+"""
+Estimación de vida útil con degradación exponencial y modelo de Arrhenius.
+
+Pensado para programas de estabilidad con muchos lotes × atributos ×
+condiciones de almacenamiento. Todas las series se ajustan a la vez:
+
+1. Cada serie se ajusta a ``y = y0 · exp(-k t)`` por mínimos cuadrados
+   sobre ``ln y`` (recta con sumas vectorizadas, sin bucles por serie).
+2. Las constantes ``k`` de las distintas temperaturas de un mismo lote se
+   enlazan con Arrhenius, ``ln k = ln A - Ea / (R T)``, con el mismo ajuste
+   de recta en lote sobre ``1/T``.
+3. La vida útil es el tiempo en que el modelo cruza el límite,
+   ``t = ln(y0 / limite) / k``, a la temperatura que se pida.
+4. Los intervalos de confianza salen de un bootstrap de residuos
+   vectorizado: todas las réplicas de todas las series se reajustan juntas,
+   por bloques de réplicas para acotar la memoria.
+
+Los datos ausentes se marcan con NaN.
+"""
+
+import numpy as np
+
+from trazas import trazado
+
+# Constante de los gases (J/(mol·K)) y cero absoluto (°C)
+R = 8.314462618
+CERO_ABSOLUTO = -273.15
+
+# Elementos por bloque de réplicas bootstrap (~64 MB en float64)
+MAX_ELEMENTOS = 1 << 23
+
+
+def ajustar_recta(x, y):
+    """Ajusta ``y = a + b·x`` en la última dimensión de ``y`` para todas las series
+
+    ``x`` se difunde contra ``y``; los NaN de ``y`` se ignoran. Devuelve
+    (a, b, n) con el número de puntos válidos de cada serie. Las series
+    con menos de dos puntos (o todos en la misma x) quedan con NaN.
+    """
+    y = np.asarray(y, dtype=float)
+    x = np.broadcast_to(np.asarray(x, dtype=float), y.shape)
+    validos = ~np.isnan(y)
+    n = validos.sum(axis=-1)
+    xv = np.where(validos, x, 0.0)
+    yv = np.where(validos, y, 0.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        media_x = xv.sum(axis=-1) / n
+        media_y = yv.sum(axis=-1) / n
+        # Sumas centradas (numéricamente estables)
+        dx = np.where(validos, x - media_x[..., None], 0.0)
+        dy = np.where(validos, y - media_y[..., None], 0.0)
+        b = (dx * dy).sum(axis=-1) / (dx * dx).sum(axis=-1)
+        a = media_y - b * media_x
+    b = np.where(n >= 2, b, np.nan)
+    a = np.where(n >= 2, a, np.nan)
+    return a, b, n
+
+
+def _log_positivo(y):
+    """ln y, con NaN en los valores no positivos o ausentes"""
+    y = np.asarray(y, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(y > 0, np.log(y), np.nan)
+
+
+def ajustar_exponencial(t, y):
+    """Ajusta ``y = y0 · exp(-k t)`` a todas las series (última dimensión = tiempo)
+
+    Devuelve (ln_y0, k). Los valores no positivos se tratan como ausentes.
+    """
+    ln_y0, pendiente, _ = ajustar_recta(t, _log_positivo(y))
+    return ln_y0, -pendiente
+
+
+def inversa_temperatura(temperaturas_c):
+    """1/T en K^-1 a partir de temperaturas en °C"""
+    return 1.0 / (np.asarray(temperaturas_c, dtype=float) - CERO_ABSOLUTO)
+
+
+def ajustar_arrhenius(temperaturas_c, k):
+    """Ajusta ``ln k = ln A - Ea / (R T)`` sobre la última dimensión de ``k``
+
+    ``k`` tiene una columna por temperatura; las constantes no positivas se
+    ignoran. Devuelve (ln_a, ea) con la energía de activación en J/mol.
+    """
+    ln_a, pendiente, _ = ajustar_recta(inversa_temperatura(temperaturas_c), _log_positivo(k))
+    return ln_a, -pendiente * R
+
+
+def constante_arrhenius(ln_a, ea, temperaturas_c):
+    """Constante de degradación a cada temperatura, con una columna por temperatura"""
+    inversa = inversa_temperatura(temperaturas_c)
+    return np.exp(np.asarray(ln_a)[..., None] - np.asarray(ea)[..., None] / R * inversa)
+
+
+def tiempo_hasta_limite(ln_y0, k, limite):
+    """Tiempo en que ``y0 · exp(-k t)`` alcanza ``limite`` (inf si nunca lo hace)
+
+    Vale para atributos que bajan hacia un mínimo (k > 0) y que suben hacia
+    un máximo (k < 0), partiendo de ``y0`` dentro de especificación. Los
+    ajustes fallidos (NaN) siguen como NaN.
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = (np.asarray(ln_y0) - np.log(limite)) / np.asarray(k)
+    return np.where(np.isnan(t) | (t >= 0), t, np.inf)
+
+
+def _ajustar(t, ln_y, temperaturas_c, limite, temperaturas_objetivo):
+    """Ajustes exponencial y de Arrhenius y vidas útiles a partir de ln y"""
+    ln_y0, pendiente, _ = ajustar_recta(t, ln_y)
+    k = -pendiente
+    ln_a, ea = ajustar_arrhenius(temperaturas_c, k)
+    k_arrhenius = constante_arrhenius(ln_a, ea, temperaturas_objetivo)
+    # y0 no depende de la temperatura: media de los ajustes de las condiciones
+    validos = ~np.isnan(ln_y0)
+    with np.errstate(invalid='ignore'):
+        ln_y0_lote = np.where(validos, ln_y0, 0.0).sum(axis=-1) / validos.sum(axis=-1)
+    return {
+        'k': k,
+        'ln_y0': ln_y0,
+        'vida_util': tiempo_hasta_limite(ln_y0, k, limite),
+        'ln_a': ln_a,
+        'ea': ea,
+        'k_arrhenius': k_arrhenius,
+        'vida_util_arrhenius': tiempo_hasta_limite(ln_y0_lote[..., None], k_arrhenius, limite),
+    }
+
+
+@trazado('estadistica')
+def estimar_vida_util(t, y, temperaturas_c, limite, temperaturas_objetivo=None,
+                      n_bootstrap=1000, confianza=0.95, semilla=None,
+                      max_elementos=MAX_ELEMENTOS):
+    """Estima la vida útil de todas las series con intervalos bootstrap
+
+    Parámetros:
+    - t: tiempos de muestreo (T,), comunes a todas las series.
+    - y: array (..., C, T) con las mediciones; las dimensiones iniciales son
+      libres (lotes, atributos...), C son las condiciones de temperatura y
+      los datos ausentes van como NaN.
+    - temperaturas_c: temperaturas (°C) de las C condiciones.
+    - limite: valor del atributo que marca el fin de la vida útil.
+    - temperaturas_objetivo: temperaturas (°C) a las que predecir la vida
+      útil con Arrhenius (por defecto, las mismas condiciones).
+    - n_bootstrap, confianza, semilla: bootstrap de residuos.
+
+    Devuelve un diccionario con ``k``, ``ln_y0`` y ``vida_util`` (..., C) de
+    cada condición por separado, ``ea`` (J/mol) y ``ln_a`` (...),
+    ``k_arrhenius`` y ``vida_util_arrhenius`` (..., P) en las P temperaturas
+    objetivo, y los límites ``inferior_*``/``superior_*`` del intervalo de
+    ``vida_util``, ``vida_util_arrhenius`` y ``ea``.
+    """
+    t = np.asarray(t, dtype=float)
+    y = np.asarray(y, dtype=float)
+    temperaturas_c = np.asarray(temperaturas_c, dtype=float)
+    if temperaturas_objetivo is None:
+        temperaturas_objetivo = temperaturas_c
+    temperaturas_objetivo = np.atleast_1d(np.asarray(temperaturas_objetivo, dtype=float))
+
+    ln_y = _log_positivo(y)
+    resultado = _ajustar(t, ln_y, temperaturas_c, limite, temperaturas_objetivo)
+    if not n_bootstrap:
+        return resultado
+
+    # Bootstrap de residuos: los residuos válidos de cada serie se agrupan al
+    # principio (np.sort deja los NaN al final) y se remuestrean con índices
+    # aleatorios < n_validos, inflados por sqrt(n / (n - 2)) por los dos
+    # parámetros ajustados
+    ajustado = resultado['ln_y0'][..., None] - resultado['k'][..., None] * t
+    residuos = ln_y - ajustado
+    validos = ~np.isnan(residuos)
+    n_validos = validos.sum(axis=-1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        inflado = np.sqrt(n_validos / (n_validos - 2.0))
+    residuos_ordenados = np.sort(residuos, axis=-1) * np.where(n_validos > 2, inflado, 0.0)[..., None]
+    rng = np.random.default_rng(semilla)
+    por_bloque = max(1, max_elementos // max(y.size, 1))
+    replicas = {'vida_util': [], 'vida_util_arrhenius': [], 'ea': []}
+    for inicio in range(0, n_bootstrap, por_bloque):
+        b = min(por_bloque, n_bootstrap - inicio)
+        indices = (rng.random((b,) + y.shape) * n_validos[..., None]).astype(np.intp)
+        remuestreo = np.take_along_axis(residuos_ordenados[None], indices, axis=-1)
+        ln_y = np.where(validos, ajustado + remuestreo, np.nan)
+        replica = _ajustar(t, ln_y, temperaturas_c, limite, temperaturas_objetivo)
+        for clave in replicas:
+            replicas[clave].append(replica[clave])
+
+    cola = (1 - confianza) / 2 * 100
+    for clave, muestras in replicas.items():
+        muestras = np.concatenate(muestras, axis=0)
+        with np.errstate(invalid='ignore'):
+            inferior, superior = np.nanpercentile(muestras, [cola, 100 - cola], axis=0)
+        resultado[f'inferior_{clave}'] = inferior
+        resultado[f'superior_{clave}'] = superior
+    return resultado